@@ -0,0 +1,273 @@
+"""
+Batch Teacher Evaluations
+=========================
+Runs many evaluations (e.g. end-of-term reviews) through one of the example
+pipelines without a UI:
+
+- lmstudio         the LMStudio example's workflow pipeline
+- gemini-workflow  the Gemini example's workflow pipeline
+- gemini-team      the Gemini example's teacher_evaluation_team
+
+Input is a CSV or JSONL file with an `evaluation` column/field and optional
+`id`, `teacher_name` and `app` (to mix pipelines in one batch). Every
+finished evaluation is appended to `<output>/results.jsonl` and its report
+written to `<output>/reports/<id>.md`; re-running the same command skips
+evaluations that already succeeded, so an interrupted batch resumes where it
+left off.
+
+LMStudio evaluations are admitted through the app's request queue (batch
+lane), so at most QUEUE_SLOTS of them run at once; keep `--workers` within
+QUEUE_SLOTS + QUEUE_MAX_WAITING, or the extra ones fail as busy and are run
+again by the next invocation.
+
+Usage:
+    python batch_evaluate.py evaluations.csv --app lmstudio --workers 4 --backend-limit lmstudio=2
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import argparse
+import csv
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+EXAMPLES_DIR = Path(__file__).resolve().parent / "examples"
+
+APPS = {
+    "lmstudio": ("teacher-evaluation-lmstudio", "lmstudio"),
+    "gemini-workflow": ("teacher-evaluation", "gemini"),
+    "gemini-team": ("teacher-evaluation", "gemini"),
+}
+
+_modules: Dict[str, Any] = {}
+_modules_lock = threading.Lock()
+
+
+def load_example(directory: str) -> Any:
+    """Import an example's app.py (once) under a unique module name."""
+    with _modules_lock:
+        if directory not in _modules:
+            example_dir = EXAMPLES_DIR / directory
+            sys.path.insert(0, str(example_dir))
+            name = directory.replace("-", "_") + "_app"
+            spec = importlib.util.spec_from_file_location(name, example_dir / "app.py")
+            module = importlib.util.module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+            _modules[directory] = module
+        return _modules[directory]
+
+
+# =============================================================================
+# INPUT / OUTPUT
+# =============================================================================
+
+def read_evaluations(path: Path) -> Iterator[Dict[str, str]]:
+    """Yield evaluation records from a CSV or JSONL file."""
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+
+
+def evaluation_id(record: Dict[str, str]) -> str:
+    """Use the record's id, or a stable hash of its content so resumes match."""
+    if record.get("id"):
+        return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(record["id"]))
+    content = f"{record.get('teacher_name', '')}\x1f{record['evaluation']}"
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:12]
+
+
+def build_input(record: Dict[str, str]) -> str:
+    """Same input format as the Gradio app."""
+    input_text = "Teacher Evaluation"
+    if (record.get("teacher_name") or "").strip():
+        input_text += f" for {record['teacher_name'].strip()}"
+    return input_text + f":\n\n{record['evaluation']}"
+
+
+def completed_ids(results_path: Path) -> set:
+    """Ids of evaluations that already succeeded (the checkpoint)."""
+    done = set()
+    if results_path.exists():
+        with open(results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # Partially written line from an interrupted run
+                if result.get("status") == "ok":
+                    done.add(result["id"])
+    return done
+
+
+class ResultWriter:
+    """Appends results to results.jsonl and writes one markdown report per evaluation."""
+
+    def __init__(self, output_dir: Path):
+        self.reports_dir = output_dir / "reports"
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.results_path = output_dir / "results.jsonl"
+        self._lock = threading.Lock()
+
+    def write(self, result: Dict[str, Any], markdown: Optional[str]) -> None:
+        if markdown is not None:
+            report_path = self.reports_dir / f"{result['id']}.md"
+            report_path.write_text(markdown, encoding="utf-8")
+            result["report_path"] = str(report_path)
+        with self._lock, open(self.results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# =============================================================================
+# PIPELINES
+# =============================================================================
+
+def run_pipeline(app_name: str, record_id: str, input_text: str, timings: Dict[str, float]) -> Dict[str, Any]:
+    """Run one evaluation; returns the markdown report and, if structured, the report data."""
+    module = load_example(APPS[app_name][0])
+
+    if app_name == "lmstudio":
+        # Admitted like workflow runs: batch lane of the app's request queue, behind interactive requests
+        return {"markdown": module.generate_batch_report(input_text, f"batch:{record_id}", timings)}
+
+    if app_name == "gemini-workflow":
+        report = module.generate_report(input_text, timings)
+        return {"markdown": module.report_to_markdown(report), "report": report.model_dump(mode="json")}
+
+    output = module.teacher_evaluation_team.run(input_text, stream=False)
+    for member in getattr(output, "member_responses", None) or []:
+        duration = getattr(getattr(member, "metrics", None), "duration", None)
+        name = getattr(member, "agent_name", None) or getattr(member, "team_name", None)
+        if duration is not None and name:
+            timings[name] = timings.get(name, 0.0) + duration
+    content = output.content
+    if hasattr(content, "model_dump"):
+        return {"markdown": str(content), "report": content.model_dump(mode="json")}
+    return {"markdown": str(content)}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="CSV or JSONL file of evaluations")
+    parser.add_argument("--app", choices=sorted(APPS), default="lmstudio", help="Pipeline for records without an 'app' field")
+    parser.add_argument("--output", type=Path, default=Path("batch_output"), help="Output directory")
+    parser.add_argument("--workers", type=int, default=4, help="Evaluations processed at the same time")
+    parser.add_argument(
+        "--backend-limit",
+        action="append",
+        default=[],
+        metavar="BACKEND=N",
+        help="Max concurrent evaluations per backend (lmstudio, gemini); repeatable",
+    )
+    args = parser.parse_args()
+
+    limits = {"lmstudio": args.workers, "gemini": args.workers}
+    for item in args.backend_limit:
+        backend, _, value = item.partition("=")
+        if backend not in limits or not value.isdigit() or int(value) < 1:
+            parser.error(f"invalid --backend-limit {item!r}")
+        limits[backend] = int(value)
+    backend_slots = {backend: threading.BoundedSemaphore(limit) for backend, limit in limits.items()}
+
+    writer = ResultWriter(args.output)
+    done = completed_ids(writer.results_path)
+    already_completed = len(done)
+
+    pending = []
+    for record in read_evaluations(args.input):
+        if not (record.get("evaluation") or "").strip():
+            continue
+        record_id = evaluation_id(record)
+        if record_id in done:
+            continue
+        app_name = record.get("app") or args.app
+        if app_name not in APPS:
+            print(f"[skip] {record_id}: unknown app {app_name!r}")
+            continue
+        pending.append((record_id, app_name, record))
+        done.add(record_id)  # Guard against duplicate rows in the same input
+
+    print(f"{len(pending)} evaluations to run ({already_completed} already completed)")
+    if not pending:
+        return
+
+    # Import the apps (and build agents built on first use) up front so startup is not counted as latency
+    for app_name in {app_name for _, app_name, _ in pending}:
+        build_agents = getattr(load_example(APPS[app_name][0]), "build_agents", None)
+        if build_agents is not None:
+            build_agents()
+
+    latencies: List[float] = []
+    stage_latencies: Dict[str, List[float]] = {}
+    failures = 0
+
+    def evaluate(record_id: str, app_name: str, record: Dict[str, str]) -> Dict[str, Any]:
+        timings: Dict[str, float] = {}
+        with backend_slots[APPS[app_name][1]]:
+            start = time.perf_counter()
+            try:
+                output = run_pipeline(app_name, record_id, build_input(record), timings)
+                error = None
+            except Exception as e:
+                output, error = {}, f"{type(e).__name__}: {e}"
+            latency = time.perf_counter() - start
+        result = {
+            "id": record_id,
+            "teacher_name": record.get("teacher_name"),
+            "app": app_name,
+            "status": "error" if error else "ok",
+            "latency_s": round(latency, 3),
+            "stages_s": {name: round(seconds, 3) for name, seconds in timings.items()},
+        }
+        if error:
+            result["error"] = error
+        if "report" in output:
+            result["report"] = output["report"]
+        writer.write(result, output.get("markdown"))
+        return result
+
+    batch_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(evaluate, *item) for item in pending]
+        for i, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            print(f"[{i}/{len(pending)}] {result['id']} {result['status']} in {result['latency_s']:.1f}s")
+            if result["status"] != "ok":
+                failures += 1
+                continue
+            latencies.append(result["latency_s"])
+            for name, seconds in result["stages_s"].items():
+                stage_latencies.setdefault(name, []).append(seconds)
+    elapsed = time.perf_counter() - batch_start
+
+    print(f"\nCompleted {len(latencies)} evaluations ({failures} failed) in {elapsed:.1f}s")
+    print(f"Throughput: {len(latencies) / (elapsed / 60):.2f} evaluations/minute")
+    if latencies:
+        print(f"\n{'latency (s)':<24} {'p50':>8} {'p90':>8} {'p99':>8}")
+        for name, values in [("end-to-end", latencies), *sorted(stage_latencies.items())]:
+            print(f"{name:<24} {percentile(values, 50):>8.2f} {percentile(values, 90):>8.2f} {percentile(values, 99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
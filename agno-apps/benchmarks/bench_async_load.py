@@ -0,0 +1,170 @@
+"""
+Async Load Benchmark (Gemini AgentOS app)
+=========================================
+Serves the Gemini example's FastAPI app (`app = agent_os.get_app()`) with a
+single uvicorn worker and sends it concurrent evaluation requests, to show
+how many evaluations one event loop holds at once.
+
+Every agent's model is swapped for an OpenAI-compatible one pointed at the
+local stub (see bench_offline.py), so no Gemini key is needed. The stub
+serves every request at once (`--slots`), so the latency it adds is the same
+at any concurrency and any growth comes from the app.
+
+Routes:
+
+- team               POST /teams/{id}/runs (`teacher_evaluation_team.arun`)
+- workflow           POST /workflows/{id}/runs (async `workflow_steps`)
+- workflow-blocking  the same route with the previous, synchronous steps
+                     (`generate_report`), which block the event loop
+
+For every route and concurrency: requests, errors, throughput and latency
+percentiles. With an async path the latency stays close to the
+concurrency-1 latency while throughput grows with concurrency.
+
+Usage:
+    python benchmarks/bench_async_load.py --concurrency 1 8 32 --requests 32
+    python benchmarks/bench_async_load.py --routes team --concurrency 64 --requests 64
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import ScriptedResponder, percentile, sample_evaluation, setup_gemini  # noqa: E402
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+ROUTES = ["team", "workflow", "workflow-blocking"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """One uvicorn worker serving the app in a background thread."""
+
+    def __init__(self, app: Any):
+        import uvicorn
+
+        self.port = free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "AppServer":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def blocking_steps(module: Any):
+    """The workflow's previous synchronous entry point."""
+
+    def steps(workflow, execution_input):
+        return module.generate_report(execution_input.get_input_as_string())
+    return steps
+
+
+async def run_load(base_url: str, path: str, concurrency: int, requests: int, offset: int) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors: List[str] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client: "httpx.AsyncClient", i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, data={"message": sample_evaluation(offset + i), "stream": "false"})
+                body = response.json()
+                if response.status_code != 200 or body.get("status") == "ERROR":
+                    errors.append(f"{response.status_code}: {str(body.get('content') or body)[:120]}")
+                    return
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) if latencies else 0.0,
+        "p95": percentile(latencies, 95) if latencies else 0.0,
+        "max": max(latencies, default=0.0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", choices=ROUTES, nargs="+", default=ROUTES)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per measurement")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=1.0, help="Stub decode time per token")
+    parser.add_argument("--slots", type=int, default=512, help="Requests the stub serves at once")
+    parser.add_argument("--words", type=int, default=200, help="Approximate words per agent output")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    responder = ScriptedResponder()
+    stub = StubOpenAIServer(
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=args.slots, responder=responder
+    ).start()
+    print(f"Stub server: {args.prefill_ms} ms/prompt token, {args.decode_ms} ms/output token, {args.slots} slots\n")
+
+    try:
+        module = setup_gemini(stub, responder, args.words)
+        workflow = module.teacher_evaluation_workflow
+        async_steps = workflow.steps
+        paths = {
+            "team": f"/teams/{module.teacher_evaluation_team.id}/runs",
+            "workflow": f"/workflows/{workflow.id}/runs",
+            "workflow-blocking": f"/workflows/{workflow.id}/runs",
+        }
+
+        print(f"{'route':<18} {'conc':>5} {'reqs':>5} {'errors':>6} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+        offset = 0
+        with AppServer(module.app) as server:
+            for route in args.routes:
+                workflow.steps = blocking_steps(module) if route == "workflow-blocking" else async_steps
+                for concurrency in args.concurrency:
+                    r = asyncio.run(run_load(server.base_url, paths[route], concurrency, args.requests, offset))
+                    offset += args.requests
+                    print(
+                        f"{route:<18} {concurrency:>5} {r['requests']:>5} {len(r['errors']):>6} {r['throughput']:>7.2f}"
+                        f" {r['p50']:>7.2f} {r['p95']:>7.2f} {r['max']:>7.2f}"
+                    )
+                    for error in r["errors"][:3]:
+                        print(f"    {error}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Markdown Rendering Benchmark (LMStudio app)
+===========================================
+Compares the original regex-based `format_markdown_to_html` with the
+precompiled single-pass renderer in `markdown_render.py`:
+
+1. Full render of reports of increasing size (50 KB+); time per KB should
+   stay flat for the new renderer.
+2. Streaming: the report is rendered after every small chunk, as in the
+   Gradio app. Re-rendering the whole document each time is quadratic; the
+   incremental renderer only re-renders the unfinished tail.
+
+Usage:
+    python benchmarks/bench_markdown_render.py
+"""
+
+from pathlib import Path
+import argparse
+import re
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "examples" / "teacher-evaluation-lmstudio"))
+
+from markdown_render import IncrementalMarkdownRenderer, render_markdown  # noqa: E402
+
+SECTION = """## Growth Area {n}: Student Collaboration
+**ISP Way Quote:** "incorporating flexible grouping and collaborative learning structures."
+**Current Practice:** Students work individually on worksheets for most of the lesson.
+**Gap:** There are no structured opportunities for **peer discussion** or group problem solving.
+
+## Strategy {n}: Think-Pair-Share
+
+**What it is:**
+Students think about a question on their own, discuss it with a partner, then share with the class.
+
+**How to implement:**
+
+**Step 1:** Pose an open question.
+*Example:* "Which fraction is larger, 3/4 or 5/8? How do you know?"
+
+- Builds **confidence** before whole-class discussion
+- Gives every student a chance to talk
+1. Start with short, low-stakes prompts
+2. Model the partner conversation
+
+"We ensure active learning for students by providing frequent interaction opportunities."
+
+---
+
+"""
+
+
+def legacy_format_markdown_to_html(markdown_text: str) -> str:
+    """The original implementation from app.py, kept as the baseline."""
+    html = markdown_text
+    html = re.sub(r'^# (.+)$', r'<h1 style="color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px;">\1</h1>', html, flags=re.MULTILINE)
+    html = re.sub(r'^## (.+)$', r'<h2 style="color: #2c3e50; margin-top: 25px; border-bottom: 2px solid #e74c3c; padding-bottom: 8px;">\1</h2>', html, flags=re.MULTILINE)
+    html = re.sub(r'^### (.+)$', r'<h3 style="color: #27ae60; margin-top: 15px;">\1</h3>', html, flags=re.MULTILINE)
+    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
+    html = re.sub(r'^- (.+)$', r'<li style="margin: 8px 0;">\1</li>', html, flags=re.MULTILINE)
+    html = re.sub(r'^\d+\. (.+)$', r'<li style="margin: 8px 0;">\1</li>', html, flags=re.MULTILINE)
+    html = re.sub(r'(<li.*?</li>\n)+', r'<ul style="line-height: 1.8;">\g<0></ul>', html)
+    html = re.sub(r'^"(.+)"$', r'<blockquote style="background: #fef9e7; border-left: 4px solid #f39c12; padding: 15px; margin: 15px 0; font-style: italic; border-radius: 4px;">"\1"</blockquote>', html, flags=re.MULTILINE)
+    lines = html.split('\n')
+    formatted_lines = []
+    for line in lines:
+        if line.strip() and not line.strip().startswith('<'):
+            formatted_lines.append(f'<p style="line-height: 1.6; color: #333;">{line}</p>')
+        else:
+            formatted_lines.append(line)
+    return '\n'.join(formatted_lines)
+
+
+def make_report(size_kb: int) -> str:
+    parts = ["# Professional Development Report\n\n"]
+    n = 1
+    while sum(len(p) for p in parts) < size_kb * 1024:
+        parts.append(SECTION.format(n=n))
+        n += 1
+    return "".join(parts)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 400], help="Report sizes in KB")
+    parser.add_argument("--stream-size", type=int, default=50, help="Report size in KB for the streaming test")
+    parser.add_argument("--chunk", type=int, default=40, help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    print("Full render")
+    print(f"{'size':>8} {'legacy (ms)':>12} {'new (ms)':>10} {'new us/KB':>10}")
+    for size in args.sizes:
+        report = make_report(size)
+        legacy = best_of(lambda: legacy_format_markdown_to_html(report), 5)
+        new = best_of(lambda: render_markdown(report), 5)
+        print(f"{size:>6}KB {legacy * 1000:>12.2f} {new * 1000:>10.2f} {new * 1e6 / size:>10.1f}")
+
+    report = make_report(args.stream_size)
+    prefixes = [report[:end] for end in range(args.chunk, len(report) + args.chunk, args.chunk)]
+
+    def stream_legacy():
+        for prefix in prefixes:
+            legacy_format_markdown_to_html(prefix)
+
+    def stream_full():
+        for prefix in prefixes:
+            render_markdown(prefix)
+
+    def stream_incremental():
+        renderer = IncrementalMarkdownRenderer()
+        for prefix in prefixes:
+            renderer.render(prefix)
+
+    print(f"\nStreaming a {args.stream_size} KB report in {len(prefixes)} chunks of {args.chunk} chars")
+    print(f"{'legacy, full re-render':<28} {best_of(stream_legacy, 1) * 1000:>10.1f} ms")
+    print(f"{'new, full re-render':<28} {best_of(stream_full, 1) * 1000:>10.1f} ms")
+    print(f"{'new, incremental':<28} {best_of(stream_incremental, 1) * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
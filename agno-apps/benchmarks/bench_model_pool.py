@@ -0,0 +1,110 @@
+"""
+LMStudio Endpoint Pool Benchmark
+================================
+Measures how throughput scales when the LMStudio app's model is spread over
+several servers, and how the pool reacts when one of them fails.
+
+Every endpoint is a local stub server (see stub_openai_server.py) that serves
+one request at a time, like a single GPU. No LM Studio is needed.
+
+Usage:
+    python benchmarks/bench_model_pool.py --requests 24 --endpoints 1 2 4
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+import argparse
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "examples" / "teacher-evaluation-lmstudio"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "examples"))  # shared/
+
+from agno.agent import Agent  # noqa: E402
+from agno.run.agent import RunEvent  # noqa: E402
+from agno.run.base import RunStatus  # noqa: E402
+
+from model_pool import EndpointPool, PooledLMStudio  # noqa: E402
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+
+def make_agent(pool: EndpointPool) -> Agent:
+    return Agent(model=PooledLMStudio(id="stub-model", base_url=pool.endpoints[0].base_url, pool=pool), telemetry=False)
+
+
+def run_batch(agent: Agent, requests: int, concurrency: int, stream: bool) -> Tuple[float, int]:
+    """Send `requests` prompts with `concurrency` in flight; returns (elapsed seconds, failed runs)."""
+
+    def one(i: int) -> bool:
+        if stream:
+            return not any(event.event == RunEvent.run_error for event in agent.run(f"Request {i}", stream=True))
+        return agent.run(f"Request {i}").status != RunStatus.error
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        succeeded = list(executor.map(one, range(requests)))
+    return time.perf_counter() - start, succeeded.count(False)
+
+
+def bench_scaling(endpoint_counts: List[int], requests: int, concurrency: int, decode_ms: float, tokens: int) -> None:
+    print(f"Throughput: {requests} requests, {concurrency} concurrent, {tokens} tokens at {decode_ms} ms/token\n")
+    print(f"{'endpoints':>10} {'seconds':>9} {'req/s':>8} {'speedup':>8}  per-endpoint requests")
+    baseline = None
+    for count in endpoint_counts:
+        servers = [StubOpenAIServer(decode_ms=decode_ms, completion_tokens=tokens).start() for _ in range(count)]
+        try:
+            pool = EndpointPool([server.base_url for server in servers])
+            elapsed, _ = run_batch(make_agent(pool), requests, concurrency, stream=True)
+            baseline = baseline or elapsed
+            spread = ", ".join(str(server.stats()["requests"]) for server in servers)
+            print(f"{count:>10} {elapsed:>9.2f} {requests / elapsed:>8.2f} {baseline / elapsed:>7.2f}x  {spread}")
+        finally:
+            for server in servers:
+                server.stop()
+
+
+def bench_failover(requests: int, decode_ms: float, tokens: int) -> None:
+    print("\nFailover: one of two endpoints answers 503 mid-run, then recovers\n")
+    servers = [StubOpenAIServer(decode_ms=decode_ms, completion_tokens=tokens).start() for _ in range(2)]
+    try:
+        pool = EndpointPool([server.base_url for server in servers], health_check_interval=0.2)
+        agent = make_agent(pool)
+
+        servers[1].failing = True
+        elapsed, errors = run_batch(agent, requests, 2, stream=False)
+        states = ["healthy" if e.healthy else "ejected" for e in pool.endpoints]
+        print(f"  failing:   {requests} requests in {elapsed:.2f}s, failed runs: {errors}, endpoints {states}")
+
+        servers[1].failing = False
+        deadline = time.time() + 5
+        while not all(e.healthy for e in pool.endpoints) and time.time() < deadline:
+            time.sleep(0.05)
+        states = ["healthy" if e.healthy else "ejected" for e in pool.endpoints]
+        print(f"  recovered: endpoints {states}")
+
+        before = [server.stats()["requests"] for server in servers]
+        run_batch(agent, requests, 2, stream=False)
+        served = [server.stats()["requests"] - b for server, b in zip(servers, before)]
+        print(f"  after re-admission: requests per endpoint {served}")
+    finally:
+        for server in servers:
+            server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--decode-ms", type=float, default=2.0)
+    parser.add_argument("--tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    bench_scaling(args.endpoints, args.requests, args.concurrency, args.decode_ms, args.tokens)
+    bench_failover(args.requests // 2, args.decode_ms, args.tokens)
+
+
+if __name__ == "__main__":
+    main()
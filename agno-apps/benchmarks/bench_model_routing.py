@@ -0,0 +1,146 @@
+"""
+Model Routing Benchmark (LMStudio app)
+======================================
+Runs the LMStudio pipeline against a stub server that serves two models:
+the default one and a faster "small" one (`--small-speed` times its
+latency) whose replies are cut short `--small-failure` of the time, the
+way a small model drops fields or steps of the required format.
+
+Routings compared (one evaluation at a time):
+
+  single    every agent on the default model (no MODEL_ROUTES)
+  routed    --routes agents on the small model, no quality gate
+  gated     the same routes, with outputs that fail their check re-run on
+            the default model (MODEL_ESCALATION=on)
+
+Reported per routing: p50/p99 end-to-end latency, share of reports with
+every growth area, strategy and summary section complete, escalations per
+report, and cost per report from MODEL_PRICES (`--prices`, relative units
+here), then the per-route table the app reports in its UI.
+
+Usage:
+    python benchmarks/bench_model_routing.py --evaluations 20
+    python benchmarks/bench_model_routing.py --small-failure 0.3 --routes "Strategy Developer" "Summary Writer"
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import ScriptedResponder, percentile, sample_evaluation, setup_lmstudio  # noqa: E402
+from stub_openai_server import Responder, StubOpenAIServer  # noqa: E402
+
+DEFAULT_MODEL = "openai/gpt-oss-20b"
+SMALL_MODEL = "stub/small-model"
+
+
+def flaky(responder: Responder, failure_rate: float, seed: int) -> Responder:
+    """The responder's replies, with the text cut to its first 40% `failure_rate` of the time (tool calls are kept)."""
+    rng, lock = random.Random(seed), threading.Lock()
+
+    def respond(messages):
+        reply = responder(messages)
+        with lock:
+            failed = rng.random() < failure_rate
+        if failed and reply.get("content"):
+            reply = {**reply, "content": reply["content"][: len(reply["content"]) * 2 // 5]}
+        return reply
+    return respond
+
+
+def report_complete(module: Any, report: str) -> bool:
+    """Every growth area with its fields, a strategy with steps for each, and both summary sections."""
+    areas = module.split_growth_areas(report)
+    return (
+        module.is_complete_analysis(report)
+        and report.count("**Step 3:**") >= len(areas)
+        and module.has_sections(report, "Summary", "Priority Actions")
+    )
+
+
+def run_routing(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    os.environ["MODEL_ROUTES"] = ",".join(f"{agent}={SMALL_MODEL}" for agent in args.routes) if name != "single" else ""
+    os.environ["MODEL_ESCALATION"] = "on" if name == "gated" else "off"
+    os.environ["MODEL_PRICES"] = args.prices
+    responder = ScriptedResponder()
+    stub = StubOpenAIServer(
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=4, responder=responder,
+        model_responders={SMALL_MODEL: flaky(responder, args.small_failure, args.seed)},
+        model_speed={SMALL_MODEL: args.small_speed},
+    ).start()
+    try:
+        module = setup_lmstudio(stub, responder, args.words)
+        latencies: List[float] = []
+        complete = 0
+        for i in range(args.evaluations):
+            start = time.perf_counter()
+            report = module.generate_report(sample_evaluation(i))
+            latencies.append(time.perf_counter() - start)
+            complete += report_complete(module, report)
+        summary = module.model_router.summary()
+        escalations = sum(route["escalations"] for route in summary["routes"].values())
+        return {
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "complete": complete / args.evaluations,
+            "escalations": escalations / args.evaluations,
+            "cost": summary["cost_per_evaluation"] or 0.0,
+            "routes": summary["routes"],
+        }
+    finally:
+        stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evaluations", type=int, default=12, help="Reports per routing")
+    parser.add_argument(
+        "--routes", nargs="+", default=["ISP Way Document Analyst", "Strategy Developer", "Summary Writer"],
+        help="Agents routed to the small model",
+    )
+    parser.add_argument("--small-speed", type=float, default=0.3, help="Small model latency, relative to the default")
+    parser.add_argument("--small-failure", type=float, default=0.15, help="Share of small-model replies cut short")
+    parser.add_argument(
+        "--prices", default=f"{DEFAULT_MODEL}=1.0/3.0,{SMALL_MODEL}=0.2/0.6",
+        help="MODEL_PRICES for the run (input/output per million tokens)",
+    )
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=2.0, help="Stub decode time per token (default model)")
+    parser.add_argument("--words", type=int, default=150, help="Approximate words per agent output")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    print(
+        f"Small model: {args.small_speed:.2f}x latency, {args.small_failure:.0%} of replies cut short; "
+        f"routed: {', '.join(args.routes)}\n"
+    )
+    print(f"{'routing':<8} {'p50 s':>7} {'p99 s':>7} {'complete':>9} {'escalations':>12} {'cost/report':>12}")
+    results = {}
+    for name in ("single", "routed", "gated"):
+        r = results[name] = run_routing(name, args)
+        print(
+            f"{name:<8} {r['p50']:>7.2f} {r['p99']:>7.2f} {r['complete']:>9.0%}"
+            f" {r['escalations']:>12.2f} {r['cost'] * 1000:>12.4f}"
+        )
+    print("\n(cost per report in thousandths of a price unit)")
+
+    print(f"\nRoutes with the quality gate ({args.evaluations} reports):")
+    print(f"{'route':<55} {'runs/report':>12} {'esc. rate':>10} {'avg s':>7} {'cost/report':>12}")
+    for route, stats in results["gated"]["routes"].items():
+        print(
+            f"{route:<55} {stats['runs_per_evaluation']:>12.2f} {stats['escalation_rate']:>10.0%}"
+            f" {stats['avg_wall_s']:>7.2f} {stats['cost_per_evaluation'] * 1000:>12.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
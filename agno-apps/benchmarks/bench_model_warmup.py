@@ -0,0 +1,121 @@
+"""
+Model Warm-Up Benchmark (LMStudio app)
+======================================
+Measures first-request latency of the LMStudio pipeline against a stub
+server that simulates LM Studio's JIT model load: the first completion
+waits `--load-seconds`, and so does the first one after the model has been
+idle for `--unload-after` seconds (LM Studio's idle TTL, scaled down).
+
+Each mode starts a fresh stub (model not loaded) and app, sends the first
+report `--first-after` seconds later, then `--sessions` more reports, each
+after a random idle gap of up to twice the TTL (so the model is often
+evicted between them):
+
+  off  no warm-up: whichever report comes first after a load or eviction waits for it
+  on   ModelWarmer started with the app (priming request, prefix prefill,
+       keep-alive pings every half TTL)
+
+Reported per mode: p50/p99 time to the first analysis text and end-to-end
+latency, reports that waited for a model load, and model loads and
+keep-alive pings in total.
+
+Usage:
+    python benchmarks/bench_model_warmup.py --sessions 12 --load-seconds 3 --unload-after 4
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import random
+import sys
+import time
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import ScriptedResponder, percentile, sample_evaluation, setup_lmstudio  # noqa: E402
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+
+def report_latency(module: Any, user_input: str) -> Dict[str, float]:
+    """Seconds to the first analysis text and to the finished report."""
+    start = time.perf_counter()
+    first_text = None
+    for update in module.stream_report(user_input):
+        if first_text is None and update.markdown:
+            first_text = time.perf_counter() - start
+    return {"first_text_s": first_text or 0.0, "end_to_end_s": time.perf_counter() - start}
+
+
+def run_mode(warm: bool, args: argparse.Namespace) -> Dict[str, Any]:
+    responder = ScriptedResponder()
+    stub = StubOpenAIServer(
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=4, responder=responder,
+        load_seconds=args.load_seconds, unload_after=args.unload_after,
+    ).start()
+    try:
+        module = setup_lmstudio(stub, responder, args.words)
+        module.MODEL_WARMUP = warm
+        module.MODEL_KEEP_ALIVE = args.unload_after / 2
+        if warm:
+            module.warm_up()  # What `python app.py` does once the server listens
+        rng = random.Random(args.seed)
+        gaps = [args.first_after] + [rng.uniform(0, 2 * args.unload_after) for _ in range(args.sessions)]
+        results: List[Dict[str, float]] = []
+        for i, gap in enumerate(gaps):
+            time.sleep(gap)
+            results.append(report_latency(module, sample_evaluation(i)))
+        if module.model_warmer is not None:
+            module.model_warmer.stop()
+            pings = module.model_state()["endpoints"][0]["pings"]
+        else:
+            pings = 0
+        first_text = [r["first_text_s"] for r in results]
+        end_to_end = [r["end_to_end_s"] for r in results]
+        return {
+            "first_text_p50": percentile(first_text, 50),
+            "first_text_p99": percentile(first_text, 99),
+            "end_to_end_p50": percentile(end_to_end, 50),
+            "end_to_end_p99": percentile(end_to_end, 99),
+            # Longer than half a load: the report waited for (the rest of) one
+            "waited": sum(seconds > args.load_seconds / 2 for seconds in first_text),
+            "reports": len(results),
+            "loads": stub.stats()["model_loads"],
+            "pings": pings,
+        }
+    finally:
+        stub.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=12, help="Reports after the first one")
+    parser.add_argument("--load-seconds", type=float, default=3.0, help="Simulated model load")
+    parser.add_argument("--unload-after", type=float, default=4.0, help="Idle seconds before the stub unloads the model")
+    parser.add_argument("--first-after", type=float, default=1.0, help="Seconds from startup to the first report")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=1.0, help="Stub decode time per token")
+    parser.add_argument("--words", type=int, default=150, help="Approximate words per agent output")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    print(
+        f"Stub: {args.load_seconds:.1f} s model load, unloaded after {args.unload_after:.1f} s idle; "
+        f"first report {args.first_after:.1f} s after startup, then {args.sessions} after idle gaps\n"
+    )
+    print(
+        f"{'warm-up':<8} {'first text p50':>15} {'p99':>6} {'end-to-end p50':>15} {'p99':>6}"
+        f" {'waited for load':>16} {'loads':>6} {'pings':>6}"
+    )
+    for warm in (False, True):
+        r = run_mode(warm, args)
+        print(
+            f"{'on' if warm else 'off':<8} {r['first_text_p50']:>15.2f} {r['first_text_p99']:>6.2f}"
+            f" {r['end_to_end_p50']:>15.2f} {r['end_to_end_p99']:>6.2f}"
+            f" {r['waited']:>10}/{r['reports']:<5} {r['loads']:>6} {r['pings']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,492 @@
+"""
+Offline End-to-End Benchmark (both apps)
+========================================
+Runs the real pipelines of both examples against a local stub of the
+OpenAI chat-completions API, so orchestration performance can be measured on
+any machine (e.g. CI) without LM Studio or a Gemini key:
+
+- lmstudio         the LMStudio workflow (`generate_report`, as called by `workflow_steps`)
+- gemini-workflow  the Gemini workflow (`generate_report`)
+- gemini-team      the Gemini `teacher_evaluation_team.arun` (the coordinator delegates through tool calls)
+
+The stub answers every agent with scripted, correctly formatted output
+(including the analyst's `search_isp_way` tool calls and the team leader's
+delegations) after a simulated prefill and decode delay. For the Gemini app
+every agent's model is swapped for an OpenAI-compatible one pointed at the
+stub. Result caches and (unless `--strategy-library` is given) the strategy
+library are disabled so every run does the full work.
+
+Reported per app and number of concurrent users: end-to-end and per-stage
+latency percentiles, throughput, and per-agent calls, server time and
+tokens in/out. With `--prefill-ms 0 --decode-ms 0` the latency is pure
+orchestration overhead.
+
+Usage:
+    python benchmarks/bench_offline.py --app all --users 1 4 --evaluations 8
+    python benchmarks/bench_offline.py --app lmstudio --decode-ms 0 --prefill-ms 0 --json results.json
+    python benchmarks/bench_offline.py --strategy-library   # reuse strategies for recurring growth areas
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+EXAMPLES_DIR = BENCHMARKS_DIR.parent / "examples"
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+APPS = ["lmstudio", "gemini-workflow", "gemini-team"]
+
+CONCERNS = [
+    "Lessons are primarily teacher-led with limited student interaction",
+    "Uses mainly worksheets and textbook activities",
+    "Assessment is primarily summative (tests and quizzes)",
+    "Students work individually most of the time",
+    "The same task is given to every student regardless of readiness",
+    "Questions mostly check recall rather than reasoning",
+]
+
+FILLER = (
+    "This keeps students actively engaged, makes their thinking visible and gives the teacher "
+    "timely evidence to adjust the next step of the lesson."
+).split()
+
+
+def sample_evaluation(i: int) -> str:
+    """A distinct evaluation per index, in the apps' input format."""
+    concerns = [CONCERNS[(i + k) % len(CONCERNS)] for k in range(3)]
+    bullets = "\n".join(f"- {concern}" for concern in concerns)
+    return f"Teacher Evaluation for Teacher {i}:\n\nObservation {i}:\n{bullets}"
+
+
+def padded(text: str, words: int) -> str:
+    """Append filler so the text has roughly `words` words."""
+    missing = words - len(text.split())
+    if missing <= 0:
+        return text
+    return text + " " + " ".join(FILLER[i % len(FILLER)] for i in range(missing))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def first_instruction(agent: Any) -> str:
+    """First non-empty instruction line; used to recognize an agent's requests."""
+    instructions = agent.instructions if isinstance(agent.instructions, list) else agent.instructions.split("\n")
+    return next(line for line in instructions if line and line.strip())
+
+
+def load_app(directory: str, module_name: str) -> Any:
+    example_dir = EXAMPLES_DIR / directory
+    sys.path.insert(0, str(example_dir))
+    spec = importlib.util.spec_from_file_location(module_name, example_dir / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# =============================================================================
+# SCRIPTED REPLIES
+# =============================================================================
+
+Reply = Callable[[List[Dict[str, Any]]], Any]
+
+
+class ScriptedResponder:
+    """Picks a reply by looking for each agent's marker in the system prompt."""
+
+    def __init__(self):
+        self.routes: List[Tuple[str, str, Reply]] = []
+
+    def add(self, label: str, marker: str, reply: Reply) -> None:
+        self.routes.append((label, marker, reply))
+
+    def __call__(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        system = "\n".join(
+            str(m.get("content") or "") for m in messages if m.get("role") in ("system", "developer")
+        )
+        for label, marker, reply in self.routes:
+            if marker in system:
+                result = reply(messages)
+                result = {"content": result} if isinstance(result, str) else result
+                return {**result, "label": label}
+        return {"content": "OK", "label": "unrecognized"}
+
+
+def last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content") or ""
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+def tool_results(messages: List[Dict[str, Any]]) -> List[str]:
+    return [str(m.get("content") or "") for m in messages if m.get("role") == "tool"]
+
+
+def growth_area_titles(text: str) -> List[str]:
+    """Concerns mentioned in an evaluation, turned into growth area names."""
+    found = [concern for concern in CONCERNS if concern.lower() in text.lower()] or CONCERNS[:2]
+    return [f"Improving: {concern}" for concern in found[:3]]
+
+
+def lmstudio_observations(words: int) -> Reply:
+    def reply(messages):
+        text = last_user_text(messages)
+        found = [concern for concern in CONCERNS if concern.lower() in text.lower()] or ["Routines are well established"]
+        return "\n".join(
+            f"- {concern} (evidence: {padded('noted during the observed lesson segment', words // 8)})" for concern in found
+        )
+    return reply
+
+
+def lmstudio_analyst(words: int) -> Reply:
+    def reply(messages):
+        results = tool_results(messages)
+        system = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") in ("system", "developer"))
+        if "ISP WAY REFERENCE:" in system:
+            # ISP_WAY_CONTEXT=prefix: the document is in the prompt, quote it directly
+            reference = system.split("ISP WAY REFERENCE:", 1)[1]
+            results = [f': "{line[2:]}"' for line in reference.splitlines() if line.startswith("- ")][:4]
+        elif not results:
+            # First turn: search the ISP Way like the real analyst does
+            return {"tool_calls": [
+                {"name": "search_isp_way", "arguments": {"query": "student collaboration and interaction"}},
+                {"name": "search_isp_way", "arguments": {"query": "formative assessment"}},
+            ]}
+        quotes = re.findall(r': "(.+)"$', "\n".join(results), re.MULTILINE) or ["students learn actively"]
+        areas = growth_area_titles(last_user_text(messages))
+        per_area = max(30, words // len(areas))
+        blocks = [
+            f"## Growth Area {i}: {title}\n"
+            f"**ISP Way Quote:** \"{quotes[(i - 1) % len(quotes)]}\"\n"
+            f"**Current Practice:** {padded('The observation notes describe this practice in most lessons.', per_area // 2)}\n"
+            f"**Gap:** {padded('Students have few chances to apply what they learn.', per_area // 2)}"
+            for i, title in enumerate(areas, start=1)
+        ]
+        return "\n\n".join(blocks)
+    return reply
+
+
+def lmstudio_strategy(words: int) -> Reply:
+    def reply(messages):
+        heading = re.search(r"## Growth Area \d+: (.+)", last_user_text(messages))
+        name = f"Structured Practice for {heading.group(1) if heading else 'Engagement'}"
+        steps = "\n\n".join(
+            f"**Step {i}:** {padded(f'Plan activity {i} around a short collaborative task.', words // 8)}\n"
+            f"*Example:* Students compare answers in pairs before sharing with the class."
+            for i in range(1, 5)
+        )
+        return (
+            f"## Strategy 1: {name}\n\n**What it is:**\n{padded('A routine that gets every student talking.', words // 6)}\n\n"
+            f"**How to implement:**\n\n{steps}\n\n**Benefits:**\n- Higher engagement\n- Visible thinking\n- Faster feedback\n\n---"
+        )
+    return reply
+
+
+def lmstudio_summary(words: int) -> Reply:
+    def reply(messages):
+        return (
+            f"## Summary\n{padded('The teacher has a solid foundation and clear next steps.', words // 2)}\n\n"
+            "## Priority Actions\n\n"
+            "1. **Start structured pair work** - It raises engagement fastest\n"
+            "2. **Add exit tickets** - They make learning visible every lesson\n"
+            "3. **Differentiate one task per week** - It builds the habit gradually"
+        )
+    return reply
+
+
+def gemini_analyst(words: int) -> Reply:
+    def reply(messages):
+        areas = growth_area_titles(last_user_text(messages))
+        per_area = max(30, words // len(areas))
+        return "\n\n".join(
+            f"## Growth Area {i}: {title}\n"
+            f"**ISP Way Alignment:** {padded('The ISP Way expects active, student-centred learning.', per_area // 2)}\n"
+            f"**Current Gap:** {padded('Current lessons rarely give students that role.', per_area // 2)}"
+            for i, title in enumerate(areas, start=1)
+        )
+    return reply
+
+
+def gemini_researcher(words: int) -> Reply:
+    def reply(messages):
+        return padded(
+            "### Think-Pair-Share\nSource: Edutopia - https://www.edutopia.org/article/think-pair-share\n"
+            "1. Pose a question 2. Pairs discuss 3. Share with the class.",
+            words,
+        )
+    return reply
+
+
+def gemini_report(words: int) -> Reply:
+    def reply(messages):
+        text = last_user_text(messages)
+        name = re.search(r"Teacher Evaluation for ([^:\n]+)", text)
+        report = {
+            "teacher_name": name.group(1).strip() if name else None,
+            "evaluation_summary": padded("The teacher has a solid foundation and clear next steps.", words // 4),
+            "growth_areas": [
+                {"area": title, "isp_way_alignment": "Active learning", "current_gap": "Mostly teacher-led"}
+                for title in growth_area_titles(text)
+            ],
+            "recommended_strategies": [{
+                "name": "Think-Pair-Share",
+                "description": padded("Students think, discuss in pairs, then share.", words // 4),
+                "implementation_steps": ["Pose a question", "Pairs discuss", "Share with the class"],
+                "source_title": "Think-Pair-Share",
+                "source_url": "https://www.edutopia.org/article/think-pair-share",
+            }],
+            "priority_actions": ["Start pair work", "Add exit tickets", "Differentiate one task per week"],
+        }
+        return json.dumps(report)
+    return reply
+
+
+def gemini_fixer() -> Reply:
+    """Answers a report re-ask with a value for every requested field path."""
+
+    def reply(messages):
+        text = last_user_text(messages)
+        fields = re.findall(r"^- ([\w\[\].]+):", text.split("Report so far:", 1)[0], re.MULTILINE)
+        urls = re.findall(r"https?://[^\s)\]]+", text.split("Source material:", 1)[-1])
+        values: Dict[str, Any] = {}
+        for path in fields:
+            name = re.sub(r"\[\d+\]", "", path).rsplit(".", 1)[-1]
+            if name == "source_url":
+                values[path] = urls[0] if urls else None
+            elif name in ("priority_actions", "implementation_steps"):
+                values[path] = ["Start pair work", "Add exit tickets", "Differentiate one task per week"]
+            elif name == "growth_areas":
+                values[path] = [{"area": "Active learning", "isp_way_alignment": "Active learning",
+                                 "current_gap": "Mostly teacher-led"}]
+            else:
+                values[path] = "Corrected value"
+        return json.dumps(values)
+    return reply
+
+
+def team_leader(member_ids: List[str]) -> Reply:
+    """Delegates to each member in turn, then answers with the last member's output."""
+
+    def reply(messages):
+        results = tool_results(messages)
+        if len(results) < len(member_ids):
+            task = last_user_text(messages) if not results else f"Continue with:\n\n{results[-1]}"
+            return {"tool_calls": [
+                {"name": "delegate_task_to_member", "arguments": {"member_id": member_ids[len(results)], "task": task}}
+            ]}
+        return results[-1]
+    return reply
+
+
+# =============================================================================
+# APPS
+# =============================================================================
+
+def setup_lmstudio(server: StubOpenAIServer, responder: ScriptedResponder, words: int, library: bool = False) -> Any:
+    os.environ["LMSTUDIO_BASE_URLS"] = server.base_url
+    module = load_app("teacher-evaluation-lmstudio", "bench_lmstudio_app")
+    module.result_cache = type(module.result_cache)(max_entries=0)  # Every run does the full work
+    module.strategy_library = type(module.strategy_library)(enabled=library)
+
+    responder.add("Observation Extractor", first_instruction(module.observation_extractor), lmstudio_observations(words))
+    responder.add("ISP Way Document Analyst", first_instruction(module.isp_way_analyst), lmstudio_analyst(words))
+    responder.add("Strategy Developer", first_instruction(module.strategy_developer), lmstudio_strategy(words))
+    responder.add("Summary Writer", first_instruction(module.summary_writer), lmstudio_summary(words // 2))
+    responder.add("Report Writer", first_instruction(module.report_writer), lmstudio_summary(words))
+    return module
+
+
+def setup_gemini(server: StubOpenAIServer, responder: ScriptedResponder, words: int, library: bool = False) -> Any:
+    from agno.models.openai.like import OpenAILike
+    from agno.utils.team import get_member_id
+
+    os.environ.setdefault("SESSION_DB", "off")  # No session storage unless a benchmark asks for it
+    module = load_app("teacher-evaluation", "bench_gemini_app")
+    module.result_cache = type(module.result_cache)(max_entries=0)
+    module.strategy_library = type(module.strategy_library)(enabled=library)
+
+    def stub_model() -> OpenAILike:
+        return OpenAILike(id="stub-model", base_url=server.base_url, api_key="stub")
+
+    team = module.teacher_evaluation_team
+    for agent in [module.isp_way_analyst, module.isp_way_workflow_analyst, module.strategy_researcher,
+                  module.report_writer, module.workflow_report_writer, module.report_fixer, team]:
+        agent.model = stub_model()
+    for agent in [module.isp_way_analyst, module.isp_way_workflow_analyst]:
+        agent.pre_hooks = None  # No File Search store offline
+    module.isp_way_store = None
+    module.url_verifier = type(module.url_verifier)()  # No fetches offline; without grounding URLs pass unchecked
+
+    # The leader's prompt lists the members, so it is matched first
+    responder.add("Team Leader", first_instruction(team), team_leader([get_member_id(m) for m in team.members]))
+    responder.add("ISP Way Analyst", first_instruction(module.isp_way_analyst), gemini_analyst(words))
+    responder.add("Strategy Researcher", first_instruction(module.strategy_researcher), gemini_researcher(words))
+    responder.add("Report Writer", first_instruction(module.report_writer), gemini_report(words))
+    responder.add("Report Fixer", first_instruction(module.report_fixer), gemini_fixer())
+    return module
+
+
+class EventLoopThread:
+    """One event loop in a background thread (as in a uvicorn worker) that user threads submit runs to."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run(self, coroutine) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+
+_event_loop: Optional[EventLoopThread] = None
+_event_loop_lock = threading.Lock()
+
+
+def run_async(coroutine) -> Any:
+    # Model clients bind to the first loop that uses them, so every run shares one loop
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = EventLoopThread()
+    return _event_loop.run(coroutine)
+
+
+def run_one(app_name: str, module: Any, user_input: str, timings: Dict[str, float]) -> None:
+    """Run one evaluation; raises if the pipeline failed."""
+    if app_name in ("lmstudio", "gemini-workflow"):
+        module.generate_report(user_input, timings)
+        return
+
+    # Async, as AgentOS serves it, so the researcher's async post-hook runs
+    output = run_async(module.teacher_evaluation_team.arun(user_input, stream=False))
+    if getattr(output, "status", None) == module.RunStatus.error:
+        raise RuntimeError(str(output.content))
+    for member in getattr(output, "member_responses", None) or []:
+        duration = getattr(getattr(member, "metrics", None), "duration", None)
+        if duration is not None and getattr(member, "agent_name", None):
+            timings[member.agent_name] = timings.get(member.agent_name, 0.0) + duration
+
+
+def run_load(app_name: str, module: Any, users: int, evaluations: int, offset: int) -> Dict[str, Any]:
+    """Run `evaluations` distinct evaluations with `users` in flight at a time."""
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    errors: List[str] = []
+
+    def evaluate(i: int) -> None:
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        try:
+            run_one(app_name, module, sample_evaluation(offset + i), timings)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append(time.perf_counter() - start)
+        for name, seconds in timings.items():
+            stages.setdefault(name, []).append(seconds)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        list(pool.map(evaluate, range(evaluations)))
+    elapsed = time.perf_counter() - start
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        return {f"p{p}": round(percentile(values, p), 3) for p in (50, 90, 99)}
+
+    return {
+        "app": app_name,
+        "users": users,
+        "evaluations": evaluations,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_min": round(len(latencies) / (elapsed / 60), 2) if elapsed else 0.0,
+        "end_to_end_s": summary(latencies) if latencies else {},
+        "stages_s": {name: summary(values) for name, values in sorted(stages.items())},
+    }
+
+
+def print_result(result: Dict[str, Any], agents: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n== {result['app']}: {result['users']} concurrent users, {result['evaluations']} evaluations ==")
+    print(f"throughput {result['throughput_per_min']:.1f} evaluations/min, {result['errors']} errors")
+    if result["first_error"]:
+        print(f"first error: {result['first_error']}")
+    if result["end_to_end_s"]:
+        print(f"{'latency (s)':<28} {'p50':>8} {'p90':>8} {'p99':>8}")
+        for name, values in [("end-to-end", result["end_to_end_s"]), *result["stages_s"].items()]:
+            print(f"{name:<28} {values['p50']:>8.2f} {values['p90']:>8.2f} {values['p99']:>8.2f}")
+    print(f"{'agent (server side)':<28} {'calls':>6} {'avg s':>8} {'tokens in':>10} {'tokens out':>11}")
+    for label, stats in sorted(agents.items()):
+        avg = stats["seconds"] / stats["requests"] if stats["requests"] else 0.0
+        print(f"{label:<28} {stats['requests']:>6} {avg:>8.2f} {stats['prompt_tokens']:>10} {stats['completion_tokens']:>11}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=APPS + ["all"], default="all")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4], help="Concurrent users to test")
+    parser.add_argument("--evaluations", type=int, default=8, help="Evaluations per measurement")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=1.0, help="Stub decode time per token")
+    parser.add_argument("--slots", type=int, default=4, help="Requests the stub serves at once")
+    parser.add_argument("--words", type=int, default=200, help="Approximate words per agent output")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    parser.add_argument(
+        "--strategy-library", action="store_true",
+        help="Keep the strategy library on (the sample evaluations share concerns, so growth areas recur)",
+    )
+    args = parser.parse_args()
+
+    apps = APPS if args.app == "all" else [args.app]
+    responder = ScriptedResponder()
+    server = StubOpenAIServer(
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=args.slots, responder=responder
+    ).start()
+    print(f"Stub server: {args.prefill_ms} ms/prompt token, {args.decode_ms} ms/output token, {args.slots} slots")
+
+    modules: Dict[str, Any] = {}
+    results = []
+    try:
+        if "lmstudio" in apps:
+            modules["lmstudio"] = setup_lmstudio(server, responder, args.words, args.strategy_library)
+        if any(app.startswith("gemini") for app in apps):
+            gemini = setup_gemini(server, responder, args.words, args.strategy_library)
+            modules.update({"gemini-workflow": gemini, "gemini-team": gemini})
+
+        offset = 0
+        for app_name in apps:
+            for users in args.users:
+                server.reset_stats()
+                result = run_load(app_name, modules[app_name], users, args.evaluations, offset)
+                offset += args.evaluations
+                result["agents"] = server.stats()["by_label"]
+                print_result(result, result["agents"])
+                results.append(result)
+    finally:
+        server.stop()
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Prompt Token Benchmark
+======================
+Measures what the prompt layout in prompt_layout.py saves, without a model:
+
+1. Instructions: every agent's instructions rendered the way Agno renders an
+   instruction list (one "- " bullet per line, blank lines included) against
+   the single static string the apps now pass.
+2. ISP Way document: the indented JSON, the minified JSON and the compact
+   outline from `compact_knowledge_base`.
+3. Static prefix: the LMStudio pipeline is run for two different evaluations
+   against the stub server (see stub_openai_server.py) with both
+   ISP_WAY_CONTEXT modes. For every agent, the first request of each run is
+   compared: the shared leading text is what LM Studio can reuse from its KV
+   cache, the rest is processed for every request.
+
+Tokens are counted with tiktoken (o200k_base) when it is installed, otherwise
+estimated as words, punctuation marks and line breaks.
+
+Usage:
+    python benchmarks/bench_prompt_tokens.py
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+import json
+import os
+import re
+import sys
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from agno.utils.message import render_instructions  # noqa: E402
+
+from bench_offline import (  # noqa: E402
+    EXAMPLES_DIR,
+    ScriptedResponder,
+    sample_evaluation,
+    setup_gemini,
+    setup_lmstudio,
+)
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+# Words, punctuation marks, and each line break with its indentation
+_TOKEN_PROXY = re.compile(r"\w+|[^\w\s]|\n[ \t]*")
+
+
+def token_counter() -> Callable[[str], int]:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return lambda text: len(encoding.encode(text))
+    except ImportError:
+        return lambda text: len(_TOKEN_PROXY.findall(text))
+
+
+count_tokens = token_counter()
+
+
+def saving(before: int, after: int) -> str:
+    return f"{100 * (before - after) / before:.0f}%" if before else "-"
+
+
+def bench_instructions(apps: Dict[str, List[Any]]) -> None:
+    print("Instructions (tokens)\n")
+    print(f"{'agent':<36} {'bullets':>8} {'static':>8} {'saved':>6}")
+    for app_name, agents in apps.items():
+        for agent in agents:
+            text = agent.instructions
+            bulleted = render_instructions(text.split("\n"))
+            before, after = count_tokens(bulleted), count_tokens(text)
+            print(f"{app_name + ': ' + agent.name:<36} {before:>8} {after:>8} {saving(before, after):>6}")
+
+
+def bench_document(compact: str) -> None:
+    document = json.loads((EXAMPLES_DIR / "teacher-evaluation-lmstudio" / "ISP_Way.txt").read_text(encoding="utf-8"))
+    renderings = {
+        "indented JSON": json.dumps(document, indent=2, ensure_ascii=False),
+        "minified JSON": json.dumps(document, separators=(",", ":"), ensure_ascii=False),
+        "compact outline": compact,
+    }
+    baseline = count_tokens(renderings["indented JSON"])
+    print("\nISP Way document\n")
+    print(f"{'rendering':<20} {'chars':>7} {'tokens':>7} {'saved':>6}")
+    for name, text in renderings.items():
+        tokens = count_tokens(text)
+        print(f"{name:<20} {len(text):>7} {tokens:>7} {saving(baseline, tokens):>6}")
+
+
+def request_text(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(str(message.get("content") or "") for message in messages)
+
+
+def common_prefix(a: str, b: str) -> str:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return a[:length]
+
+
+def first_requests(mode: str, evaluation: int) -> Dict[str, str]:
+    """Text of the first request each agent sends for one evaluation."""
+    os.environ["ISP_WAY_CONTEXT"] = mode
+    captured: Dict[str, str] = {}
+    responder = ScriptedResponder()
+
+    def capture(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        reply = responder(messages)
+        captured.setdefault(reply["label"], request_text(messages))
+        return reply
+
+    with StubOpenAIServer(prefill_ms=0, decode_ms=0, responder=capture) as server:
+        module = setup_lmstudio(server, responder, words=200)
+        module.generate_report(sample_evaluation(evaluation), {})
+    return captured
+
+
+def bench_static_prefix() -> None:
+    print("\nLMStudio pipeline: first request of each agent for two different evaluations (tokens)\n")
+    print(f"{'mode':<8} {'agent':<28} {'static prefix':>14} {'per request':>12} {'reused':>7}")
+    for mode in ("search", "prefix"):
+        first, second = first_requests(mode, 0), first_requests(mode, 1)
+        for label in sorted(first.keys() & second.keys()):
+            shared = count_tokens(common_prefix(first[label], second[label]))
+            total = count_tokens(second[label])
+            print(f"{mode:<8} {label:<28} {shared:>14} {total - shared:>12} {saving(total, total - shared):>7}")
+
+
+def main() -> None:
+    warnings.filterwarnings("ignore", category=UserWarning)  # Gradio constructor notices while loading the apps
+    print(f"Token counter: {'tiktoken o200k_base' if 'tiktoken' in sys.modules else 'word/punctuation/line estimate'}\n")
+
+    with StubOpenAIServer(prefill_ms=0, decode_ms=0) as server:
+        lmstudio = setup_lmstudio(server, ScriptedResponder(), words=200)
+        gemini = setup_gemini(server, ScriptedResponder(), words=200)
+    bench_instructions({
+        "lmstudio": [lmstudio.isp_way_analyst, lmstudio.strategy_developer, lmstudio.report_writer,
+                     lmstudio.summary_writer],
+        "gemini": [gemini.isp_way_analyst, gemini.strategy_researcher, gemini.report_writer,
+                   gemini.teacher_evaluation_team],
+    })
+
+    from shared.prompt_layout import compact_knowledge_base
+    bench_document(compact_knowledge_base(EXAMPLES_DIR / "teacher-evaluation-lmstudio" / "ISP_Way.txt"))
+
+    bench_static_prefix()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+ISP Way Quote Verifier Benchmark
+================================
+Times the LMStudio app's quote verifier (quote_verifier.py) and checks how
+often a damaged quote is snapped back to the sentence it came from.
+
+Quotes are generated from every sentence of ISP_Way.txt:
+
+- exact      the sentence as written
+- reworded   one word dropped and one word replaced, different case
+- truncated  the first two thirds of the sentence, with a word replaced
+- invented   sentences that are not in the document; they must come out
+             "missing" (left as written), not snapped to a real sentence
+
+Usage:
+    python benchmarks/bench_quote_verifier.py --rounds 200
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import random
+import sys
+import time
+
+LMSTUDIO_DIR = Path(__file__).resolve().parent.parent / "examples" / "teacher-evaluation-lmstudio"
+sys.path.insert(0, str(LMSTUDIO_DIR))
+
+from isp_way_index import IspWayIndex  # noqa: E402
+from quote_verifier import QuoteVerifier, Sentence  # noqa: E402
+
+INVENTED = [
+    "Teachers should always grade homework within twenty four hours of collection.",
+    "Every classroom needs a reading corner with comfortable chairs.",
+    "Lessons must begin with a five minute silent warm up.",
+]
+
+
+def reworded(words: List[str], rng: random.Random) -> Optional[str]:
+    if len(words) < 6:
+        return None
+    words = list(words)
+    del words[rng.randrange(1, len(words) - 1)]
+    words[rng.randrange(1, len(words) - 1)] = "students"
+    return " ".join(words).upper()
+
+
+def truncated(words: List[str], rng: random.Random) -> Optional[str]:
+    if len(words) < 9:
+        return None
+    words = words[: 2 * len(words) // 3]
+    words[rng.randrange(1, len(words) - 1)] = "learners"
+    return " ".join(words)
+
+
+def bench_kind(
+    verifier: QuoteVerifier,
+    sentences: List[Sentence],
+    make: Callable[[List[str], random.Random], Optional[str]],
+    rounds: int,
+    rng: random.Random,
+) -> Dict[str, float]:
+    quotes = [(make(s.text.split(), rng), s) for s in sentences]
+    quotes = [(quote, sentence) for quote, sentence in quotes if quote]
+    checks = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for quote, _sentence in quotes:
+            verifier.check(quote)
+            checks += 1
+    elapsed = time.perf_counter() - start
+
+    results = [(verifier.check(quote), sentence) for quote, sentence in quotes]
+    return {
+        "quotes": len(quotes),
+        "us_per_check": 1e6 * elapsed / checks,
+        "exact": sum(check.status == "exact" for check, _ in results),
+        "missing": sum(check.status == "missing" for check, _ in results),
+        # A snapped quote counts as recovered when it lands on its own sentence (or one containing it)
+        "recovered": sum(
+            check.status == "snapped" and sentence.text in (check.replacement or "") for check, sentence in results
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    document = LMSTUDIO_DIR / "ISP_Way.txt"
+    start = time.perf_counter()
+    verifier = QuoteVerifier(document, IspWayIndex(document))
+    print(f"Index build: {len(verifier.sentences)} sentences in {1000 * (time.perf_counter() - start):.1f} ms\n")
+
+    sentences = [s for s in verifier.sentences if len(s.text.split()) >= 3]
+    rng = random.Random(args.seed)
+    kinds = {
+        "exact": lambda words, _rng: " ".join(words),
+        "reworded": reworded,
+        "truncated": truncated,
+    }
+    print(f"{'quotes':<10} {'count':>6} {'us/check':>9} {'exact':>6} {'recovered':>10} {'missing':>8}")
+    for name, make in kinds.items():
+        r = bench_kind(verifier, sentences, make, args.rounds, rng)
+        print(
+            f"{name:<10} {r['quotes']:>6} {r['us_per_check']:>9.1f} {r['exact']:>6} {r['recovered']:>10}"
+            f" {r['missing']:>8}"
+        )
+
+    context = "The teacher lectures and students rarely work together."
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for quote in INVENTED:
+            verifier.check(quote, context)
+    per_check = 1e6 * (time.perf_counter() - start) / (args.rounds * len(INVENTED))
+    missing = sum(verifier.check(quote, context).status == "missing" for quote in INVENTED)
+    print(f"{'invented':<10} {len(INVENTED):>6} {per_check:>9.1f} {'-':>6} {'-':>10} {missing:>8}")
+
+
+if __name__ == "__main__":
+    main()
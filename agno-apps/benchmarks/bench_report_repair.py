@@ -0,0 +1,220 @@
+"""
+Report Repair Benchmark (Gemini app)
+====================================
+Feeds the Gemini workflow's report stage Report Writer output with typical
+schema faults and compares two ways of getting a valid
+`TeacherDevelopmentReport`:
+
+- regenerate  the previous behaviour: Agno's parser, and a full Report Writer
+              run again whenever the output does not parse into the schema
+              (up to `--max-retries` times, then the report fails)
+- repair      `write_report`: tolerant parsing, field-level validation, local
+              fixes and a targeted re-ask for the remaining fields
+              (report_repair.py)
+
+The Report Writer's reply (scripted by bench_offline.py, served by the stub)
+gets one fault with probability `--fault-rate`, for every run including
+regenerations:
+
+  fenced        code fence and a trailing comma around the JSON
+  truncated     the output stops in the middle of `priority_actions`
+  raw_newlines  unescaped line breaks inside a string
+  no_url        a strategy without `source_url`
+  mangled_url   a shortened `source_url` that is not in the research
+  many_actions  seven priority actions
+  steps_text    `implementation_steps` as one string
+  no_summary    `evaluation_summary` missing
+
+Reported per mode: report stage latency, retries (full regenerations or
+re-asks), failed reports, reports kept with a URL not found in the research,
+and the stub's time and output tokens per agent.
+
+Usage:
+    python benchmarks/bench_report_repair.py --reports 40 --fault-rate 0.3
+"""
+
+from pathlib import Path
+from statistics import mean
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import ScriptedResponder, gemini_researcher, percentile, sample_evaluation, setup_gemini  # noqa: E402
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+
+def _fenced(text: str, report: Dict[str, Any]) -> str:
+    return "```json\n" + json.dumps(report, indent=2)[:-2] + ",\n}\n```"
+
+
+def _truncated(text: str, report: Dict[str, Any]) -> str:
+    return text[:text.index('"priority_actions"') + 40]
+
+
+def _raw_newlines(text: str, report: Dict[str, Any]) -> str:
+    report["evaluation_summary"] = "@@NEWLINE@@".join(report["evaluation_summary"].split(". ", 1))
+    return json.dumps(report).replace("@@NEWLINE@@", ".\n")
+
+
+def _no_url(text: str, report: Dict[str, Any]) -> str:
+    del report["recommended_strategies"][0]["source_url"]
+    return json.dumps(report)
+
+
+def _mangled_url(text: str, report: Dict[str, Any]) -> str:
+    report["recommended_strategies"][0]["source_url"] = "https://www.edutopia.org/think-pair-share"
+    return json.dumps(report)
+
+
+def _many_actions(text: str, report: Dict[str, Any]) -> str:
+    report["priority_actions"] = [f"Action {i}" for i in range(1, 8)]
+    return json.dumps(report)
+
+
+def _steps_text(text: str, report: Dict[str, Any]) -> str:
+    strategy = report["recommended_strategies"][0]
+    strategy["implementation_steps"] = "\n".join(f"{i}. {s}" for i, s in enumerate(strategy["implementation_steps"], 1))
+    return json.dumps(report)
+
+
+def _no_summary(text: str, report: Dict[str, Any]) -> str:
+    del report["evaluation_summary"]
+    return json.dumps(report)
+
+
+FAULTS: Dict[str, Callable[[str, Dict[str, Any]], str]] = {
+    "fenced": _fenced,
+    "truncated": _truncated,
+    "raw_newlines": _raw_newlines,
+    "no_url": _no_url,
+    "mangled_url": _mangled_url,
+    "many_actions": _many_actions,
+    "steps_text": _steps_text,
+    "no_summary": _no_summary,
+}
+
+
+class FaultyReports:
+    """Wraps the scripted Report Writer reply and injects one fault with the given probability."""
+
+    def __init__(self, reply: Callable, rate: float, seed: int):
+        self.reply = reply
+        self.rate = rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.injected: Dict[str, int] = {}
+
+    def __call__(self, messages: List[Dict[str, Any]]) -> str:
+        text = self.reply(messages)
+        with self.lock:
+            if self.rng.random() >= self.rate:
+                return text
+            name = self.rng.choice(sorted(FAULTS))
+            self.injected[name] = self.injected.get(name, 0) + 1
+        return FAULTS[name](text, json.loads(text))
+
+
+def regenerate(module: Any, report_input: str, max_retries: int) -> Dict[str, Any]:
+    """The previous report stage: rerun the writer until Agno parses its output into the schema."""
+    for attempt in range(max_retries + 1):
+        content = module.workflow_report_writer.run(report_input).content
+        if isinstance(content, module.TeacherDevelopmentReport):
+            return {"report": content, "retries": attempt}
+    return {"report": None, "retries": max_retries}
+
+
+def unverified_urls(report: Any, report_input: str) -> int:
+    return sum(strategy.source_url not in report_input for strategy in report.recommended_strategies)
+
+
+def run_mode(mode: str, module: Any, inputs: List[str], max_retries: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    retries = failed = bad_urls = 0
+    for report_input in inputs:
+        start = time.perf_counter()
+        if mode == "regenerate":
+            result = regenerate(module, report_input, max_retries)
+            report, retries = result["report"], retries + result["retries"]
+        else:
+            before = module.report_repair.stats()["reasks"]
+            try:
+                report = module.write_report(report_input)
+            except ValueError:
+                report = None
+            retries += module.report_repair.stats()["reasks"] - before
+        latencies.append(time.perf_counter() - start)
+        if report is None:
+            failed += 1
+        else:
+            bad_urls += unverified_urls(report, report_input)
+    return {
+        "mean_s": mean(latencies),
+        "p95_s": percentile(latencies, 95),
+        "retries": retries,
+        "failed": failed,
+        "bad_urls": bad_urls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=40)
+    parser.add_argument("--fault-rate", type=float, default=0.3, help="Share of writer replies with a fault")
+    parser.add_argument("--max-retries", type=int, default=2, help="Full regenerations allowed (regenerate mode)")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=2.0, help="Stub decode time per token")
+    parser.add_argument("--words", type=int, default=300, help="Approximate words per agent output")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    responder = ScriptedResponder()
+    stub = StubOpenAIServer(
+        prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=4, responder=responder
+    ).start()
+    try:
+        module = setup_gemini(stub, responder, args.words)
+        # Agno logs every output that does not parse (and resets logger levels on each run)
+        for name in ("agno", "agno-team", "agno-workflow"):
+            for handler in logging.getLogger(name).handlers:
+                handler.setLevel(logging.ERROR)
+        research = gemini_researcher(args.words)([])
+        inputs = [
+            module.report_prompt(sample_evaluation(i), "## Growth Area 1: Active learning", [research])
+            for i in range(args.reports)
+        ]
+
+        print(f"{args.reports} reports, fault rate {args.fault_rate}, stub {args.decode_ms} ms/output token\n")
+        print(f"{'mode':<11} {'mean s':>7} {'p95 s':>7} {'retries':>8} {'failed':>7} {'bad URLs':>9}   stub time by agent")
+        for mode in ("regenerate", "repair"):
+            for i, (label, marker, reply) in enumerate(responder.routes):
+                if label == "Report Writer":
+                    base = getattr(reply, "reply", reply)
+                    faulty = FaultyReports(base, args.fault_rate, args.seed)
+                    responder.routes[i] = (label, marker, faulty)
+            stub.reset_stats()
+            r = run_mode(mode, module, inputs, args.max_retries)
+            by_label = stub.stats()["by_label"]
+            agents = ", ".join(
+                f"{label} {stats['seconds']:.1f}s/{stats['completion_tokens']} tok" for label, stats in by_label.items()
+            )
+            print(
+                f"{mode:<11} {r['mean_s']:>7.2f} {r['p95_s']:>7.2f} {r['retries']:>8} {r['failed']:>7} {r['bad_urls']:>9}"
+                f"   {agents}"
+            )
+        print(f"\nFaults injected (last mode): {faulty.injected}")
+        print(f"Repair stats: {module.report_repair.stats()}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
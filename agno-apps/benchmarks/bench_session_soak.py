@@ -0,0 +1,174 @@
+"""
+Session Storage Soak Test (Gemini app)
+======================================
+Runs thousands of team evaluations against the stub model, each in its own
+session as AgentOS does for requests without a session_id, and samples the
+process RSS and the session database as they go. The stub server runs in
+the parent process, so the RSS is the app's alone.
+
+Storage modes, each in a fresh process:
+
+  none       no database (SESSION_DB=off)
+  unbounded  SQLite, no compaction, retention or size cap
+  bounded    SQLite with the session store's maintenance thread: runs
+             compacted `--compact-after` seconds after they finish, at most
+             `--max-mb` of data, a pass every `--interval` seconds
+
+Reported per sample: evaluations done, RSS, database size (data in use and
+file with its write-ahead log), sessions, runs and compacted runs; then per
+mode the RSS growth per 1000 evaluations after the warm-up (first
+`--warmup` evaluations) and the final database size.
+
+Usage:
+    python benchmarks/bench_session_soak.py --evaluations 3000
+    python benchmarks/bench_session_soak.py --modes bounded --max-mb 1 --evaluations 5000
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import uuid
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+MODES = ("none", "unbounded", "bounded")
+
+
+def rss_mb() -> float:
+    """Resident set size of this process (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def mode_env(mode: str, db_file: str, args: argparse.Namespace) -> Dict[str, str]:
+    if mode == "none":
+        return {"SESSION_DB": "off"}
+    bounded = mode == "bounded"
+    return {
+        "SESSION_DB": db_file,
+        "SESSION_COMPACT_AFTER": str(args.compact_after) if bounded else "-1",
+        "SESSION_MAX_AGE": "0",
+        "SESSION_MAX_MB": str(args.max_mb) if bounded else "0",
+        "SESSION_MAINTENANCE_INTERVAL": str(args.interval) if bounded else "0",
+    }
+
+
+def soak(mode: str, args: argparse.Namespace) -> None:
+    """Run the evaluations in this process against the parent's stub and print one JSON line per sample."""
+    from bench_offline import ScriptedResponder, run_async, sample_evaluation, setup_gemini
+
+    warnings.filterwarnings("ignore")
+    # The stub's replies are registered in the parent; only its URL is needed here
+    module = setup_gemini(types.SimpleNamespace(base_url=args.stub_url), ScriptedResponder(), args.words)
+    team, store = module.teacher_evaluation_team, module.session_store
+    if store is not None:
+        store.start()  # What the app's lifespan does
+
+    def evaluate(i: int) -> None:
+        output = run_async(team.arun(sample_evaluation(i), session_id=str(uuid.uuid4()), stream=False))
+        if output.status.value != "COMPLETED":
+            raise RuntimeError(f"evaluation {i} ended {output.status.value}")
+
+    done, started = 0, time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        while done < args.evaluations:
+            batch = min(args.sample_every, args.evaluations - done)
+            list(pool.map(evaluate, range(done, done + batch)))
+            done += batch
+            gc.collect()
+            sample: Dict[str, Any] = {"evaluations": done, "rss_mb": round(rss_mb(), 1),
+                                      "seconds": round(time.perf_counter() - started, 1)}
+            if store is not None:
+                stats = store.stats()
+                sample.update({
+                    "data_mb": round(stats["size_bytes"] / 1024 / 1024, 2),
+                    "file_mb": round(stats["file_bytes"] / 1024 / 1024, 2),
+                    **{name: stats[name] for name in ("sessions", "runs", "compacted_runs", "passes")},
+                })
+            print(json.dumps(sample), flush=True)
+    if store is not None:
+        store.stop()
+
+
+def run_mode(mode: str, stub_url: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Soak one mode in a fresh interpreter and print its samples as they arrive."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, **mode_env(mode, str(Path(tmp) / "sessions.db"), args)}
+        command = [sys.executable, __file__, "--child", mode, f"--stub-url={stub_url}"] + [
+            f"--{name.replace('_', '-')}={value}" for name, value in vars(args).items()
+            if name not in ("child", "modes", "stub_url")
+        ]
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True)
+        samples = []
+        for line in process.stdout:
+            sample = json.loads(line)
+            samples.append(sample)
+            db = (
+                f" {sample['data_mb']:>8.2f} {sample['file_mb']:>8.2f} {sample['sessions']:>9}"
+                f" {sample['runs']:>7} {sample['compacted_runs']:>10}"
+                if "data_mb" in sample else ""
+            )
+            print(f"{mode:<10} {sample['evaluations']:>6} {sample['seconds']:>7.1f} {sample['rss_mb']:>8.1f}{db}")
+        if process.wait() != 0:
+            raise RuntimeError(f"{mode} soak failed with exit code {process.returncode}")
+        return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evaluations", type=int, default=2000, help="Evaluations per mode")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--concurrency", type=int, default=8, help="Evaluations in flight")
+    parser.add_argument("--sample-every", type=int, default=250, help="Evaluations between samples")
+    parser.add_argument("--warmup", type=int, default=500, help="Evaluations before RSS growth is measured")
+    parser.add_argument("--compact-after", type=float, default=2.0, help="Bounded mode: seconds before a run is compacted")
+    parser.add_argument("--max-mb", type=float, default=2.0, help="Bounded mode: database size cap")
+    parser.add_argument("--interval", type=float, default=1.0, help="Bounded mode: seconds between maintenance passes")
+    parser.add_argument("--words", type=int, default=60, help="Approximate words per agent output")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--stub-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        soak(args.child, args)
+        return
+
+    from bench_offline import ScriptedResponder, setup_gemini
+    from stub_openai_server import StubOpenAIServer
+
+    warnings.filterwarnings("ignore")
+    responder = ScriptedResponder()
+    stub = StubOpenAIServer(prefill_ms=0, decode_ms=0, max_concurrency=args.concurrency * 4, responder=responder).start()
+    try:
+        setup_gemini(stub, responder, args.words)  # Registers the scripted replies for the app's agents
+        print(f"{'mode':<10} {'evals':>6} {'s':>7} {'RSS MB':>8} {'data MB':>8} {'file MB':>8} {'sessions':>9} {'runs':>7} {'compacted':>10}")
+        results = {mode: run_mode(mode, stub.base_url, args) for mode in args.modes}
+    finally:
+        stub.stop()
+
+    print(f"\n{'mode':<10} {'RSS MB/1000 evals':>18} {'final RSS MB':>13} {'final file MB':>14}")
+    for mode, samples in results.items():
+        measured = [s for s in samples if s["evaluations"] >= args.warmup] or samples
+        first, last = measured[0], measured[-1]
+        span = last["evaluations"] - first["evaluations"]
+        growth = (last["rss_mb"] - first["rss_mb"]) / span * 1000 if span else 0.0
+        file_mb = f"{last['file_mb']:.2f}" if "file_mb" in last else "-"
+        print(f"{mode:<10} {growth:>18.2f} {last['rss_mb']:>13.1f} {file_mb:>14}")
+
+
+if __name__ == "__main__":
+    main()
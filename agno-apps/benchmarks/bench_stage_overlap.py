@@ -0,0 +1,102 @@
+"""
+Stage Overlap Benchmark (LMStudio app)
+======================================
+Runs the LMStudio pipeline against the stub server with cross-stage
+pipelining off (`STAGE_OVERLAP=off`: strategies start once the whole
+analysis is written and verified) and on (each growth area goes to the
+strategy developer as soon as its block is complete in the analyst's
+stream), for several strategy concurrencies and stub slots.
+
+Reported per setting, from the stub's request timeline:
+
+- end-to-end   latency of `generate_report` (one evaluation at a time)
+- first area   seconds from the analyst's first request to the first
+               Strategy Developer request being served
+- overlap      Strategy Developer seconds spent while the analyst was still
+               running (the work taken off the critical path)
+- tail         seconds from the analyst's last response to the last strategy
+- gain         end-to-end saved by overlap, against the same setting off
+
+Usage:
+    python benchmarks/bench_stage_overlap.py --evaluations 6
+    python benchmarks/bench_stage_overlap.py --concurrency 1 3 --slots 1 2 4 --decode-ms 4
+"""
+
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List
+import argparse
+import sys
+import time
+import warnings
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import ScriptedResponder, sample_evaluation, setup_lmstudio  # noqa: E402
+from stub_openai_server import StubOpenAIServer  # noqa: E402
+
+ANALYST = "ISP Way Document Analyst"
+DEVELOPER = "Strategy Developer"
+
+
+def measure(module: Any, stub: StubOpenAIServer, evaluations: int) -> Dict[str, float]:
+    """Median end-to-end latency, first dispatch, overlap and tail over `evaluations` reports."""
+    rows: Dict[str, List[float]] = {"end_to_end_s": [], "first_area_s": [], "overlap_s": [], "tail_s": []}
+    for i in range(evaluations):
+        stub.reset_stats()
+        start = time.perf_counter()
+        module.generate_report(sample_evaluation(i))
+        rows["end_to_end_s"].append(time.perf_counter() - start)
+
+        timeline = stub.timeline()
+        analyst = [(s, e) for label, s, e, _ in timeline if label == ANALYST]
+        strategies = [(s, e) for label, s, e, _ in timeline if label == DEVELOPER]
+        if not analyst or not strategies:
+            raise RuntimeError(f"missing {ANALYST if not analyst else DEVELOPER} requests in the stub timeline")
+        analyst_start, analyst_end = min(s for s, _ in analyst), max(e for _, e in analyst)
+        rows["first_area_s"].append(min(s for s, _ in strategies) - analyst_start)
+        rows["overlap_s"].append(sum(max(0.0, min(e, analyst_end) - s) for s, e in strategies))
+        rows["tail_s"].append(max(e for _, e in strategies) - analyst_end)
+    return {name: median(values) for name, values in rows.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evaluations", type=int, default=6, help="Reports per setting (median reported)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 3], help="STRATEGY_CONCURRENCY values")
+    parser.add_argument("--slots", type=int, nargs="+", default=[2, 4], help="Requests the stub serves at once")
+    parser.add_argument("--prefill-ms", type=float, default=0.05, help="Stub prompt processing per token")
+    parser.add_argument("--decode-ms", type=float, default=3.0, help="Stub decode time per token")
+    parser.add_argument("--words", type=int, default=200, help="Approximate words per agent output")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", category=UserWarning)
+
+    print(f"Stub: {args.decode_ms} ms/output token, {args.evaluations} reports per setting (medians)\n")
+    print(
+        f"{'slots':>5} {'concurrency':>11} {'overlap':>8} {'end-to-end s':>13} {'first area s':>13}"
+        f" {'overlap s':>10} {'tail s':>7} {'gain':>7}"
+    )
+    for slots in args.slots:
+        responder = ScriptedResponder()
+        stub = StubOpenAIServer(
+            prefill_ms=args.prefill_ms, decode_ms=args.decode_ms, max_concurrency=slots, responder=responder
+        ).start()
+        try:
+            module = setup_lmstudio(stub, responder, args.words)
+            for concurrency in args.concurrency:
+                module.STRATEGY_CONCURRENCY = concurrency
+                baseline = None
+                for overlap in (False, True):
+                    module.STAGE_OVERLAP = overlap
+                    r = measure(module, stub, args.evaluations)
+                    baseline = baseline or r["end_to_end_s"]
+                    gain = f"{1 - r['end_to_end_s'] / baseline:>7.0%}" if overlap else f"{'-':>7}"
+                    print(
+                        f"{slots:>5} {concurrency:>11} {'on' if overlap else 'off':>8} {r['end_to_end_s']:>13.2f}"
+                        f" {r['first_area_s']:>13.2f} {r['overlap_s']:>10.2f} {r['tail_s']:>7.2f} {gain}"
+                    )
+        finally:
+            stub.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Startup Benchmark (both apps)
+=============================
+Measures how fast each example starts, in fresh processes, so cold starts
+and reload cycles can be tracked across commits:
+
+- import     wall time of `import app` (what batch runs and benchmarks pay),
+             and the heaviest top-level imports from `python -X importtime`
+- listening  time from `python app.py` until the server answers HTTP
+- ready      time until `GET /ready` returns 200 (agents built, Gemini
+             client created, File Search store attached); the same as
+             listening for versions without /ready, which build everything
+             before they listen
+- reload     Gemini app only: time from touching app.py until the
+             reloaded server process answers again (a new `instantiated_at`
+             from AgentOS' /health)
+
+No model or network is needed: the Gemini app gets a placeholder
+GOOGLE_API_KEY and `ISP_WAY_CONTEXT=prefix` (no File Search store), and the
+LMStudio app does not contact LM Studio at startup.
+
+`--examples-dir` points at another checkout's examples (e.g. a `git worktree`
+of an older commit) to compare against it.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 3
+    python benchmarks/bench_startup.py --apps lmstudio --json startup.json
+"""
+
+from pathlib import Path
+from statistics import median
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent / "examples"
+
+# Example folder, port variable and a path that answers as soon as the server listens
+APPS = {
+    "lmstudio": ("teacher-evaluation-lmstudio", "GRADIO_SERVER_PORT", "/"),
+    "gemini": ("teacher-evaluation", "AGENT_OS_PORT", "/health"),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def app_env(port_variable: str, port: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "startup-benchmark")
+    env["ISP_WAY_CONTEXT"] = "prefix"
+    env[port_variable] = str(port)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def measure_import(app_dir: Path, env: Dict[str, str]) -> Tuple[float, List[Tuple[str, float]]]:
+    """Seconds to import app.py in a fresh interpreter, and the heaviest top-level imports."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=app_dir, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import app failed in {app_dir}:\n{result.stderr[-2000:]}")
+
+    top: List[Tuple[str, float]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Imports made by app.py itself are one level (two spaces) below it in the tree
+        if len(name) - len(name.lstrip()) != 3:
+            continue
+        try:
+            top.append((name.strip(), int(cumulative) / 1e6))
+        except ValueError:
+            continue
+    return elapsed, sorted(top, key=lambda item: item[1], reverse=True)
+
+
+def get(url: str, timeout: float = 1.0) -> Optional[Tuple[int, Dict[str, Any]]]:
+    """Status and JSON body ({} for other content), or None if nothing answers yet."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            status, body = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, body = e.code, e.read()
+    except OSError:
+        return None
+    try:
+        return status, json.loads(body or b"{}")
+    except ValueError:
+        return status, {}
+
+
+def wait_for(url: str, started: float, deadline: float, status: Optional[int] = None, check=None) -> float:
+    """Seconds since `started` until `url` answers (with `status`, and `check(body)` true)."""
+    while time.perf_counter() - started < deadline:
+        answer = get(url)
+        if answer is not None and (status is None or answer[0] == status) and (check is None or check(answer[1])):
+            return time.perf_counter() - started
+        time.sleep(0.05)
+    raise TimeoutError(f"{url} did not answer within {deadline:.0f}s")
+
+
+def measure_server(
+    app_dir: Path, env: Dict[str, str], port: int, probe: str, reload: bool, deadline: float
+) -> Dict[str, float]:
+    """Time to listening and to ready after `python app.py`, and (optionally) one reload cycle."""
+    base = f"http://127.0.0.1:{port}"
+    env = {**env, "AGENT_OS_HOST": "127.0.0.1"}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        result = {"listening_s": wait_for(f"{base}{probe}", started, deadline)}
+        if get(f"{base}/ready")[0] == 404:
+            result["ready_s"] = result["listening_s"]
+        else:
+            result["ready_s"] = wait_for(f"{base}/ready", started, deadline, status=200)
+        if reload:
+            instance = get(f"{base}{probe}")[1].get("instantiated_at")
+            touched = time.perf_counter()
+            os.utime(app_dir / "app.py")
+            result["reload_s"] = wait_for(
+                f"{base}{probe}", touched, deadline, check=lambda body: body.get("instantiated_at") != instance
+            )
+        return result
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", choices=list(APPS), nargs="+", default=list(APPS))
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=6, help="Heaviest top-level imports to list")
+    parser.add_argument("--examples-dir", type=Path, default=EXAMPLES_DIR)
+    parser.add_argument("--deadline", type=float, default=120.0, help="Seconds to wait for a server")
+    parser.add_argument("--json", type=Path, help="Write the results to this file")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'app':<10} {'import s':>9} {'listening s':>12} {'ready s':>8} {'reload s':>9}")
+    for name in args.apps:
+        folder, port_variable, probe = APPS[name]
+        app_dir = args.examples_dir / folder
+        imports, servers, top = [], [], []
+        for _ in range(args.runs):
+            port = free_port()
+            env = app_env(port_variable, port)
+            elapsed, top = measure_import(app_dir, env)
+            imports.append(elapsed)
+            servers.append(measure_server(app_dir, env, port, probe, reload=name == "gemini", deadline=args.deadline))
+
+        row = {"import_s": median(imports), "top_imports": dict(top[:args.top])}
+        for key in ("listening_s", "ready_s", "reload_s"):
+            values = [server[key] for server in servers if key in server]
+            if values:
+                row[key] = median(values)
+        results[name] = row
+        reload_s = f"{row['reload_s']:>9.2f}" if "reload_s" in row else f"{'-':>9}"
+        print(f"{name:<10} {row['import_s']:>9.2f} {row['listening_s']:>12.2f} {row['ready_s']:>8.2f} {reload_s}")
+
+    for name, row in results.items():
+        print(f"\nHeaviest imports of {name}/app.py (cumulative s):")
+        for module, seconds in row["top_imports"].items():
+            print(f"  {module:<40} {seconds:>6.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Team vs Workflow Benchmark (Gemini app)
+=======================================
+Runs the same teacher evaluation through `teacher_evaluation_team` (LLM
+coordinator) and `teacher_evaluation_workflow` (explicit parallel workflow)
+and reports wall-clock latency and the number of model calls for each.
+
+Requires GOOGLE_API_KEY (live Gemini calls).
+
+Usage:
+    python benchmarks/bench_team_vs_workflow.py --runs 3
+"""
+
+from pathlib import Path
+from statistics import mean, median
+from typing import Callable, Dict, List
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+EXAMPLE_DIR = Path(__file__).resolve().parent.parent / "examples" / "teacher-evaluation"
+
+SAMPLE_EVALUATION = """Teacher: Ms. Johnson
+Subject: 5th Grade Math
+
+Observation Notes:
+- Lesson followed a traditional lecture format with limited student interaction
+- All students received the same worksheet regardless of ability level
+- No evidence of formative assessment during the lesson
+"""
+
+
+def load_app():
+    """Import the Gemini example's app.py as a module."""
+    sys.path.insert(0, str(EXAMPLE_DIR))
+    spec = importlib.util.spec_from_file_location("teacher_evaluation_app", EXAMPLE_DIR / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class CallCounter:
+    """Counts model invocations by patching the Gemini model class."""
+
+    def __init__(self, model_class):
+        self.count = 0
+        self._lock = threading.Lock()
+        for name in ("invoke", "invoke_stream", "ainvoke", "ainvoke_stream"):
+            original = getattr(model_class, name)
+            setattr(model_class, name, self._wrap(original))
+
+    def _wrap(self, original: Callable) -> Callable:
+        counter = self
+
+        def wrapper(*args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return original(*args, **kwargs)
+
+        return wrapper
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+
+
+def bench(name: str, run: Callable[[], object], counter: CallCounter, runs: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    calls: List[int] = []
+    for i in range(runs):
+        counter.reset()
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+        calls.append(counter.count)
+        print(f"  {name} run {i + 1}: {latencies[-1]:.1f}s, {calls[-1]} model calls")
+    return {"mean_s": mean(latencies), "median_s": median(latencies), "mean_calls": mean(calls)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per variant")
+    args = parser.parse_args()
+
+    if not os.getenv("GOOGLE_API_KEY"):
+        sys.exit("GOOGLE_API_KEY is not set")
+
+    app = load_app()
+    counter = CallCounter(type(app.isp_way_model))
+
+    # Resolve the File Search store up front so it is not billed to the first variant
+    app.ensure_isp_way_store()
+
+    results = {
+        # Both run async, as served by AgentOS (the researcher's URL verification hook is async)
+        "team": bench(
+            "team", lambda: asyncio.run(app.teacher_evaluation_team.arun(SAMPLE_EVALUATION)), counter, args.runs
+        ),
+        "workflow": bench(
+            "workflow", lambda: asyncio.run(app.teacher_evaluation_workflow.arun(SAMPLE_EVALUATION)), counter, args.runs
+        ),
+    }
+
+    print(f"\n{'variant':<10} {'mean (s)':>10} {'median (s)':>12} {'model calls':>12}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['mean_s']:>10.1f} {result['median_s']:>12.1f} {result['mean_calls']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+URL Verifier Benchmark (Gemini app)
+===================================
+Runs the Gemini example's `UrlVerifier` (url_verifier.py) over synthetic
+Strategy Researcher outputs, with a stub fetcher in place of HTTP so it
+needs no network:
+
+- every fetch takes `--fetch-ms` and a share (`--dead-rate`) of the URLs
+  answer 404;
+- a share (`--invented-rate`) of the cited URLs are on sites that are not
+  in the run's search grounding metadata (invented sources);
+- evaluations cite URLs from a shared pool (`--pool`), so later
+  evaluations repeat URLs verified by earlier ones.
+
+Measured per mode over `--evaluations` research outputs: verification time
+per output, fetches, cache hits, and strategies kept with a bad source
+(dead or invented) versus dropped.
+
+  unverified   no checks (the previous behaviour; bad sources reach the report)
+  sequential   one fetch at a time, no verdict cache
+  concurrent   the uncached URLs of one output fetched concurrently, no verdict cache
+  cached       concurrent, with the verdict cache (positive and negative)
+
+Usage:
+    python benchmarks/bench_url_verifier.py --evaluations 50 --fetch-ms 300
+"""
+
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import random
+import sys
+import threading
+import time
+
+EXAMPLE_DIR = Path(__file__).resolve().parent.parent / "examples" / "teacher-evaluation"
+sys.path.insert(0, str(EXAMPLE_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_offline import percentile  # noqa: E402
+from url_verifier import UrlVerifier  # noqa: E402
+
+GROUNDED_SITES = ["edutopia.org", "cultofpedagogy.com", "ascd.org", "teachingchannel.org", "edweek.org"]
+INVENTED_SITES = ["teachingstrategies-hub.com", "classroom-best-practices.org"]
+MODES = ["unverified", "sequential", "concurrent", "cached"]
+
+
+class StubFetcher:
+    """Answers after a fixed delay: 404 for dead URLs, 200 otherwise."""
+
+    def __init__(self, dead: set, delay: float):
+        self.dead = dead
+        self.delay = delay
+        self.fetches = 0
+        self._lock = threading.Lock()
+
+    def _status(self, url: str) -> int:
+        with self._lock:
+            self.fetches += 1
+        return 404 if url in self.dead else 200
+
+    def fetch(self, url: str) -> Optional[int]:
+        time.sleep(self.delay)
+        return self._status(url)
+
+    async def afetch(self, url: str) -> Optional[int]:
+        await asyncio.sleep(self.delay)
+        return self._status(url)
+
+
+def make_pool(size: int, dead_rate: float, invented_rate: float, rng: random.Random) -> Tuple[List[str], set, set]:
+    """URLs to cite, and which of them are dead or invented."""
+    urls, dead, invented = [], set(), set()
+    for i in range(size):
+        if rng.random() < invented_rate:
+            url = f"https://www.{rng.choice(INVENTED_SITES)}/strategy-{i}"
+            invented.add(url)
+        else:
+            url = f"https://www.{rng.choice(GROUNDED_SITES)}/article/strategy-{i}"
+            if rng.random() < dead_rate:
+                dead.add(url)
+        urls.append(url)
+    return urls, dead, invented
+
+
+def research_output(urls: List[str]) -> Tuple[str, List[Tuple[str, Optional[str]]]]:
+    """A research reply citing `urls`, and its grounding (redirect URIs titled with the grounded sites)."""
+    blocks = [
+        f"### Strategy {i + 1}\nSource: Example - {url}\n1. First step 2. Second step 3. Third step\n"
+        for i, url in enumerate(urls)
+    ]
+    grounding = [
+        (f"https://vertexaisearch.cloud.google.com/grounding-api-redirect/{i}", site)
+        for i, site in enumerate(GROUNDED_SITES)
+    ]
+    return "## Growth Area: Active learning\n\n" + "\n".join(blocks), grounding
+
+
+def run_mode(mode: str, outputs: List[Tuple[str, Any, List[str]]], bad: set, fetcher: StubFetcher,
+             concurrency: int) -> Dict[str, Any]:
+    verifier = UrlVerifier(fetcher=fetcher, concurrency=1 if mode == "sequential" else concurrency)
+    fetcher.fetches = 0
+    latencies: List[float] = []
+    kept_bad = dropped = 0
+    for text, grounding, urls in outputs:
+        if mode != "cached":
+            verifier = UrlVerifier(fetcher=fetcher, concurrency=verifier.concurrency)
+        start = time.perf_counter()
+        if mode == "unverified":
+            kept = text
+        else:
+            result = asyncio.run(verifier.averify_text(text, grounding))
+            kept, dropped = result.text, dropped + result.dropped
+        latencies.append(time.perf_counter() - start)
+        kept_bad += sum(url in kept for url in urls if url in bad)
+    return {
+        "mean_s": mean(latencies),
+        "p95_s": percentile(latencies, 95),
+        "fetches": fetcher.fetches,
+        "cache_hits": verifier.stats()["cache_hits"] if mode == "cached" else 0,
+        "kept_bad": kept_bad,
+        "dropped": dropped,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--evaluations", type=int, default=50, help="Research outputs to verify")
+    parser.add_argument("--strategies", type=int, default=6, help="Cited URLs per research output")
+    parser.add_argument("--pool", type=int, default=60, help="Distinct URLs the outputs draw from")
+    parser.add_argument("--dead-rate", type=float, default=0.15, help="Share of grounded URLs that answer 404")
+    parser.add_argument("--invented-rate", type=float, default=0.15, help="Share of URLs on ungrounded sites")
+    parser.add_argument("--fetch-ms", type=float, default=300.0, help="Stub fetch latency")
+    parser.add_argument("--concurrency", type=int, default=8, help="Fetches in flight per output")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool, dead, invented = make_pool(args.pool, args.dead_rate, args.invented_rate, rng)
+    outputs = []
+    for _ in range(args.evaluations):
+        urls = rng.sample(pool, min(args.strategies, len(pool)))
+        text, grounding = research_output(urls)
+        outputs.append((text, grounding, urls))
+    cited_bad = sum(url in dead or url in invented for _, _, urls in outputs for url in urls)
+    fetcher = StubFetcher(dead, args.fetch_ms / 1000)
+
+    print(
+        f"{args.evaluations} research outputs x {args.strategies} URLs from a pool of {args.pool} "
+        f"({len(dead)} dead, {len(invented)} invented); {cited_bad} bad citations; fetch {args.fetch_ms:.0f} ms\n"
+    )
+    print(f"{'mode':<11} {'mean s':>7} {'p95 s':>7} {'fetches':>8} {'cache hits':>11} {'bad kept':>9} {'dropped':>8}")
+    for mode in MODES:
+        r = run_mode(mode, outputs, dead | invented, fetcher, args.concurrency)
+        print(
+            f"{mode:<11} {r['mean_s']:>7.3f} {r['p95_s']:>7.3f} {r['fetches']:>8} {r['cache_hits']:>11}"
+            f" {r['kept_bad']:>9} {r['dropped']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
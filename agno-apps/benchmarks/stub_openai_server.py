@@ -0,0 +1,369 @@
+"""
+Stub OpenAI-Compatible Server
+=============================
+A tiny stand-in for LM Studio's `/v1` API for offline benchmarks.
+
+- `GET /v1/models` and `POST /v1/chat/completions` (streaming and not).
+- Latency is simulated: `prefill_ms` per prompt token before the first token,
+  then `decode_ms` per generated token. Prompt tokens are estimated as
+  characters / 4. `prefill_quadratic_ms` adds that many ms per prompt token
+  per 1000 prompt tokens, as attention makes long prompts superlinear.
+- `context_tokens` rejects prompts over that size with a 400, like a model
+  loaded with that context length; `max_tokens` in a request cuts the reply.
+- `load_seconds` simulates LM Studio's JIT model load: the first completion
+  waits for it, and so does the first one after the model has been idle for
+  `unload_after` seconds (its idle TTL). Loads are counted in stats().
+- `max_concurrency` requests are served at once (1 models a single GPU
+  without parallel predictions); the rest wait their turn.
+- `failing = True` makes every route answer 503, to test failover.
+- A custom responder can script the replies (including tool calls) and label
+  them, e.g. per agent, so tokens and server time are reported per label.
+- Several models: `model_responders` answers requests for a model id with its
+  own responder, and `model_speed` scales prefill and decode time per model
+  id (e.g. 0.25 for a small model).
+
+Usage:
+    python benchmarks/stub_openai_server.py --port 1234 --decode-ms 5
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import argparse
+import json
+import threading
+import time
+import uuid
+
+# Returns the completion for a request's messages: either the text, or a dict with
+# "content", "tool_calls" ([{"name": ..., "arguments": {...}}]) and an optional
+# "label" under which the request is counted in stats()
+Responder = Callable[[List[Dict[str, Any]]], Union[str, Dict[str, Any]]]
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def message_text(messages: List[Dict[str, Any]]) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(str(content))
+    return "\n".join(parts)
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0}
+
+
+def default_responder(completion_tokens: int) -> Responder:
+    def respond(messages: List[Dict[str, Any]]) -> str:
+        return " ".join(f"word{i % 50}" for i in range(completion_tokens))
+    return respond
+
+
+class StubOpenAIServer:
+    """OpenAI-compatible chat completions server with simulated prefill/decode latency."""
+
+    def __init__(
+        self,
+        port: int = 0,
+        prefill_ms: float = 0.2,
+        decode_ms: float = 5.0,
+        max_concurrency: int = 1,
+        completion_tokens: int = 64,
+        responder: Optional[Responder] = None,
+        host: str = "127.0.0.1",
+        prefill_quadratic_ms: float = 0.0,
+        context_tokens: Optional[int] = None,
+        load_seconds: float = 0.0,
+        unload_after: Optional[float] = None,
+        model_responders: Optional[Dict[str, Responder]] = None,
+        model_speed: Optional[Dict[str, float]] = None,
+    ):
+        self.prefill_ms = prefill_ms
+        self.prefill_quadratic_ms = prefill_quadratic_ms
+        self.context_tokens = context_tokens
+        self.load_seconds = load_seconds
+        self.unload_after = unload_after
+        self.loads = 0
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._active = 0
+        self._last_active = time.perf_counter()
+        self.decode_ms = decode_ms
+        self.responder = responder or default_responder(completion_tokens)
+        self.model_responders = dict(model_responders or {})
+        self.model_speed = dict(model_speed or {})
+        self.failing = False
+        self._slots = threading.Semaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self._stats = _empty_stats()
+        self._by_label: Dict[str, Dict[str, Any]] = {}
+        self._timeline: List[Tuple[Optional[str], float, float, int]] = []
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals, plus the same counters per responder label under "by_label"."""
+        with self._stats_lock:
+            return {
+                **self._stats, "model_loads": self.loads,
+                "by_label": {label: dict(s) for label, s in self._by_label.items()},
+            }
+
+    def timeline(self) -> List[Tuple[Optional[str], float, float, int]]:
+        """
+        (label, start, end, prompt tokens) of every completed request, from taking
+        a slot to the last byte (`time.perf_counter()`).
+        """
+        with self._stats_lock:
+            return list(self._timeline)
+
+    def reset_stats(self) -> None:
+        with self._stats_lock:
+            self._stats = _empty_stats()
+            self._by_label = {}
+            self._timeline = []
+            self.loads = 0
+
+    def _record(
+        self, label: Optional[str], prompt_tokens: int, completion_tokens: int, started: float, served: float
+    ) -> None:
+        ended = time.perf_counter()
+        seconds = ended - started
+        with self._stats_lock:
+            self._timeline.append((label, served, ended, prompt_tokens))
+            targets = [self._stats]
+            if label:
+                targets.append(self._by_label.setdefault(label, _empty_stats()))
+            for stats in targets:
+                stats["requests"] += 1
+                stats["prompt_tokens"] += prompt_tokens
+                stats["completion_tokens"] += completion_tokens
+                stats["seconds"] += seconds
+
+    # -------------------------------------------------------------------------
+    # HTTP handling
+    # -------------------------------------------------------------------------
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client closed the connection, e.g. to abort a streamed reply
+
+            def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _unavailable(self) -> bool:
+                if server.failing:
+                    self._send_json(503, {"error": {"message": "stub server is failing", "type": "server_error"}})
+                return server.failing
+
+            def do_GET(self):
+                if self._unavailable():
+                    return
+                if self.path.rstrip("/") == "/v1/models":
+                    self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self._unavailable():
+                    return
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                server._complete(self, request)
+
+        return Handler
+
+    def _complete(self, handler: BaseHTTPRequestHandler, request: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        messages = request.get("messages") or []
+        prompt_tokens = estimate_tokens(message_text(messages) + json.dumps(request.get("tools") or []))
+        if self.context_tokens and prompt_tokens > self.context_tokens:
+            handler._send_json(400, {"error": {
+                "message": f"The prompt ({prompt_tokens} tokens) is longer than the context length ({self.context_tokens})",
+                "type": "invalid_request_error",
+            }})
+            return
+        reply = self.model_responders.get(request.get("model"), self.responder)(messages)
+        if isinstance(reply, str):
+            reply = {"content": reply}
+        text = reply.get("content") or ""
+        tool_calls = [
+            {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {
+                "name": call["name"], "arguments": json.dumps(call.get("arguments", {})),
+            }}
+            for call in reply.get("tool_calls") or []
+        ]
+        # Split into word-sized "tokens" so streamed chunks look like real deltas
+        words = text.split(" ") if text else []
+        tokens = [word if i == 0 else " " + word for i, word in enumerate(words)]
+        max_tokens = request.get("max_completion_tokens") or request.get("max_tokens")
+        truncated = bool(max_tokens) and len(tokens) > max_tokens
+        if truncated:
+            tokens, text = tokens[:max_tokens], "".join(tokens[:max_tokens])
+        completion_tokens = len(tokens) + sum(estimate_tokens(call["function"]["arguments"]) for call in tool_calls)
+        response = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "model": request.get("model", "stub-model"),
+            "tokens": tokens,
+            "tool_calls": tool_calls,
+            "finish_reason": "length" if truncated else "tool_calls" if tool_calls else "stop",
+            "decode_ms": self.decode_ms * self.model_speed.get(request.get("model"), 1.0),
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+        self._load_model()
+        try:
+            with self._slots:
+                served = time.perf_counter()
+                prefill_ms = self.prefill_ms + self.prefill_quadratic_ms * prompt_tokens / 1000
+                time.sleep(prompt_tokens * prefill_ms * self.model_speed.get(request.get("model"), 1.0) / 1000)
+                if request.get("stream"):
+                    self._stream(handler, response, request)
+                else:
+                    time.sleep(completion_tokens * response["decode_ms"] / 1000)
+                    message = {"role": "assistant", "content": text or None}
+                    if tool_calls:
+                        message["tool_calls"] = tool_calls
+                    handler._send_json(200, {
+                        "id": response["id"],
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": response["model"],
+                        "choices": [{"index": 0, "message": message, "finish_reason": response["finish_reason"]}],
+                        "usage": response["usage"],
+                    })
+        finally:
+            with self._load_lock:
+                self._active -= 1
+                self._last_active = time.perf_counter()
+        self._record(reply.get("label"), prompt_tokens, completion_tokens, started, served)
+
+    def _load_model(self) -> None:
+        """Wait for the (simulated) model load if it is not loaded or has been idle past `unload_after`."""
+        with self._load_lock:
+            idle = time.perf_counter() - self._last_active
+            if self._loaded and self.unload_after is not None and self._active == 0 and idle > self.unload_after:
+                self._loaded = False
+            if not self._loaded and self.load_seconds:
+                time.sleep(self.load_seconds)
+                self.loads += 1
+            self._loaded = True
+            self._active += 1
+
+    def _stream(self, handler: BaseHTTPRequestHandler, response: Dict[str, Any], request: Dict[str, Any]) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(payload: Any) -> None:
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf-8")
+            handler.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            handler.wfile.flush()
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": response["id"],
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": response["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        send(chunk({"role": "assistant", "content": ""}))
+        for token in response["tokens"]:
+            time.sleep(response["decode_ms"] / 1000)
+            send(chunk({"content": token}))
+        for index, call in enumerate(response["tool_calls"]):
+            time.sleep(estimate_tokens(call["function"]["arguments"]) * response["decode_ms"] / 1000)
+            send(chunk({"tool_calls": [{**call, "index": index}]}))
+        send(chunk({}, response["finish_reason"]))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send({**chunk({}), "choices": [], "usage": response["usage"]})
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--prefill-ms", type=float, default=0.2, help="Milliseconds per prompt token")
+    parser.add_argument("--decode-ms", type=float, default=5.0, help="Milliseconds per generated token")
+    parser.add_argument("--max-concurrency", type=int, default=1, help="Requests served at the same time")
+    parser.add_argument("--prefill-quadratic-ms", type=float, default=0.0, help="Extra ms per prompt token per 1k prompt tokens")
+    parser.add_argument("--context-tokens", type=int, help="Reject longer prompts (model context length)")
+    parser.add_argument("--load-seconds", type=float, default=0.0, help="Simulated model load before the first completion")
+    parser.add_argument("--unload-after", type=float, help="Unload the model after this many idle seconds")
+    parser.add_argument("--completion-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    server = StubOpenAIServer(
+        port=args.port,
+        prefill_ms=args.prefill_ms,
+        decode_ms=args.decode_ms,
+        max_concurrency=args.max_concurrency,
+        completion_tokens=args.completion_tokens,
+        prefill_quadratic_ms=args.prefill_quadratic_ms,
+        context_tokens=args.context_tokens,
+        load_seconds=args.load_seconds,
+        unload_after=args.unload_after,
+    )
+    print(f"Stub OpenAI server on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
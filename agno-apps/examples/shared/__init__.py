@@ -0,0 +1,6 @@
+"""
+Shared Modules
+==============
+Code used by both teacher evaluation apps (Gemini and LM Studio). Each app
+puts this directory's parent on `sys.path` and imports `shared.<module>`.
+"""
@@ -0,0 +1,201 @@
+"""
+Model Routing
+=============
+Which model each agent runs on, a quality gate that escalates a stage to
+the larger model when a small model's output is not usable, and cost and
+latency per route.
+
+- Routes (`MODEL_ROUTES`): comma-separated `Agent Name=model-id` entries.
+  Agents without an entry run on the app's default model.
+- Gates: app.py registers a check per agent (`add_gate`). When a finished
+  stage fails its check and `MODEL_ESCALATION` is on (the default), the
+  stage runs once more on the escalation model (`MODEL_ESCALATE_TO`).
+  Agents already on the escalation model are never re-run.
+- Prices (`MODEL_PRICES`): comma-separated `model-id=input/output` prices
+  per million tokens; models without a price cost 0.
+
+A route is an agent and the model it ran on, so escalated runs show up as
+their own route. Attach `record_run` as a post-hook next to
+`stage_metrics.record_run`; `summary()` reports per route the runs,
+escalations, wall time, tokens and cost, in total and per evaluation
+(the app calls `count_evaluation()` once per generated report).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger("model_routing")
+
+# Returns True if a stage's output is good enough to pass on
+Gate = Callable[[Any], bool]
+
+
+@dataclass
+class _RouteTotals:
+    runs: int = 0
+    escalations: int = 0  # Runs whose output failed the gate and was re-run on the escalation model
+    wall_s: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """`"Agent A=model-1, Agent B=model-2"` -> {"Agent A": "model-1", "Agent B": "model-2"}."""
+    routes = {}
+    for entry in spec.split(","):
+        name, sep, model_id = entry.partition("=")
+        if sep and name.strip() and model_id.strip():
+            routes[name.strip()] = model_id.strip()
+    return routes
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """`"model-1=0.10/0.40"` -> {"model-1": (0.10, 0.40)} (input, output per million tokens)."""
+    prices = {}
+    for entry in spec.split(","):
+        model_id, sep, price = entry.partition("=")
+        if not sep:
+            continue
+        input_price, _, output_price = price.partition("/")
+        try:
+            prices[model_id.strip()] = (float(input_price), float(output_price or input_price))
+        except ValueError:
+            logger.warning("Ignoring malformed MODEL_PRICES entry %r", entry)
+    return prices
+
+
+class ModelRouter:
+    """Per-agent model ids, quality gates and per-route totals."""
+
+    def __init__(
+        self,
+        default_model: str,
+        routes: Optional[Dict[str, str]] = None,
+        escalation_model: Optional[str] = None,
+        escalation: bool = True,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+    ):
+        self.default_model = default_model
+        self.routes = dict(routes or {})
+        self.escalation_model = escalation_model or default_model
+        self.escalation = escalation
+        self.prices = dict(prices or {})
+        self.gates: Dict[str, Gate] = {}
+        self.evaluations = 0
+        self._totals: Dict[Tuple[str, str], _RouteTotals] = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, agent_name: str) -> str:
+        return self.routes.get(agent_name, self.default_model)
+
+    def add_gate(self, agent_name: str, gate: Gate) -> None:
+        self.gates[agent_name] = gate
+
+    def escalates(self, agent_name: str, model_id: str) -> bool:
+        """Whether a failed gate re-runs this agent's stage on the escalation model."""
+        return self.escalation and agent_name in self.gates and model_id != self.escalation_model
+
+    def needs_escalation(self, agent_name: str, model_id: str, output: Any) -> bool:
+        """Check a finished stage's output; True (and counted) if it failed and the stage should be re-run."""
+        if not self.escalates(agent_name, model_id) or self.gates[agent_name](output):
+            return False
+        with self._lock:
+            self._totals.setdefault((agent_name, model_id), _RouteTotals()).escalations += 1
+        logger.info(json.dumps({"escalation": agent_name, "from": model_id, "to": self.escalation_model}))
+        return True
+
+    def cost(self, model_id: str, prompt_tokens: int, completion_tokens: int) -> float:
+        input_price, output_price = self.prices.get(model_id, (0.0, 0.0))
+        return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+    # -------------------------------------------------------------------------
+    # Recording
+    # -------------------------------------------------------------------------
+
+    def record(self, agent_name: str, model_id: str, wall_s: float, prompt_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            totals = self._totals.setdefault((agent_name, model_id), _RouteTotals())
+            totals.runs += 1
+            totals.wall_s += wall_s
+            totals.prompt_tokens += prompt_tokens
+            totals.completion_tokens += completion_tokens
+            totals.cost += self.cost(model_id, prompt_tokens, completion_tokens)
+
+    def record_run(self, run_output: Any, agent: Any = None, team: Any = None) -> None:
+        """Post-hook: add a finished agent or team run to its route."""
+        runner = agent if agent is not None else team
+        metrics = getattr(run_output, "metrics", None)
+        timer = getattr(metrics, "timer", None)
+        # Post-hooks run before the run's timer is stopped, so read it directly
+        wall_s = timer.elapsed if timer is not None else getattr(metrics, "duration", None) or 0.0
+        self.record(
+            getattr(runner, "name", None) or getattr(run_output, "agent_name", None) or "unknown",
+            getattr(run_output, "model", None) or getattr(getattr(runner, "model", None), "id", None) or "unknown",
+            wall_s,
+            getattr(metrics, "input_tokens", 0) or 0,
+            getattr(metrics, "output_tokens", 0) or 0,
+        )
+
+    def count_evaluation(self) -> None:
+        with self._lock:
+            self.evaluations += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._totals = {}
+            self.evaluations = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-route totals and per-evaluation averages, plus the routing configuration."""
+        with self._lock:
+            evaluations = self.evaluations
+            per_evaluation = (lambda value: round(value / evaluations, 6)) if evaluations else (lambda value: None)
+            routes = {
+                f"{agent} -> {model_id}": {
+                    "runs": t.runs,
+                    "escalations": t.escalations,
+                    "escalation_rate": round(t.escalations / t.runs, 3) if t.runs else 0.0,
+                    "avg_wall_s": round(t.wall_s / t.runs, 3) if t.runs else 0.0,
+                    "prompt_tokens": t.prompt_tokens,
+                    "completion_tokens": t.completion_tokens,
+                    "cost": round(t.cost, 6),
+                    "runs_per_evaluation": per_evaluation(t.runs),
+                    "wall_s_per_evaluation": per_evaluation(t.wall_s),
+                    "cost_per_evaluation": per_evaluation(t.cost),
+                }
+                for (agent, model_id), t in sorted(self._totals.items())
+            }
+            total_cost = sum(t.cost for t in self._totals.values())
+            total_wall_s = sum(t.wall_s for t in self._totals.values())
+        return {
+            "routes": routes,
+            "evaluations": evaluations,
+            "cost_per_evaluation": per_evaluation(total_cost),
+            # Sum of the runs' wall times: model time, not end-to-end latency (runs overlap)
+            "model_s_per_evaluation": per_evaluation(total_wall_s),
+            "config": {
+                "default_model": self.default_model,
+                "routes": self.routes,
+                "escalation_model": self.escalation_model if self.escalation else None,
+                "gated_agents": sorted(self.gates),
+            },
+        }
+
+
+def router_from_env(default_model: str, escalation_model: Optional[str] = None, prices: str = "") -> ModelRouter:
+    """
+    Build the router from MODEL_ROUTES, MODEL_ESCALATION, MODEL_ESCALATE_TO and
+    MODEL_PRICES (`escalation_model` and `prices` are the app's defaults for the last two).
+    """
+    return ModelRouter(
+        default_model,
+        routes=parse_routes(os.getenv("MODEL_ROUTES", "")),
+        escalation_model=os.getenv("MODEL_ESCALATE_TO") or escalation_model,
+        escalation=os.getenv("MODEL_ESCALATION", "on").lower() not in ("0", "off", "false", "no"),
+        prices=parse_prices(os.getenv("MODEL_PRICES", prices)),
+    )
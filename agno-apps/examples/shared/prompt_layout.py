@@ -0,0 +1,107 @@
+"""
+Prompt Layout
+=============
+Builds each agent's system prompt as one static block, so every request an
+agent makes starts with byte-identical text and all per-teacher content
+comes after it (in the user message):
+
+    <instructions, one line each, exactly as written>
+
+    <optional reference material, e.g. the compact ISP Way>
+
+A repeated prefix is what llama.cpp / LM Studio reuse from the KV cache and
+what Gemini's implicit caching discounts, so the shared part of the prompt is
+only processed once. Passing the instructions as a single string also stops
+Agno from turning every line (blank lines and format templates included)
+into a "- " bullet.
+
+`compact_knowledge_base` renders the ISP Way JSON as a plain outline: no
+braces, quotes, keys or indentation, with every document string kept
+verbatim so it can still be quoted word for word.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import re
+
+_BLANK_RUNS = re.compile(r"\n{3,}")
+
+_compact_cache: Dict[str, Tuple[int, str]] = {}
+
+
+def render_instructions(lines: List[str]) -> str:
+    """Join instruction lines as written, without bullets or repeated blank lines."""
+    text = "\n".join(line.rstrip() for line in lines)
+    return _BLANK_RUNS.sub("\n\n", text).strip()
+
+
+def system_prompt(instructions: List[str], reference: Optional[str] = None, reference_title: str = "REFERENCE") -> str:
+    """Static system prompt: instructions first, then the reference material (if any)."""
+    prompt = render_instructions(instructions)
+    if reference:
+        prompt += f"\n\n{reference_title}:\n{reference.strip()}"
+    return prompt
+
+
+def _humanize(key: str) -> str:
+    return key.replace("_", " ").strip().capitalize()
+
+
+def _render_items(items: List[Any], indent: str = "") -> List[str]:
+    lines = []
+    for item in items:
+        if isinstance(item, dict):
+            if "point" in item:
+                lines.append(f"{indent}- {item['point']}")
+                lines += _render_items(item.get("details") or [], indent + "  ")
+            else:
+                lines += [f"{indent}- {_humanize(k)}: {v}" for k, v in item.items() if isinstance(v, str)]
+        else:
+            lines.append(f"{indent}- {item}")
+    return lines
+
+
+def _render_section(key: str, node: Any, level: int) -> List[str]:
+    heading = "#" * level
+    if isinstance(node, list):
+        return [f"{heading} {_humanize(key)}", *_render_items(node)]
+    if not isinstance(node, dict):
+        return [f"{_humanize(key)}: {node}"]
+
+    lines = [f"{heading} {node.get('title') or _humanize(key)}"]
+    if node.get("description"):
+        lines.append(node["description"])
+    for child_key, child in node.items():
+        if child_key in ("title", "description"):
+            continue
+        if child_key == "sections" and isinstance(child, dict):
+            for section_key, section in child.items():
+                lines += _render_section(section_key, section, level + 1)
+        elif isinstance(child, list) and all(isinstance(item, str) for item in child):
+            if len(" ".join(child)) < 60:
+                # Short word lists (e.g. learning principles) fit on one line
+                lines.append(f"{_humanize(child_key)}: " + ", ".join(child))
+            else:
+                lines += [f"{_humanize(child_key)}:", *_render_items(child)]
+        else:
+            lines += _render_section(child_key, child, level + 1)
+    return lines
+
+
+def compact_knowledge_base(document_path: Path) -> str:
+    """Outline rendering of the document's `knowledge_base`, recomputed only when the file changes."""
+    document_path = Path(document_path)
+    mtime_ns = os.stat(document_path).st_mtime_ns
+    cached = _compact_cache.get(str(document_path))
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+
+    document = json.loads(document_path.read_text(encoding="utf-8"))
+    lines = [f"# {document.get('document_title', 'Reference')}"]
+    for key, node in (document.get("knowledge_base") or {}).items():
+        lines += _render_section(key, node, 2)
+    text = "\n".join(lines)
+    _compact_cache[str(document_path)] = (mtime_ns, text)
+    return text
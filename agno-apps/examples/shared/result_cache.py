@@ -0,0 +1,215 @@
+"""
+Result Cache
+============
+Two-tier cache for pipeline and per-stage results.
+
+- An in-memory LRU tier answers repeated requests in the same process.
+- An optional SQLite tier keeps results across restarts and workers.
+
+Both tiers expire entries after a TTL. Expired SQLite rows are purged when
+the database is opened and every `purge_every` writes, which also trims the
+table to `max_disk_entries` rows (oldest first), so the file stays bounded
+even when keys are never read again. Keys combine the normalized input
+text with the model id, a hash of the agent instructions and the hash of the
+reference document, so changing any of them invalidates old results.
+Values must be JSON-serializable.
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+_WHITESPACE = re.compile(r"\s+")
+
+_document_hashes: Dict[str, Tuple[int, str]] = {}
+
+
+def normalize_text(text: str) -> str:
+    """Normalize unicode and whitespace so trivially different inputs share a key; case is kept."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def hash_parts(parts: Iterable[Any]) -> str:
+    """Stable SHA-256 hex digest of a sequence of values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def document_hash(path: Path) -> str:
+    """SHA-256 of a file's content, recomputed only when its mtime changes."""
+    path = Path(path)
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _document_hashes.get(str(path))
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    content_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+    _document_hashes[str(path)] = (mtime_ns, content_hash)
+    return content_hash
+
+
+def agent_fingerprint(agent: Any) -> Tuple[str, str]:
+    """Return (model id, instructions hash) for an agent."""
+    model_id = getattr(getattr(agent, "model", None), "id", "") or ""
+    instructions = getattr(agent, "instructions", None) or []
+    if isinstance(instructions, str):
+        instructions = [instructions]
+    return model_id, hash_parts([getattr(agent, "role", "") or "", *instructions])
+
+
+class ResultCache:
+    """LRU + optional SQLite cache with TTL and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 7 * 24 * 3600,
+        db_path: Optional[Path] = None,
+        max_disk_entries: int = 10000,
+        purge_every: int = 100,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.purge_every = max(1, purge_every)
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_purged": 0}
+        self._writes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)")
+            self._db.commit()
+            self.purge_expired()
+
+    @staticmethod
+    def make_key(
+        stage: str,
+        text: str,
+        model_id: str = "",
+        instructions_hash: str = "",
+        document_hash: str = "",
+    ) -> str:
+        """Build a cache key for one stage (or the whole pipeline)."""
+        return hash_parts([stage, model_id, instructions_hash, document_hash, normalize_text(text)])
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1]):
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value in both tiers."""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, value, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created_at),
+                )
+                self._db.commit()
+                self._writes += 1
+                if self._writes % self.purge_every == 0:
+                    self._purge_disk()
+
+    def _remember(self, key: str, value: Any, created_at: float) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from both tiers; returns the number of disk rows removed."""
+        with self._lock:
+            for key in [k for k, (created_at, _) in self._memory.items() if self._expired(created_at)]:
+                del self._memory[key]
+            return self._purge_disk()
+
+    def _purge_disk(self) -> int:
+        """Delete expired rows, then the oldest rows above `max_disk_entries` (caller holds the lock)."""
+        if self._db is None:
+            return 0
+        removed = 0
+        if self.ttl_seconds > 0:
+            removed += self._db.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+        if self.max_disk_entries > 0:
+            removed += self._db.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            ).rowcount
+        self._db.commit()
+        self._stats["disk_purged"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._db is not None,
+                "disk_entries": (
+                    self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if self._db is not None else 0
+                ),
+            }
+
+
+def cache_from_env(prefix: str = "RESULT_CACHE") -> ResultCache:
+    """
+    Build a cache from environment variables:
+    `{prefix}_SIZE` (LRU entries), `{prefix}_TTL` (seconds, 0 = no expiry),
+    `{prefix}_DB` (SQLite path; unset = memory only) and `{prefix}_DB_SIZE`
+    (SQLite rows kept, oldest dropped first; 0 = no cap).
+    """
+    return ResultCache(
+        max_entries=int(os.getenv(f"{prefix}_SIZE", "256")),
+        ttl_seconds=float(os.getenv(f"{prefix}_TTL", str(7 * 24 * 3600))),
+        db_path=os.getenv(f"{prefix}_DB") or None,
+        max_disk_entries=int(os.getenv(f"{prefix}_DB_SIZE", "10000")),
+    )
@@ -0,0 +1,201 @@
+"""
+Stage Metrics
+=============
+Per-agent-run instrumentation for the pipelines.
+
+Attach `stage_metrics.record_run` as a post-hook to every agent (and team
+leader). Each finished run is recorded with its wall time, time to first
+token (streamed runs), prompt and completion tokens, tool calls and model
+request retries, then:
+
+- written as one JSON line to the `stage_metrics` logger, and
+- added to per-agent totals, available as a dict (`summary()`) or in the
+  Prometheus text format (`prometheus()`).
+
+Failed runs skip post-hooks, so call sites report them with `record_failure`.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger("stage_metrics")
+
+# Upper bounds (seconds) of the wall-time histogram buckets
+WALL_TIME_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# RunOutput.metadata key that models increment when they retry a request
+RETRIES_KEY = "model_retries"
+
+
+@dataclass
+class StageRecord:
+    """One agent (or team leader) run."""
+    agent: str
+    status: str
+    wall_s: float
+    ttft_s: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tool_calls: int = 0
+    retries: int = 0
+    run_id: Optional[str] = None
+    parent_run_id: Optional[str] = None
+    session_id: Optional[str] = None
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class _AgentTotals:
+    runs: int = 0
+    errors: int = 0
+    wall_s: float = 0.0
+    ttft_s: float = 0.0
+    ttft_count: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tool_calls: int = 0
+    retries: int = 0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(WALL_TIME_BUCKETS))
+
+
+def count_retry(run_response: Any) -> None:
+    """Called by a model when it retries a request for this run."""
+    if run_response is None:
+        return
+    metadata = run_response.metadata if isinstance(getattr(run_response, "metadata", None), dict) else {}
+    metadata[RETRIES_KEY] = metadata.get(RETRIES_KEY, 0) + 1
+    run_response.metadata = metadata
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class StageMetrics:
+    """Collects StageRecords, logs them as JSON and keeps per-agent totals."""
+
+    def __init__(self, prefix: str = "teacher_eval"):
+        self.prefix = prefix
+        self._totals: Dict[str, _AgentTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, record: StageRecord) -> None:
+        logger.info(json.dumps({k: v for k, v in asdict(record).items() if v is not None}))
+        with self._lock:
+            totals = self._totals.setdefault(record.agent, _AgentTotals())
+            totals.runs += 1
+            totals.errors += record.status != "ok"
+            totals.wall_s += record.wall_s
+            if record.ttft_s is not None:
+                totals.ttft_s += record.ttft_s
+                totals.ttft_count += 1
+            totals.prompt_tokens += record.prompt_tokens
+            totals.completion_tokens += record.completion_tokens
+            totals.tool_calls += record.tool_calls
+            totals.retries += record.retries
+            for i, bound in enumerate(WALL_TIME_BUCKETS):
+                if record.wall_s <= bound:
+                    totals.buckets[i] += 1
+
+    def record_run(self, run_output: Any, agent: Any = None, team: Any = None) -> None:
+        """Post-hook: record a finished agent or team run."""
+        runner = agent if agent is not None else team
+        metrics = getattr(run_output, "metrics", None)
+        timer = getattr(metrics, "timer", None)
+        # Post-hooks run before the run's timer is stopped, so read it directly
+        wall_s = timer.elapsed if timer is not None else getattr(metrics, "duration", None) or 0.0
+        metadata = getattr(run_output, "metadata", None) or {}
+        ttft = getattr(metrics, "time_to_first_token", None)
+        self.record(StageRecord(
+            agent=getattr(runner, "name", None) or getattr(run_output, "agent_name", None) or "unknown",
+            status="ok",
+            wall_s=round(wall_s, 4),
+            ttft_s=round(ttft, 4) if ttft is not None else None,
+            prompt_tokens=getattr(metrics, "input_tokens", 0) or 0,
+            completion_tokens=getattr(metrics, "output_tokens", 0) or 0,
+            tool_calls=len(getattr(run_output, "tools", None) or []),
+            retries=metadata.get(RETRIES_KEY, 0),
+            run_id=getattr(run_output, "run_id", None),
+            parent_run_id=getattr(run_output, "parent_run_id", None),
+            session_id=getattr(run_output, "session_id", None),
+        ))
+
+    def record_failure(self, agent_name: str, wall_s: float, error: Any) -> None:
+        self.record(StageRecord(agent=agent_name, status="error", wall_s=round(wall_s, 4), error=str(error)[:500]))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-agent totals and averages."""
+        with self._lock:
+            return {
+                name: {
+                    "runs": t.runs,
+                    "errors": t.errors,
+                    "avg_wall_s": round(t.wall_s / t.runs, 3) if t.runs else 0.0,
+                    "avg_ttft_s": round(t.ttft_s / t.ttft_count, 3) if t.ttft_count else None,
+                    "prompt_tokens": t.prompt_tokens,
+                    "completion_tokens": t.completion_tokens,
+                    "tool_calls": t.tool_calls,
+                    "retries": t.retries,
+                }
+                for name, t in sorted(self._totals.items())
+            }
+
+    def prometheus(self) -> str:
+        """Totals in the Prometheus text exposition format."""
+        p = self.prefix
+        families = {
+            "agent_runs_total": ("counter", "Agent runs by outcome.", []),
+            "agent_run_seconds": ("histogram", "Wall time of agent runs.", []),
+            "agent_ttft_seconds": ("summary", "Time to first token of streamed agent runs.", []),
+            "agent_tokens_total": ("counter", "Prompt and completion tokens.", []),
+            "agent_tool_calls_total": ("counter", "Tool calls made by agent runs.", []),
+            "agent_retries_total": ("counter", "Model requests retried during agent runs.", []),
+        }
+        with self._lock:
+            for name, t in sorted(self._totals.items()):
+                agent = f'agent="{_label(name)}"'
+                runs = families["agent_runs_total"][2]
+                runs += [f'{{{agent},status="ok"}} {t.runs - t.errors}', f'{{{agent},status="error"}} {t.errors}']
+                wall = families["agent_run_seconds"][2]
+                wall += [
+                    f'_bucket{{{agent},le="{bound}"}} {count}' for bound, count in zip(WALL_TIME_BUCKETS, t.buckets)
+                ]
+                wall += [f'_bucket{{{agent},le="+Inf"}} {t.runs}', f"_sum{{{agent}}} {t.wall_s:.4f}",
+                         f"_count{{{agent}}} {t.runs}"]
+                families["agent_ttft_seconds"][2].extend(
+                    [f"_sum{{{agent}}} {t.ttft_s:.4f}", f"_count{{{agent}}} {t.ttft_count}"]
+                )
+                families["agent_tokens_total"][2].extend([
+                    f'{{{agent},kind="prompt"}} {t.prompt_tokens}',
+                    f'{{{agent},kind="completion"}} {t.completion_tokens}',
+                ])
+                families["agent_tool_calls_total"][2].append(f"{{{agent}}} {t.tool_calls}")
+                families["agent_retries_total"][2].append(f"{{{agent}}} {t.retries}")
+
+        lines = []
+        for family, (kind, help_text, samples) in families.items():
+            lines += [f"# HELP {p}_{family} {help_text}", f"# TYPE {p}_{family} {kind}"]
+            lines += [f"{p}_{family}{sample}" for sample in samples]
+        return "\n".join(lines) + "\n"
+
+
+def metrics_from_env(prefix: str = "STAGE_METRICS") -> StageMetrics:
+    """
+    Build the collector; `{prefix}_LOG` sends the JSON lines to a file path
+    or to "stderr" (unset = no log output, totals are still kept).
+    """
+    destination = os.getenv(f"{prefix}_LOG")
+    if destination and not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr) if destination == "stderr" else logging.FileHandler(destination)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return StageMetrics()
@@ -0,0 +1,230 @@
+"""
+Strategy Library
+================
+Reuses strategies generated for earlier evaluations when a growth area
+recurs ("teacher-led lessons", "summative-only assessment", ...), so the
+strategy generation (or web search) for it can be skipped.
+
+- Every stored entry is a growth-area text and the strategy produced for it.
+- Lookups rank entries by TF-IDF cosine similarity of the growth-area text
+  (an inverted index only scores entries sharing a term with the query).
+- A match is used only if its similarity is at least `threshold` and it is
+  younger than `max_age_seconds` (freshness policy); stale entries are
+  replaced by the next strategy generated for that growth area.
+- Stale entries are pruned when the library is loaded and on every add,
+  and the library keeps at most `max_entries` entries (oldest dropped
+  first), in memory and in the SQLite file alike.
+- Entries live in memory, plus an optional SQLite file so the library
+  grows across restarts and workers.
+
+Only strategies the caller has vetted should be added (e.g. well-formed,
+or with verified source URLs).
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or our that the their them they this
+    to we with all every what who how which while not no do does us area growth current practice gap
+    """.split()
+)
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [_stem(t) for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class LibraryEntry:
+    """A growth area and the vetted strategy generated for it."""
+    id: int
+    growth_area: str
+    strategy: str
+    created_at: float
+    terms: Counter
+    hits: int = 0
+
+
+@dataclass
+class LibraryMatch:
+    """A stored strategy returned for a new growth area."""
+    growth_area: str
+    strategy: str
+    similarity: float
+    age_seconds: float
+
+
+class StrategyLibrary:
+    """TF-IDF similarity index of growth areas to strategies, with threshold and freshness policy."""
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        max_age_seconds: float = 90 * 24 * 3600,
+        db_path: Optional[Path] = None,
+        enabled: bool = True,
+        max_entries: int = 1000,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[int, LibraryEntry] = {}
+        self._postings: Dict[str, set] = {}
+        self._next_id = 1
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "added": 0, "replaced": 0, "pruned": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS strategies ("
+                "id INTEGER PRIMARY KEY, growth_area TEXT NOT NULL, strategy TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            for row in self._db.execute("SELECT id, growth_area, strategy, created_at FROM strategies"):
+                self._index(LibraryEntry(row[0], row[1], row[2], row[3], Counter(tokenize(row[1]))))
+            self._prune()
+            self._db.commit()
+
+    def _index(self, entry: LibraryEntry) -> None:
+        self._entries[entry.id] = entry
+        for term in entry.terms:
+            self._postings.setdefault(term, set()).add(entry.id)
+        self._next_id = max(self._next_id, entry.id + 1)
+
+    def _unindex(self, entry: LibraryEntry) -> None:
+        del self._entries[entry.id]
+        for term in entry.terms:
+            ids = self._postings.get(term)
+            if ids is not None:
+                ids.discard(entry.id)
+                if not ids:
+                    del self._postings[term]
+
+    def _remove(self, entry: LibraryEntry) -> None:
+        self._unindex(entry)
+        if self._db is not None:
+            self._db.execute("DELETE FROM strategies WHERE id = ?", (entry.id,))
+
+    def _prune(self, room: int = 0) -> None:
+        """Drop stale entries, then the oldest ones until `room` more fit under `max_entries`."""
+        doomed = [entry for entry in self._entries.values() if not self._fresh(entry)]
+        if self.max_entries > 0:
+            fresh = sorted((entry for entry in self._entries.values() if self._fresh(entry)), key=lambda e: e.created_at)
+            doomed += fresh[: max(0, len(fresh) + room - self.max_entries)]
+        for entry in doomed:
+            self._remove(entry)
+        self._stats["pruned"] += len(doomed)
+
+    def _idf(self, term: str) -> float:
+        # Smoothed, so terms in every entry still count a little and one-entry libraries work
+        return math.log((1 + len(self._entries)) / (1 + len(self._postings.get(term, ())))) + 1
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        vector = {term: (1 + math.log(count)) * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def _best(self, terms: Counter) -> Tuple[Optional[LibraryEntry], float]:
+        """Most similar entry (any age) and its cosine similarity."""
+        query = self._vector(terms)
+        candidates = set().union(*(self._postings.get(term, set()) for term in query)) if query else set()
+        best, best_score = None, 0.0
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            vector = self._vector(entry.terms)
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > best_score or (score == best_score and best is not None and entry.created_at > best.created_at):
+                best, best_score = entry, score
+        return best, best_score
+
+    def _fresh(self, entry: LibraryEntry) -> bool:
+        return self.max_age_seconds <= 0 or time.time() - entry.created_at <= self.max_age_seconds
+
+    def lookup(self, growth_area: str) -> Optional[LibraryMatch]:
+        """Return a fresh stored strategy for a similar growth area, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry, score = self._best(Counter(tokenize(growth_area)))
+            if entry is None or score < self.threshold:
+                self._stats["misses"] += 1
+                return None
+            if not self._fresh(entry):
+                self._stats["stale"] += 1
+                return None
+            entry.hits += 1
+            self._stats["hits"] += 1
+            return LibraryMatch(entry.growth_area, entry.strategy, round(score, 3), time.time() - entry.created_at)
+
+    def add(self, growth_area: str, strategy: str) -> None:
+        """Store a vetted strategy; it replaces an entry for the same (similar) growth area."""
+        terms = Counter(tokenize(growth_area))
+        if not self.enabled or not terms or not strategy.strip():
+            return
+        created_at = time.time()
+        with self._lock:
+            existing, score = self._best(terms)
+            if existing is not None and score >= self.threshold:
+                self._remove(existing)
+                self._stats["replaced"] += 1
+            self._prune(room=1)
+            entry = LibraryEntry(self._next_id, growth_area, strategy, created_at, terms)
+            self._index(entry)
+            self._stats["added"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO strategies (id, growth_area, strategy, created_at) VALUES (?, ?, ?, ?)",
+                    (entry.id, growth_area, strategy, created_at),
+                )
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"] + self._stats["stale"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "enabled": self.enabled,
+                "disk_enabled": self._db is not None,
+            }
+
+
+def library_from_env(prefix: str = "STRATEGY_LIBRARY") -> StrategyLibrary:
+    """
+    Build the library from environment variables: `{prefix}` ("off" disables it),
+    `{prefix}_THRESHOLD` (cosine similarity, 0-1), `{prefix}_MAX_AGE` (seconds,
+    0 = never stale), `{prefix}_SIZE` (entries kept, oldest dropped first;
+    0 = no cap) and `{prefix}_DB` (SQLite path; unset = memory only).
+    """
+    return StrategyLibrary(
+        threshold=float(os.getenv(f"{prefix}_THRESHOLD", "0.6")),
+        max_age_seconds=float(os.getenv(f"{prefix}_MAX_AGE", str(90 * 24 * 3600))),
+        db_path=os.getenv(f"{prefix}_DB") or None,
+        max_entries=int(os.getenv(f"{prefix}_SIZE", "1000")),
+        enabled=os.getenv(prefix, "on").lower() not in ("0", "off", "false", "no"),
+    )
@@ -5,245 +5,890 @@ A beautiful web interface optimized for smaller local LMStudio models.
 Uses simpler output format instead of complex structured schemas.
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from dataclasses import replace
 from pathlib import Path
-import gradio as gr
-
-from agno.agent import Agent
-from agno.models.lmstudio import LMStudio
-from agno.tools.file import FileTools
-from agno.workflow import Workflow
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Iterator, List, NamedTuple, Optional, Tuple
+import os
+import queue
+import sys
+import threading
+import time
+
+# The modules shared by both apps live in ../shared
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from input_chunking import estimate_tokens, split_into_chunks, truncate_to_budget
+from isp_way_index import IspWayIndex
+from markdown_render import IncrementalMarkdownRenderer, render_markdown
+from shared.model_routing import router_from_env
+from shared.prompt_layout import compact_knowledge_base, system_prompt
+from quote_verifier import QuoteVerifier
+from report_assembly import assemble_report, build_digest, extract_teacher_name
+from report_parsing import (
+    GrowthAreaParser, growth_area_summary, has_bullets, has_sections, is_complete_analysis, is_complete_strategy,
+    merge_strategies, split_growth_areas,
+)
+from request_queue import QueueFull, RequestQueue
+from shared.result_cache import agent_fingerprint, cache_from_env, document_hash, hash_parts
+from shared.stage_metrics import metrics_from_env
+from shared.strategy_library import library_from_env
+
+# Gradio, Agno and the OpenAI client take seconds to import: Gradio is imported when the
+# UI is built, Agno when the agents are (see build_agents), so importing this module
+# (batch runs, benchmarks) stays fast and the UI can listen before the agents are ready
+if TYPE_CHECKING:
+    import gradio as gr
+    from agno.agent import Agent
+    from agno.run.base import RunContext
+    from agno.workflow import Workflow
+    from agno.workflow.types import StepInput, StepOutput
+    from model_warmup import ModelWarmer, Prefix
+
+# Start of the process's import of this module, for the uptime reported by /ready
+_module_loaded = time.perf_counter()
 
 # Path to the ISP Way document (relative to this file)
 ISP_WAY_DOCUMENT = Path(__file__).parent / "ISP_Way.txt"
 
+# Maximum number of growth areas sent to the strategy developer at the same time.
+# LM Studio only serves them in parallel if "Max Concurrent Predictions" is > 1.
+STRATEGY_CONCURRENCY = max(1, int(os.getenv("STRATEGY_CONCURRENCY", "3")))
+
+# Long evaluations (full observation transcripts, multi-visit notes) are analysed map-reduce style
+# instead of in one prompt. ANALYST_INPUT_TOKENS is the hard budget (estimated tokens) for evaluation
+# text in any one prompt: longer evaluations are split into chunks of that size, the Observation
+# Extractor lists the observations of each chunk (CHUNK_CONCURRENCY at a time, at most
+# OBSERVATION_MAX_TOKENS each), and the notes are merged in groups of that size until they fit the
+# analyst's prompt. 0 sends every evaluation to the analyst as it is. Only the evaluation text is
+# capped: later prompts carry the analyst's output (one growth area per strategy run; the whole
+# analysis and all strategies for REPORT_ASSEMBLY=model), which grows with the number of growth areas.
+ANALYST_INPUT_TOKENS = int(os.getenv("ANALYST_INPUT_TOKENS", "3000"))
+CHUNK_CONCURRENCY = max(1, int(os.getenv("CHUNK_CONCURRENCY", "3")))
+OBSERVATION_MAX_TOKENS = int(os.getenv("OBSERVATION_MAX_TOKENS", "400"))
+
+# Start each growth area's strategy as soon as its block is complete in the analyst's stream,
+# while the analyst is still writing the next one ("off": wait for the whole analysis first).
+# Overlap needs the same parallel predictions in LM Studio as STRATEGY_CONCURRENCY.
+STAGE_OVERLAP = os.getenv("STAGE_OVERLAP", "on").lower() not in ("0", "off", "false", "no")
+
+# How the final report is put together:
+#   "template" - growth areas and strategies are spliced in by code; the model only
+#                writes the Summary and Priority Actions (fast, quotes kept verbatim)
+#   "llm"      - the Report Writer copies everything into the report itself
+REPORT_ASSEMBLY = os.getenv("REPORT_ASSEMBLY", "template")
+
+# Model of every agent without a route in MODEL_ROUTES, and the one failed stages escalate to
+DEFAULT_MODEL = "openai/gpt-oss-20b"
+
+# LM Studio servers with the model loaded, comma-separated. Requests go to the least busy
+# healthy server; one that fails is taken out of rotation until its health check passes.
+LMSTUDIO_BASE_URLS = [
+    url.strip() for url in os.getenv("LMSTUDIO_BASE_URLS", "http://localhost:1234/v1").split(",") if url.strip()
+]
+
+# Where the analyst gets the ISP Way from:
+#   "search" - the search_isp_way tool returns only the relevant passages (smallest prompts)
+#   "prefix" - a compact rendering of the whole document is part of the analyst's static
+#              system prompt: no tool round trips, and LM Studio reuses its KV cache
+ISP_WAY_CONTEXT = os.getenv("ISP_WAY_CONTEXT", "search")
+
+# Background model warm-up (see model_warmup.py): a priming request and the agents' prompt prefixes
+# when the server starts, then a one-token ping whenever an LM Studio server has been idle for
+# MODEL_KEEP_ALIVE seconds (keep it below the model's idle TTL in LM Studio; 0 turns pings off).
+# MODEL_WARMUP=off leaves loading the model to the first report.
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "on").lower() not in ("0", "off", "false", "no")
+MODEL_KEEP_ALIVE = float(os.getenv("MODEL_KEEP_ALIVE", "240"))
+
+# Request queue in front of the pipeline (see request_queue.py):
+#   QUEUE_SLOTS       - reports generated at the same time (default: one per LM Studio server)
+#   QUEUE_MAX_WAITING - requests allowed to wait; more are turned away
+#   QUEUE_PER_USER    - reports one user can have running at the same time
+QUEUE_SLOTS = int(os.getenv("QUEUE_SLOTS", str(len(LMSTUDIO_BASE_URLS))))
+QUEUE_MAX_WAITING = int(os.getenv("QUEUE_MAX_WAITING", "20"))
+QUEUE_PER_USER = int(os.getenv("QUEUE_PER_USER", "1"))
+
+# Minimum seconds between re-renders of the streamed report in the UI
+STREAM_RENDER_INTERVAL = 0.1
+
+# Interactive (UI) requests are served ahead of batch (workflow) runs
+request_queue = RequestQueue(QUEUE_SLOTS, QUEUE_MAX_WAITING, QUEUE_PER_USER)
+
+# Cache of whole-pipeline and per-stage results (see result_cache.py for the RESULT_CACHE_* settings)
+result_cache = cache_from_env()
+
+# Per-agent-run wall time, TTFT, tokens, tool calls and retries (STAGE_METRICS_LOG for JSON lines)
+stage_metrics = metrics_from_env()
+
+# Strategies of earlier reports, reused for similar growth areas (see strategy_library.py for STRATEGY_LIBRARY_*)
+strategy_library = library_from_env()
+
+# Per-agent models, quality gates and per-route cost and latency (see model_routing.py for MODEL_ROUTES,
+# MODEL_ESCALATION, MODEL_ESCALATE_TO and MODEL_PRICES). E.g. to run the extraction and the summary on a
+# small model: MODEL_ROUTES="Observation Extractor=qwen/qwen3-4b,Summary Writer=qwen/qwen3-4b"
+model_router = router_from_env(DEFAULT_MODEL)
+
+# Output checks per agent: a stage on a routed model that fails its check is re-run on the default model
+model_router.add_gate("Observation Extractor", has_bullets)
+model_router.add_gate("ISP Way Document Analyst", is_complete_analysis)
+model_router.add_gate("Strategy Developer", is_complete_strategy)
+model_router.add_gate("Summary Writer", lambda text: has_sections(text, "Summary", "Priority Actions"))
+model_router.add_gate(
+    "Report Writer", lambda text: has_sections(text, "Growth Areas & ISP Way Alignment", "Recommended Strategies")
+)
+
+# Section-level search index over the ISP Way knowledge base (rebuilt if the file changes)
+isp_way_index = IspWayIndex(ISP_WAY_DOCUMENT)
+
+# Checks the analyst's quotes against the document (BM25 fallback for quotes with no overlap)
+quote_verifier = QuoteVerifier(ISP_WAY_DOCUMENT, isp_way_index)
+
+
+def search_isp_way(query: str, top_k: int = 6) -> str:
+    """Search the ISP Way document for the passages most relevant to a query.
+
+    Args:
+        query (str): Short description of a teaching practice, e.g. "teacher-led lessons, little student interaction".
+        top_k (int): Maximum number of passages to return.
+
+    Returns:
+        str: One line per passage: the JSON path followed by the exact quoted text.
+    """
+    return isp_way_index.format_results(isp_way_index.search(query, top_k))
+
 # =============================================================================
 # MODEL AND AGENT DEFINITIONS
 # =============================================================================
 
-# Configure LMStudio model
-lmstudio_model = LMStudio(
-    id="openai/gpt-oss-20b",
-    base_url="http://localhost:1234/v1"
-)
+# Built once, on first use or in the background when the server starts (see warm_up)
+_agents_lock = threading.Lock()
+_agents_ready = threading.Event()
+_agents_build_seconds: Optional[float] = None
 
-# Agent 1: ISP Way Document Analyst
-isp_way_analyst = Agent(
-    name="ISP Way Document Analyst",
-    model=lmstudio_model,
-    role="Analyzes teacher evaluations against the ISP Way document.",
-    tools=[FileTools(base_dir=Path(__file__).parent)],
-    instructions=[
-        f"CRITICAL: You MUST read the ISP Way document at: {ISP_WAY_DOCUMENT}",
-        "",
-        "STEP 1: Use the read_file tool to read ISP_Way.txt",
-        "STEP 2: Analyze the teacher evaluation against what you read",
-        "STEP 3: Identify 2-3 growth areas where current practice differs from ISP Way",
-        "",
-        "For EACH growth area, you MUST:",
-        "1. State the growth area clearly",
-        "2. Find and copy an EXACT quote from the ISP Way document (word-for-word)",
-        "3. Explain how the teacher's current practice differs from this quote",
-        "",
-        "REQUIRED FORMAT (follow exactly):",
-        "## Growth Area 1: [Specific Area Name]",
-        "**ISP Way Quote:** \"[Copy exact words from document - do NOT paraphrase]\"",
-        "**Current Practice:** [What the teacher is doing now]",
-        "**Gap:** [How current practice differs from the ISP Way quote]",
-        "",
-        "## Growth Area 2: [Specific Area Name]",
-        "**ISP Way Quote:** \"[Copy exact words from document]\"",
-        "**Current Practice:** [What the teacher is doing now]",
-        "**Gap:** [How current practice differs from the ISP Way quote]",
-        "",
-        "IMPORTANT: The quotes MUST be actual text from ISP_Way.txt, not your own words.",
-    ],
-    markdown=True,
-)
+# Started by warm_up() once the agents are built (None until then, or with MODEL_WARMUP=off)
+model_warmer: Optional["ModelWarmer"] = None
+_warm_up_thread: Optional[threading.Thread] = None
+_warm_up_lock = threading.Lock()
 
-# Agent 2: Strategy Developer
-strategy_developer = Agent(
-    name="Strategy Developer",
-    model=lmstudio_model,
-    role="Develops practical teaching strategies.",
-    instructions=[
-        "Based on the growth areas provided, develop 2-3 SPECIFIC teaching strategies.",
-        "",
-        "For EACH strategy, you MUST provide:",
-        "1. A clear, descriptive name",
-        "2. A 2-3 sentence description of what it is",
-        "3. 4-5 implementation steps - each step MUST include a concrete classroom example",
-        "4. 2-3 specific benefits for student learning",
-        "",
-        "REQUIRED FORMAT (follow exactly):",
-        "## Strategy 1: [Descriptive Strategy Name]",
-        "",
-        "**What it is:**",
-        "[2-3 sentences describing the strategy]",
-        "",
-        "**How to implement:**",
-        "",
-        "**Step 1:** [Action to take]",
-        "*Example:* [Specific classroom example - be concrete!]",
-        "",
-        "**Step 2:** [Action to take]",
-        "*Example:* [Specific classroom example]",
-        "",
-        "**Step 3:** [Action to take]",
-        "*Example:* [Specific classroom example]",
-        "",
-        "**Step 4:** [Action to take]",
-        "*Example:* [Specific classroom example]",
-        "",
-        "**Benefits:**",
-        "- [Specific benefit 1]",
-        "- [Specific benefit 2]",
-        "- [Specific benefit 3]",
-        "",
-        "---",
-        "",
-        "IMPORTANT: Examples must be CONCRETE and SPECIFIC to the classroom context.",
-        "Focus on: UDL principles, active learning, student collaboration, formative assessment, differentiation",
-    ],
-    markdown=True,
+# Names defined by build_agents(); reading one from the module builds them (see __getattr__)
+LAZY_NAMES = (
+    "lmstudio_pool", "lmstudio_model", "observation_model", "observation_extractor", "isp_way_analyst",
+    "strategy_developer", "report_writer", "summary_writer", "teacher_evaluation_workflow",
 )
 
-# Agent 3: Report Writer
-report_writer = Agent(
-    name="Report Writer",
-    model=lmstudio_model,
-    role="Creates a comprehensive professional development report.",
-    instructions=[
-        "You will receive:",
-        "1. ISP Way analysis with growth areas and EXACT QUOTES",
-        "2. Teaching strategies with detailed implementation steps and examples",
-        "",
-        "Your job: Combine them into ONE complete report.",
-        "",
-        "REQUIRED FORMAT (follow exactly):",
-        "",
-        "# Professional Development Report",
-        "**For [Teacher Name]**",
-        "",
-        "## Summary",
-        "[Write 2-3 sentences summarizing the key findings]",
-        "",
-        "---",
-        "",
-        "## Growth Areas & ISP Way Alignment",
-        "",
-        "[Copy ALL growth areas from the analyst - include the ISP Way quotes!]",
-        "",
-        "---",
-        "",
-        "## Recommended Strategies",
-        "",
-        "[Copy ALL strategies from the developer - include all steps and examples!]",
-        "",
-        "---",
-        "",
-        "## Priority Actions",
-        "",
-        "1. **[First action]** - [Why this is most important]",
-        "2. **[Second action]** - [Why this comes next]",
-        "3. **[Third action]** - [Why this is third priority]",
-        "",
-        "---",
-        "",
-        "*This plan aligns with ISP Way principles and provides actionable steps for professional growth.*",
-        "",
-        "CRITICAL:",
-        "- Copy the EXACT ISP Way quotes from the analyst (do NOT rewrite them)",
-        "- Include ALL implementation steps and examples from the strategies",
-        "- Maintain supportive, growth-oriented tone",
-        "- Do NOT summarize or shorten the content - include everything!",
-    ],
-    markdown=True,
-)
+
+def build_agents() -> None:
+    """Import Agno and the model client, and construct the model, agents and workflow (once)."""
+    global _agents_build_seconds
+    if _agents_ready.is_set():
+        return
+    with _agents_lock:
+        if _agents_ready.is_set():
+            return
+        started = time.perf_counter()
+        _construct_agents()
+        _agents_build_seconds = time.perf_counter() - started
+        _agents_ready.set()
+
+
+def _construct_agents() -> None:
+    global lmstudio_pool, lmstudio_model, observation_model, observation_extractor, isp_way_analyst
+    global strategy_developer, report_writer, summary_writer, teacher_evaluation_workflow
+    from agno.agent import Agent
+    from agno.workflow import Step, Workflow
+    from model_pool import EndpointPool, PooledLMStudio
+
+    # Configure LMStudio model (load-balanced over LMSTUDIO_BASE_URLS)
+    lmstudio_pool = EndpointPool(LMSTUDIO_BASE_URLS)
+    lmstudio_model = PooledLMStudio(
+        id=DEFAULT_MODEL,
+        base_url=LMSTUDIO_BASE_URLS[0],
+        pool=lmstudio_pool,
+    )
+
+    # Same server pool, with the output capped so merged observation notes stay within budget
+    observation_model = PooledLMStudio(
+        id=lmstudio_model.id,
+        base_url=LMSTUDIO_BASE_URLS[0],
+        pool=lmstudio_pool,
+        max_tokens=OBSERVATION_MAX_TOKENS,
+    )
+
+    def routed(agent_name: str, model: PooledLMStudio) -> PooledLMStudio:
+        """`model`, or a copy on the model MODEL_ROUTES gives this agent (same server pool and settings)."""
+        model_id = model_router.model_for(agent_name)
+        return model if model_id == model.id else replace(model, id=model_id)
+
+    # Agent 0 (long evaluations only): Observation Extractor
+    # Condenses each part of a long evaluation, and then the notes of several parts, into observations
+    observation_extractor = Agent(
+        name="Observation Extractor",
+        model=routed("Observation Extractor", observation_model),
+        role="Extracts observations of teaching practice from long evaluations.",
+        instructions=system_prompt([
+            "You will receive one part of a long teacher evaluation (an observation transcript or visit notes),",
+            "or observation notes already extracted from several parts of the same evaluation.",
+            "",
+            "List what it shows about the teacher's practice as short bullet points:",
+            "- One bullet per observation: what the teacher or the students did, with brief evidence from the text",
+            "- Include strengths and concerns; merge repeated observations into one bullet",
+            "- Skip small talk, logistics and anything not about teaching and learning",
+            "- Do NOT suggest strategies and do NOT judge against any standard",
+            "",
+            "REQUIRED FORMAT (follow exactly):",
+            "- [Observation] (evidence: [short quote or detail])",
+        ]),
+        markdown=True,
+        post_hooks=[stage_metrics.record_run, model_router.record_run],
+    )
+
+    # Agent 1: ISP Way Document Analyst
+    # The ISP Way passages come either from the search tool or from the compact
+    # document placed in the static system prompt (ISP_WAY_CONTEXT=prefix)
+    if ISP_WAY_CONTEXT == "prefix":
+        analyst_tools = []
+        analyst_reference = compact_knowledge_base(ISP_WAY_DOCUMENT)
+        quote_source = "the ISP Way reference below"
+        analyst_steps = ["STEP 1: Find the statements in the ISP Way reference below that relate to each concern in the evaluation"]
+    else:
+        analyst_tools = [search_isp_way]
+        analyst_reference = None
+        quote_source = "the passages returned by search_isp_way"
+        analyst_steps = [
+            "STEP 1: Use the search_isp_way tool with short queries describing the practices in the evaluation",
+            "        (one query per concern, at most 4 queries)",
+        ]
+
+    isp_way_analyst = Agent(
+        name="ISP Way Document Analyst",
+        model=routed("ISP Way Document Analyst", lmstudio_model),
+        role="Analyzes teacher evaluations against the ISP Way document.",
+        tools=analyst_tools,
+        instructions=system_prompt(
+            [
+                "CRITICAL: You MUST ground every growth area in the ISP Way document.",
+                "",
+                *analyst_steps,
+                "STEP 2: Analyze the teacher evaluation against those passages",
+                "STEP 3: Identify 2-3 growth areas where current practice differs from ISP Way",
+                "",
+                "For EACH growth area, you MUST:",
+                "1. State the growth area clearly",
+                f"2. Copy an EXACT quote from {quote_source} (word-for-word)",
+                "3. Explain how the teacher's current practice differs from this quote",
+                "",
+                "REQUIRED FORMAT (follow exactly):",
+                "## Growth Area 1: [Specific Area Name]",
+                "**ISP Way Quote:** \"[Copy exact words from document - do NOT paraphrase]\"",
+                "**Current Practice:** [What the teacher is doing now]",
+                "**Gap:** [How current practice differs from the ISP Way quote]",
+                "",
+                "## Growth Area 2: [Specific Area Name]",
+                "**ISP Way Quote:** \"[Copy exact words from document]\"",
+                "**Current Practice:** [What the teacher is doing now]",
+                "**Gap:** [How current practice differs from the ISP Way quote]",
+                "",
+                f"IMPORTANT: The quotes MUST be actual text from {quote_source}, not your own words.",
+            ],
+            reference=analyst_reference,
+            reference_title="ISP WAY REFERENCE",
+        ),
+        markdown=True,
+        post_hooks=[stage_metrics.record_run, model_router.record_run],
+    )
+
+    # Agent 2: Strategy Developer
+    strategy_developer = Agent(
+        name="Strategy Developer",
+        model=routed("Strategy Developer", lmstudio_model),
+        role="Develops practical teaching strategies.",
+        instructions=system_prompt([
+            "Develop ONE SPECIFIC teaching strategy for each growth area provided.",
+            "",
+            "For EACH strategy, you MUST provide:",
+            "1. A clear, descriptive name",
+            "2. A 2-3 sentence description of what it is",
+            "3. 4-5 implementation steps - each step MUST include a concrete classroom example",
+            "4. 2-3 specific benefits for student learning",
+            "",
+            "REQUIRED FORMAT (follow exactly):",
+            "## Strategy 1: [Descriptive Strategy Name]",
+            "",
+            "**What it is:**",
+            "[2-3 sentences describing the strategy]",
+            "",
+            "**How to implement:**",
+            "",
+            "**Step 1:** [Action to take]",
+            "*Example:* [Specific classroom example - be concrete!]",
+            "",
+            "**Step 2:** [Action to take]",
+            "*Example:* [Specific classroom example]",
+            "",
+            "**Step 3:** [Action to take]",
+            "*Example:* [Specific classroom example]",
+            "",
+            "**Step 4:** [Action to take]",
+            "*Example:* [Specific classroom example]",
+            "",
+            "**Benefits:**",
+            "- [Specific benefit 1]",
+            "- [Specific benefit 2]",
+            "- [Specific benefit 3]",
+            "",
+            "---",
+            "",
+            "IMPORTANT: Examples must be CONCRETE and SPECIFIC to the classroom context.",
+            "Focus on: UDL principles, active learning, student collaboration, formative assessment, differentiation",
+        ]),
+        markdown=True,
+        post_hooks=[stage_metrics.record_run, model_router.record_run],
+    )
+
+    # Agent 3 (LLM assembly): Report Writer
+    report_writer = Agent(
+        name="Report Writer",
+        model=routed("Report Writer", lmstudio_model),
+        role="Creates a comprehensive professional development report.",
+        instructions=system_prompt([
+            "You will receive:",
+            "1. ISP Way analysis with growth areas and EXACT QUOTES",
+            "2. Teaching strategies with detailed implementation steps and examples",
+            "",
+            "Your job: Combine them into ONE complete report.",
+            "",
+            "REQUIRED FORMAT (follow exactly):",
+            "",
+            "# Professional Development Report",
+            "**For [Teacher Name]**",
+            "",
+            "## Summary",
+            "[Write 2-3 sentences summarizing the key findings]",
+            "",
+            "---",
+            "",
+            "## Growth Areas & ISP Way Alignment",
+            "",
+            "[Copy ALL growth areas from the analyst - include the ISP Way quotes!]",
+            "",
+            "---",
+            "",
+            "## Recommended Strategies",
+            "",
+            "[Copy ALL strategies from the developer - include all steps and examples!]",
+            "",
+            "---",
+            "",
+            "## Priority Actions",
+            "",
+            "1. **[First action]** - [Why this is most important]",
+            "2. **[Second action]** - [Why this comes next]",
+            "3. **[Third action]** - [Why this is third priority]",
+            "",
+            "---",
+            "",
+            "*This plan aligns with ISP Way principles and provides actionable steps for professional growth.*",
+            "",
+            "CRITICAL:",
+            "- Copy the EXACT ISP Way quotes from the analyst (do NOT rewrite them)",
+            "- Include ALL implementation steps and examples from the strategies",
+            "- Maintain supportive, growth-oriented tone",
+            "- Do NOT summarize or shorten the content - include everything!",
+        ]),
+        markdown=True,
+        post_hooks=[stage_metrics.record_run, model_router.record_run],
+    )
+
+    # Agent 3 (template assembly): Summary Writer
+    # Only writes the sections that need new text; everything else is spliced in by code
+    summary_writer = Agent(
+        name="Summary Writer",
+        model=routed("Summary Writer", lmstudio_model),
+        role="Writes the summary and priority actions of a professional development report.",
+        instructions=system_prompt([
+            "You will receive a short digest of a teacher's growth areas and the strategies chosen for them.",
+            "Write ONLY the two sections below - do not repeat the growth areas or strategies.",
+            "",
+            "REQUIRED FORMAT (follow exactly):",
+            "",
+            "## Summary",
+            "[Write 2-3 sentences summarizing the key findings]",
+            "",
+            "## Priority Actions",
+            "",
+            "1. **[First action]** - [Why this is most important]",
+            "2. **[Second action]** - [Why this comes next]",
+            "3. **[Third action]** - [Why this is third priority]",
+            "",
+            "Maintain a supportive, growth-oriented tone.",
+        ]),
+        markdown=True,
+        post_hooks=[stage_metrics.record_run, model_router.record_run],
+    )
+
+    teacher_evaluation_workflow = Workflow(
+        name="Teacher Evaluation Workflow (LMStudio)",
+        description="Analyzes teacher evaluations and generates professional development recommendations",
+        steps=[Step(name="Generate Report", executor=workflow_steps)],
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # Module attribute access (app.isp_way_analyst from scripts) builds the agents on first use,
+    # and app.demo (Gradio's reload mode, `gradio app.py`) the interface
+    if name in LAZY_NAMES:
+        build_agents()
+        return globals()[name]
+    if name == "demo":
+        globals()["demo"] = build_ui()
+        warm_up()
+        return globals()["demo"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # =============================================================================
 # WORKFLOW
 # =============================================================================
 
-def workflow_steps(workflow: Workflow, execution_input):
-    """Sequential workflow: Analyst -> Developer -> Writer"""
+class PipelineUpdate(NamedTuple):
+    """Snapshot of the report while the pipeline is running."""
+    stage: str
+    progress: float
+    markdown: str
+    step: str = "complete"  # "observations", "analysis", "strategies", "report" or "complete"
 
-    from agno.workflow.types import WorkflowExecutionInput
-    if isinstance(execution_input, WorkflowExecutionInput):
-        user_input = execution_input.get_input_as_string()
-    else:
-        user_input = str(execution_input)
 
-    # Step 1: ISP Way Analysis
-    analyst_result = isp_way_analyst.run(user_input)
-    analyst_output = analyst_result.content if hasattr(analyst_result, 'content') else str(analyst_result)
+def stream_stage(agent: "Agent", message: str) -> Iterator[str]:
+    """Stream one agent's content deltas, replaying a cached result for the same input."""
+    from agno.run.agent import RunEvent
+
+    model_id, instructions_hash = agent_fingerprint(agent)
+    key = result_cache.make_key(agent.name, message, model_id, instructions_hash, document_hash(ISP_WAY_DOCUMENT))
+    cached = result_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
 
-    # Step 2: Strategy Development
-    developer_result = strategy_developer.run(
-        f"Based on this ISP Way analysis, develop practical strategies:\n\n{analyst_output}"
+    chunks = []
+    started = time.perf_counter()
+    run = agent.run(message, stream=True)
+    try:
+        for event in run:
+            if event.event == RunEvent.run_error:
+                # Surface the failure instead of caching it or passing it to the next stage
+                stage_metrics.record_failure(agent.name, time.perf_counter() - started, event.content)
+                raise RuntimeError(f"{agent.name} failed: {event.content}")
+            if event.event == RunEvent.run_content and isinstance(event.content, str):
+                chunks.append(event.content)
+                yield event.content
+    finally:
+        # If the consumer stopped early, this aborts the streaming model request
+        run.close()
+    result_cache.set(key, "".join(chunks))
+
+
+def escalated(agent: "Agent") -> "Agent":
+    """Copy of an agent on the escalation model (same server pool and output cap)."""
+    return agent.deep_copy(update={"model": replace(agent.model, id=model_router.escalation_model)})
+
+
+def stream_gated(agent: "Agent", message: str) -> Iterator[Optional[str]]:
+    """
+    `stream_stage` with the agent's quality gate: if the output of a routed model fails
+    it, yields None (discard what was streamed) and streams the stage again on the
+    escalation model.
+    """
+    chunks = []
+    for delta in stream_stage(agent, message):
+        chunks.append(delta)
+        yield delta
+    if model_router.needs_escalation(agent.name, agent.model.id, "".join(chunks)):
+        yield None
+        yield from stream_stage(escalated(agent), message)
+
+
+class StrategyRuns:
+    """
+    Strategy developer runs, one per growth area, started as growth areas are
+    submitted (up to STRATEGY_CONCURRENCY at a time) and reusing library
+    strategies for growth areas similar to earlier ones.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = max(1, concurrency or STRATEGY_CONCURRENCY)
+        self.buffers: List[str] = []
+        self.completed = 0
+        # (index, event, value): "delta" (text), "restart" (escalated: drop the text so far), "done" or "error"
+        self._updates: "queue.Queue[Tuple[int, str, Any]]" = queue.Queue()
+        self._cancelled = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    @property
+    def submitted(self) -> int:
+        return len(self.buffers)
+
+    @property
+    def done(self) -> bool:
+        return self.completed == self.submitted
+
+    def submit(self, growth_area: str) -> None:
+        self.buffers.append("")
+        self._pool.submit(self._develop, self.submitted - 1, growth_area)
+
+    def _develop(self, index: int, growth_area: str) -> None:
+        # Each concurrent run gets its own agent copy so run state is not shared
+        developer = strategy_developer.deep_copy() if self.concurrency > 1 else strategy_developer
+        message = f"Based on this ISP Way growth area, develop a practical strategy:\n\n{growth_area}"
+        summary = growth_area_summary(growth_area)
+        try:
+            match = strategy_library.lookup(summary)
+            if match is not None:
+                # A strategy developed earlier for a similar growth area: no model call
+                self._updates.put((index, "delta", match.strategy))
+                self._updates.put((index, "done", None))
+                return
+            chunks = []
+            for delta in stream_gated(developer, message):
+                if self._cancelled.is_set():
+                    return  # Leaving the loop closes the stage and its model request
+                if delta is None:
+                    chunks = []
+                    self._updates.put((index, "restart", None))
+                    continue
+                chunks.append(delta)
+                self._updates.put((index, "delta", delta))
+            strategy = "".join(chunks)
+            if is_complete_strategy(strategy):
+                strategy_library.add(summary, strategy)
+            self._updates.put((index, "done", None))
+        except BaseException as e:
+            self._updates.put((index, "error", e))
+
+    def poll(self, timeout: Optional[float] = 0) -> bool:
+        """
+        Apply the updates of the running strategies to `buffers`, waiting up to
+        `timeout` seconds (None: until one arrives) if there are none yet.
+        Returns True if anything changed; raises the first error of a run.
+        """
+        changed = False
+        try:
+            update = self._updates.get(timeout=timeout) if timeout != 0 else self._updates.get_nowait()
+            while True:
+                index, event, value = update
+                if event == "error":
+                    raise value
+                if event == "done":
+                    self.completed += 1
+                elif event == "restart":
+                    self.buffers[index] = ""
+                else:
+                    self.buffers[index] += value
+                changed = True
+                update = self._updates.get_nowait()
+        except queue.Empty:
+            return changed
+
+    def close(self) -> None:
+        # On an error or an abandoned report, stop the other growth areas instead of finishing them
+        self._cancelled.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_strategies(growth_areas: List[str]) -> Iterator[Tuple[List[str], int]]:
+    """
+    Run the strategy developer once per growth area, concurrently.
+    Yields the partial strategy text of every area (in order) and the number of finished areas.
+    """
+
+    runs = StrategyRuns(min(STRATEGY_CONCURRENCY, len(growth_areas)))
+    try:
+        for growth_area in growth_areas:
+            runs.submit(growth_area)
+        while not runs.done:
+            runs.poll(timeout=None)
+            yield runs.buffers, runs.completed
+    finally:
+        runs.close()
+
+
+def pipeline_cache_key(user_input: str) -> str:
+    """Whole-pipeline key: input, assembly mode, every agent's model/instructions and the document."""
+    agents = [observation_extractor, isp_way_analyst, strategy_developer, summary_writer, report_writer]
+    fingerprints = hash_parts(part for agent in agents for part in agent_fingerprint(agent))
+    return result_cache.make_key(
+        f"pipeline:{REPORT_ASSEMBLY}:{ANALYST_INPUT_TOKENS}", user_input, lmstudio_model.id, fingerprints, document_hash(ISP_WAY_DOCUMENT)
     )
-    developer_output = developer_result.content if hasattr(developer_result, 'content') else str(developer_result)
+
+
+def extract_observations(messages: List[str], stage: str) -> Generator[PipelineUpdate, None, List[str]]:
+    """Run the Observation Extractor on every message, CHUNK_CONCURRENCY at a time; returns the outputs in order."""
+
+    def extract(message: str) -> str:
+        # Each concurrent run gets its own agent copy so run state is not shared
+        extractor = observation_extractor.deep_copy() if CHUNK_CONCURRENCY > 1 else observation_extractor
+        output = ""
+        for delta in stream_gated(extractor, message):
+            output = "" if delta is None else output + delta
+        return output.strip()
+
+    outputs = [""] * len(messages)
+    pool = ThreadPoolExecutor(max_workers=min(CHUNK_CONCURRENCY, len(messages)))
+    try:
+        futures = {pool.submit(extract, message): index for index, message in enumerate(messages)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            outputs[futures[future]] = future.result()
+            yield PipelineUpdate(f"{stage} ({done}/{len(messages)} done)...", 0.05, "", "observations")
+    finally:
+        # On an error or an abandoned report, the chunks not started yet are dropped
+        pool.shutdown(wait=False, cancel_futures=True)
+    return outputs
+
+
+def stream_observations(user_input: str) -> Generator[PipelineUpdate, None, str]:
+    """
+    Map-reduce for evaluations over ANALYST_INPUT_TOKENS: observations are extracted
+    from every token-budgeted chunk concurrently, then the notes are merged in
+    budget-sized groups until they fit one prompt. Returns the analyst's input
+    (the evaluation itself when it fits the budget). Later stages' prompts are
+    not budgeted.
+    """
+
+    if not ANALYST_INPUT_TOKENS or estimate_tokens(user_input) <= ANALYST_INPUT_TOKENS:
+        return user_input
+
+    # Keep the "Teacher Evaluation for ...:" line in every prompt
+    heading, _, body = user_input.partition("\n")
+    if not (heading.rstrip().endswith(":") and len(heading) < 200):
+        heading, body = "Teacher Evaluation:", user_input
+    heading = heading.rstrip().rstrip(":")
+
+    chunks = split_into_chunks(body, ANALYST_INPUT_TOKENS)
+    messages = [
+        f"Extract the observations from this part of the evaluation.\n\n{heading} (part {i} of {len(chunks)}):\n\n{chunk}"
+        for i, chunk in enumerate(chunks, start=1)
+    ]
+    outputs = yield from extract_observations(messages, f"Reading the evaluation in {len(chunks)} parts")
+    notes = "\n\n".join(output for output in outputs if output)
+
+    # Reduce: merge groups of notes until they fit the budget (each round at least halves them, or
+    # the notes are cut, so this ends)
+    while estimate_tokens(notes) > ANALYST_INPUT_TOKENS:
+        groups = split_into_chunks(notes, ANALYST_INPUT_TOKENS)
+        messages = [
+            f"Merge these observation notes from several parts of the same evaluation into one list.\n\n{group}"
+            for group in groups
+        ]
+        outputs = yield from extract_observations(messages, f"Merging observations in {len(groups)} groups")
+        merged = "\n\n".join(output for output in outputs if output)
+        if estimate_tokens(merged) * 2 > estimate_tokens(notes):
+            merged = truncate_to_budget(merged, ANALYST_INPUT_TOKENS)
+        notes = merged
+
+    return f"{heading} (observations from the full evaluation, {len(chunks)} parts):\n\n{notes}"
+
+
+# Status while a failed analysis is re-run on the escalation model
+ESCALATED_ANALYSIS = "Re-analyzing with the larger model..."
+
+
+def stream_sequential_stages(analyst_input: str) -> Generator[PipelineUpdate, None, Tuple[str, str]]:
+    """Analyst, then the Developer on every growth area. Returns the analysis and the strategies."""
+
+    # Step 1: ISP Way Analysis
+    stage = "Analyzing evaluation against the ISP Way..."
+    yield PipelineUpdate(stage, 0.05, "", "analysis")
+    analyst_output = ""
+    for delta in stream_gated(isp_way_analyst, analyst_input):
+        if delta is None:
+            stage, analyst_output = ESCALATED_ANALYSIS, ""
+        else:
+            analyst_output += delta
+        yield PipelineUpdate(stage, 0.05, analyst_output, "analysis")
+
+    # Quotes not found in the ISP Way are replaced by the closest real sentence
+    verification = quote_verifier.verify(analyst_output)
+    if verification.snapped:
+        analyst_output = verification.text
+        yield PipelineUpdate(f"Corrected {verification.snapped} ISP Way quote(s)", 0.3, analyst_output, "analysis")
+
+    # Step 2: Strategy Development (fanned out per growth area)
+    growth_areas = split_growth_areas(analyst_output) or [analyst_output]
+    yield PipelineUpdate(f"Developing strategies (0/{len(growth_areas)} done)...", 0.35, analyst_output, "strategies")
+    developer_output = ""
+    for buffers, completed in stream_strategies(growth_areas):
+        developer_output = merge_strategies(buffers)
+        yield PipelineUpdate(
+            f"Developing strategies ({completed}/{len(growth_areas)} done)...",
+            0.35 + 0.45 * completed / len(growth_areas),
+            f"{analyst_output}\n\n{developer_output}",
+            "strategies",
+        )
+    return analyst_output, developer_output
+
+
+def stream_overlapped_stages(
+    analyst_input: str, analyst: Optional["Agent"] = None
+) -> Generator[PipelineUpdate, None, Tuple[str, str]]:
+    """
+    Analyst and Developer overlapped: each growth area has its quote verified and
+    goes to the strategy developer as soon as its block is complete in the
+    analyst's stream. Returns the analysis and the strategies.
+    """
+
+    analyst = analyst or isp_way_analyst
+    stage = "Analyzing evaluation against the ISP Way..." if analyst is isp_way_analyst else ESCALATED_ANALYSIS
+    yield PipelineUpdate(stage, 0.05, "", "analysis")
+    parser = GrowthAreaParser()
+    runs = StrategyRuns()
+    corrections: List[Tuple[str, str, int]] = []  # Block as written, with verified quotes, quotes replaced
+
+    def dispatch(blocks: List[str]) -> None:
+        for block in blocks:
+            # Quotes not found in the ISP Way are replaced by the closest real sentence
+            verification = quote_verifier.verify(block)
+            if verification.snapped:
+                corrections.append((block, verification.text, verification.snapped))
+            runs.submit(verification.text)
+
+    try:
+        for delta in stream_stage(analyst, analyst_input):
+            dispatch(parser.feed(delta))
+            runs.poll()
+            developer_output = merge_strategies(runs.buffers)
+            status = f"{stage} ({runs.submitted} growth area(s) in development)" if runs.submitted else stage
+            markdown = f"{parser.text}\n\n{developer_output}" if developer_output else parser.text
+            yield PipelineUpdate(status, 0.05, markdown, "analysis")
+        if model_router.needs_escalation(analyst.name, analyst.model.id, parser.text):
+            # The growth areas already in development go with the analysis they came from
+            runs.close()
+            return (yield from stream_overlapped_stages(analyst_input, escalated(analyst)))
+        dispatch(parser.close())
+        if not runs.submitted:
+            runs.submit(parser.text)  # An empty analysis, as the sequential path does
+
+        analyst_output = parser.text
+        for written, verified, _ in corrections:
+            analyst_output = analyst_output.replace(written, verified, 1)
+        if corrections:
+            snapped = sum(count for _, _, count in corrections)
+            yield PipelineUpdate(f"Corrected {snapped} ISP Way quote(s)", 0.3, analyst_output, "analysis")
+
+        # Step 2: the strategies still running once the analysis is done
+        while True:
+            developer_output = merge_strategies(runs.buffers)
+            yield PipelineUpdate(
+                f"Developing strategies ({runs.completed}/{runs.submitted} done)...",
+                0.35 + 0.45 * runs.completed / runs.submitted,
+                f"{analyst_output}\n\n{developer_output}",
+                "strategies",
+            )
+            if runs.done:
+                return analyst_output, developer_output
+            runs.poll(timeout=None)
+    finally:
+        runs.close()
+
+
+def stream_report(user_input: str) -> Iterator[PipelineUpdate]:
+    """
+    [Extractor per chunk, for long evaluations] -> Analyst -> Developer (one run per
+    growth area, in parallel, started while the analyst streams unless STAGE_OVERLAP
+    is off) -> Writer/assembly, yielding the report as it is written. Progress
+    advances as stages complete.
+    """
+
+    build_agents()
+    key = pipeline_cache_key(user_input)
+    cached = result_cache.get(key)
+    if cached is not None:
+        yield PipelineUpdate("Complete! (cached)", 1.0, cached)
+        return
+
+    # Step 0 (long evaluations only): observations per chunk, merged to fit the analyst's budget
+    analyst_input = yield from stream_observations(user_input)
+
+    if STAGE_OVERLAP:
+        analyst_output, developer_output = yield from stream_overlapped_stages(analyst_input)
+    else:
+        analyst_output, developer_output = yield from stream_sequential_stages(analyst_input)
 
     # Step 3: Report Writing
-    report_input = f"""
+    yield PipelineUpdate("Writing report...", 0.8, f"{analyst_output}\n\n{developer_output}", "report")
+    if REPORT_ASSEMBLY == "template":
+        stage = "Writing summary and priority actions..."
+        teacher_name = extract_teacher_name(user_input)
+        digest = build_digest(analyst_output, developer_output, teacher_name)
+        summary_output = ""
+        for delta in stream_gated(summary_writer, digest):
+            summary_output = "" if delta is None else summary_output + delta
+            yield PipelineUpdate(
+                stage, 0.8, assemble_report(analyst_output, developer_output, summary_output, teacher_name), "report"
+            )
+        report = assemble_report(analyst_output, developer_output, summary_output, teacher_name)
+    else:
+        stage = "Writing report..."
+        report_input = f"""
 Create a professional development report using:
 
 {analyst_output}
 
 {developer_output}
 """
-    report_result = report_writer.run(report_input)
+        report = ""
+        for delta in stream_gated(report_writer, report_input):
+            report = "" if delta is None else report + delta
+            yield PipelineUpdate(stage, 0.8, report, "report")
 
-    # Return the markdown content
-    if hasattr(report_result, 'content'):
-        return report_result.content
-    else:
-        return str(report_result)
-
-teacher_evaluation_workflow = Workflow(
-    name="Teacher Evaluation Workflow (LMStudio)",
-    description="Analyzes teacher evaluations and generates professional development recommendations",
-    steps=workflow_steps,
-)
-
-# =============================================================================
-# GRADIO INTERFACE
-# =============================================================================
+    result_cache.set(key, report)
+    model_router.count_evaluation()
+    yield PipelineUpdate("Complete!", 1.0, report)
 
-def format_markdown_to_html(markdown_text: str) -> str:
-    """Convert markdown report to styled HTML."""
-    import re
 
-    # Simple markdown to HTML conversion
-    html = markdown_text
+def generate_report(user_input: str, timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Run the whole pipeline and return the final markdown report.
+    If `timings` is given, the seconds spent in each step are added to it.
+    """
+    report = ""
+    step, step_start = None, time.perf_counter()
+    for update in stream_report(user_input):
+        if update.step != step:
+            now = time.perf_counter()
+            if step is not None and timings is not None:
+                timings[step] = timings.get(step, 0.0) + now - step_start
+            step, step_start = update.step, now
+        report = update.markdown
+    return report
+
+
+def generate_batch_report(user_input: str, user: str, timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    `generate_report` admitted through the request queue's batch lane, behind
+    interactive requests (workflow runs and batch_evaluate.py). `user` is the
+    key of the per-user cap. Raises QueueFull when too many requests wait.
+    """
+    with request_queue.acquire(user=user, lane="batch"):
+        return generate_report(user_input, timings)
 
-    # Headers
-    html = re.sub(r'^# (.+)$', r'<h1 style="color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px;">\1</h1>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.+)$', r'<h2 style="color: #2c3e50; margin-top: 25px; border-bottom: 2px solid #e74c3c; padding-bottom: 8px;">\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.+)$', r'<h3 style="color: #27ae60; margin-top: 15px;">\1</h3>', html, flags=re.MULTILINE)
 
-    # Bold
-    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
+def workflow_steps(step_input: "StepInput", run_context: "RunContext") -> "StepOutput":
+    """Workflow step: returns the cached report or generates a new one."""
+    from agno.workflow.types import StepOutput
 
-    # Lists
-    html = re.sub(r'^- (.+)$', r'<li style="margin: 8px 0;">\1</li>', html, flags=re.MULTILINE)
-    html = re.sub(r'^\d+\. (.+)$', r'<li style="margin: 8px 0;">\1</li>', html, flags=re.MULTILINE)
+    # The caller's user_id when the run has one, else the run itself: a workflow without a
+    # session_id reuses one session for every run, so that would serialize all anonymous callers
+    user = f"user:{run_context.user_id}" if run_context.user_id else f"run:{run_context.run_id}"
+    return StepOutput(content=generate_batch_report(step_input.get_input_as_string() or "", user))
 
-    # Wrap lists
-    html = re.sub(r'(<li.*?</li>\n)+', r'<ul style="line-height: 1.8;">\g<0></ul>', html)
+# =============================================================================
+# GRADIO INTERFACE
+# =============================================================================
 
-    # Quotes (look for lines starting with ")
-    html = re.sub(r'^"(.+)"$', r'<blockquote style="background: #fef9e7; border-left: 4px solid #f39c12; padding: 15px; margin: 15px 0; font-style: italic; border-radius: 4px;">"\1"</blockquote>', html, flags=re.MULTILINE)
+def format_markdown_to_html(markdown_text: str, renderer: Optional[IncrementalMarkdownRenderer] = None) -> str:
+    """Convert markdown report to styled HTML (incrementally when a renderer is given)."""
 
-    # Paragraphs
-    lines = html.split('\n')
-    formatted_lines = []
-    for line in lines:
-        if line.strip() and not line.strip().startswith('<'):
-            formatted_lines.append(f'<p style="line-height: 1.6; color: #333;">{line}</p>')
-        else:
-            formatted_lines.append(line)
-
-    html = '\n'.join(formatted_lines)
+    html = renderer.render(markdown_text) if renderer else render_markdown(markdown_text)
 
     # Wrap in container
     html = f"""
@@ -255,13 +900,58 @@ def format_markdown_to_html(markdown_text: str) -> str:
     return html
 
 
-def process_evaluation(teacher_name: str, evaluation_text: str, progress=gr.Progress()) -> tuple:
-    """Process the teacher evaluation through the workflow."""
+def request_user(request: Optional["gr.Request"]) -> str:
+    """
+    Who a UI request belongs to, for the per-user cap: login name, else the browser
+    session, else the client address (shared by everyone behind one proxy or NAT).
+    """
+    if request is None:
+        return "local"
+    if request.username:
+        return f"user:{request.username}"
+    if request.session_hash:
+        return f"session:{request.session_hash}"
+    client_host = getattr(request.client, "host", None) if request.client else None
+    return f"host:{client_host}" if client_host else "anonymous"
+
+
+def process_evaluation(
+    teacher_name: str, evaluation_text: str, request: Optional["gr.Request"], progress: Callable
+) -> Iterator[tuple]:
+    """
+    Process the teacher evaluation, streaming the report into the outputs as it is written.
+    Waits for a slot in the request queue first, showing the queue position. If the
+    browser disconnects, Gradio closes this generator, which cancels the pipeline's
+    model requests and frees the slot.
+    """
 
     if not evaluation_text.strip():
-        return "<p style='color: red;'>Please provide evaluation feedback.</p>", ""
+        yield "<p style='color: red;'>Please provide evaluation feedback.</p>", ""
+        return
 
     try:
+        ticket = request_queue.submit(request_user(request), lane="interactive")
+    except QueueFull:
+        yield "<p style='color: red;'>The server is busy, please try again in a few minutes.</p>", ""
+        return
+
+    completed = False
+    try:
+        while not ticket.wait(timeout=1.0):
+            position = ticket.position
+            progress(0, desc=f"Waiting in queue (position {position})...")
+            yield f"<p>⏳ Waiting in queue: position {position}. Your report starts when a slot is free.</p>", ""
+
+        if not _agents_ready.is_set():
+            progress(0, desc="Starting up...")
+            yield "<p>⏳ The server is still starting up, your report starts in a moment.</p>", ""
+            build_agents()  # Waits for the background warm-up
+
+        if model_state()["state"] in ("cold", "loading"):
+            # The report would wait for the same load; say why it is slow to start
+            progress(0, desc="Loading the model...")
+            yield "<p>⏳ LM Studio is still loading the model, your report starts as soon as it is loaded.</p>", ""
+
         progress(0, desc="Initializing workflow...")
 
         # Prepare input
@@ -270,37 +960,26 @@ def process_evaluation(teacher_name: str, evaluation_text: str, progress=gr.Prog
             input_text += f" for {teacher_name}"
         input_text += f":\n\n{evaluation_text}"
 
-        progress(0.3, desc="Analyzing ISP Way document...")
-
-        # Run workflow
-        result = teacher_evaluation_workflow.run(input_text)
-
-        progress(0.9, desc="Generating report...")
-
-        # Extract markdown content
-        markdown_report = None
-        if isinstance(result, str):
-            markdown_report = result
-        elif hasattr(result, 'content'):
-            if isinstance(result.content, str):
-                markdown_report = result.content
-            elif hasattr(result.content, 'content'):
-                markdown_report = str(result.content.content)
-
-        if not markdown_report:
-            return f"<p style='color: red;'>Error: Could not extract report content</p><pre>{str(result)[:1000]}</pre>", str(result)
-
-        progress(1.0, desc="Complete!")
-
-        # Convert to HTML
-        html_output = format_markdown_to_html(markdown_report)
-
-        return html_output, markdown_report
+        # Stream the report, re-rendering at most every STREAM_RENDER_INTERVAL seconds;
+        # the renderer only re-renders the unfinished tail of the growing report
+        renderer = IncrementalMarkdownRenderer()
+        last_render = 0.0
+        with closing(stream_report(input_text)) as updates:
+            for update in updates:
+                progress(update.progress, desc=update.stage)
+                now = time.monotonic()
+                if update.progress >= 1.0 or now - last_render >= STREAM_RENDER_INTERVAL:
+                    last_render = now
+                    yield format_markdown_to_html(update.markdown, renderer), update.markdown
+        completed = True
 
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        return f"<p style='color: red;'>Error: {str(e)}</p><pre>{error_details[:1000]}</pre>", error_details
+        yield f"<p style='color: red;'>Error: {str(e)}</p><pre>{error_details[:1000]}</pre>", error_details
+
+    finally:
+        ticket.release(completed)
 
 
 # Custom CSS
@@ -318,86 +997,221 @@ custom_css = """
 }
 """
 
-with gr.Blocks(css=custom_css, title="Teacher Evaluation System", theme=gr.themes.Soft()) as demo:
-
-    gr.HTML("""
-        <div class="header">
-            <h1 style="margin: 0; font-size: 2.5em;">🎓 Teacher Evaluation System</h1>
-            <p style="margin: 10px 0 0 0; font-size: 1.2em;">Powered by Local LMStudio (Simplified Version)</p>
-        </div>
-    """)
 
-    gr.Markdown("""
-        ### 📋 How It Works
+def pool_stats() -> List[Dict]:
+    """LM Studio endpoint stats (empty until the agents are built)."""
+    return lmstudio_pool.stats() if _agents_ready.is_set() else []
 
-        This system analyzes teacher evaluations against the **ISP Way** and generates development recommendations.
 
-        **Optimized for local models** - uses simpler output format for better compatibility with smaller models.
+def model_state() -> Dict[str, Any]:
+    """Model warm-up state: "ready", "loading", "error" or "cold" ("unmanaged" with MODEL_WARMUP=off)."""
+    if model_warmer is not None:
+        return model_warmer.state()
+    return {"state": "cold" if MODEL_WARMUP else "unmanaged", "endpoints": []}
 
-        **You'll get:**
-        - 📖 Exact quotes from ISP Way document
-        - 🎯 Specific growth areas
-        - 💡 Practical teaching strategies with examples
-        - 🚀 Prioritized action items
-    """)
 
-    with gr.Row():
-        with gr.Column(scale=1):
-            gr.Markdown("### 📝 Input")
+def readiness() -> Dict[str, Any]:
+    """Whether the agents are built and reports can start, and the model's state, for the /ready endpoint."""
+    return {
+        "ready": _agents_ready.is_set(),
+        "model": model_state(),
+        "agents_build_s": round(_agents_build_seconds, 3) if _agents_build_seconds is not None else None,
+        "uptime_s": round(time.perf_counter() - _module_loaded, 3),
+    }
 
-            teacher_name_input = gr.Textbox(
-                label="Teacher Name (Optional)",
-                placeholder="e.g., Ms. Johnson",
-                lines=1
-            )
 
-            evaluation_input = gr.Textbox(
-                label="Evaluation Feedback",
-                placeholder="""Enter evaluation feedback here. For example:
+def agent_prefixes() -> List["Prefix"]:
+    """System message and tool definitions of the agents every report uses, for prefix prefill."""
+    from agno.session import AgentSession
+    from agno.tools.function import Function
 
-- Lessons are primarily teacher-led
-- Uses mainly worksheets
-- Limited student interaction
-- Assessment doesn't inform instruction""",
-                lines=12
-            )
+    writer = summary_writer if REPORT_ASSEMBLY == "template" else report_writer
+    prefixes = []
+    for agent in (isp_way_analyst, strategy_developer, writer):
+        system = agent.get_system_message(session=AgentSession(session_id="model-warmup"))
+        tools = [
+            {"type": "function", "function": Function.from_callable(tool).to_dict()}
+            for tool in agent.tools or [] if callable(tool)
+        ]
+        prefixes.append((agent.model.id, system.content if system is not None else "", tools))
+    return prefixes
 
-            submit_btn = gr.Button("🚀 Generate Development Plan", variant="primary", size="lg")
 
-            gr.Markdown("""
-                **⚠️ Note:** Make sure LMStudio is running with `openai/gpt-oss-20b` loaded (port 1234)
-            """)
+def _warm_up() -> None:
+    global model_warmer
+    build_agents()
+    if MODEL_WARMUP and model_warmer is None:
+        from model_warmup import ModelWarmer
 
-    with gr.Row():
-        with gr.Column(scale=1):
-            gr.Markdown("### 📊 Professional Development Report")
+        model_warmer = ModelWarmer(
+            lmstudio_pool, lmstudio_model.id, agent_prefixes(), keep_alive_interval=MODEL_KEEP_ALIVE
+        ).start()
 
-            with gr.Tab("📄 Report"):
-                html_output = gr.HTML(label="Formatted Report")
 
-            with gr.Tab("📝 Markdown"):
-                markdown_output = gr.Code(label="Markdown Source", language="markdown")
+def warm_up() -> threading.Thread:
+    """
+    Build the agents in the background, so the server listens while Agno is imported,
+    then start the model warm-up (once).
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up, name="warm-up", daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+
+def model_status_markdown() -> str:
+    """One-line model status for the UI."""
+    model = model_state()
+    name = ", ".join(f"`{model_id}`" for model_id in model.get("models") or [DEFAULT_MODEL])
+    if not _agents_ready.is_set():
+        return "⏳ **Starting up...**"
+    if model["state"] == "ready":
+        load_s = next((e["load_s"] for e in model["endpoints"] if e["state"] == "ready"), None)
+        loaded = f" (loaded in {load_s:.1f} s)" if load_s is not None else ""
+        return f"✅ **Model ready:** {name}{loaded}"
+    if model["state"] in ("loading", "cold"):
+        return f"⏳ **Loading {name} in LM Studio...** The first report starts once it is loaded."
+    if model["state"] == "error":
+        return f"⚠️ **LM Studio is not answering.** Make sure LMStudio is running with {name} loaded (port 1234)."
+    return f"**⚠️ Note:** Make sure LMStudio is running with {name} loaded (port 1234)"
+
+
+def build_ui() -> "gr.Blocks":
+    """Import Gradio and build the interface."""
+    import gradio as gr
+
+    def on_submit(teacher_name: str, evaluation_text: str, request: gr.Request, progress=gr.Progress()):
+        yield from process_evaluation(teacher_name, evaluation_text, request, progress)
+
+    with gr.Blocks(css=custom_css, title="Teacher Evaluation System", theme=gr.themes.Soft()) as demo:
+
+        gr.HTML("""
+            <div class="header">
+                <h1 style="margin: 0; font-size: 2.5em;">🎓 Teacher Evaluation System</h1>
+                <p style="margin: 10px 0 0 0; font-size: 1.2em;">Powered by Local LMStudio (Simplified Version)</p>
+            </div>
+        """)
+
+        gr.Markdown("""
+            ### 📋 How It Works
+
+            This system analyzes teacher evaluations against the **ISP Way** and generates development recommendations.
+
+            **Optimized for local models** - uses simpler output format for better compatibility with smaller models.
+
+            **You'll get:**
+            - 📖 Exact quotes from ISP Way document
+            - 🎯 Specific growth areas
+            - 💡 Practical teaching strategies with examples
+            - 🚀 Prioritized action items
+        """)
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                gr.Markdown("### 📝 Input")
+
+                teacher_name_input = gr.Textbox(
+                    label="Teacher Name (Optional)",
+                    placeholder="e.g., Ms. Johnson",
+                    lines=1
+                )
+
+                evaluation_input = gr.Textbox(
+                    label="Evaluation Feedback",
+                    placeholder="""Enter evaluation feedback here. For example:
 
-    # Connect the button
-    submit_btn.click(
-        fn=process_evaluation,
-        inputs=[teacher_name_input, evaluation_input],
-        outputs=[html_output, markdown_output]
-    )
+- Lessons are primarily teacher-led
+- Uses mainly worksheets
+- Limited student interaction
+- Assessment doesn't inform instruction""",
+                    lines=12
+                )
+
+                submit_btn = gr.Button("🚀 Generate Development Plan", variant="primary", size="lg")
+
+                # Refreshed every few seconds while the page is open
+                model_status = gr.Markdown(model_status_markdown())
+                gr.Timer(3.0).tick(fn=model_status_markdown, outputs=model_status)
+
+        with gr.Row():
+            with gr.Column(scale=1):
+                gr.Markdown("### 📊 Professional Development Report")
+
+                with gr.Tab("📄 Report"):
+                    html_output = gr.HTML(label="Formatted Report")
+
+                with gr.Tab("📝 Markdown"):
+                    markdown_output = gr.Code(label="Markdown Source", language="markdown")
+
+                with gr.Accordion("⚡ Cache, endpoint, agent and route statistics", open=False):
+                    cache_stats_output = gr.JSON(value=result_cache.stats(), label="Result cache")
+                    pool_stats_output = gr.JSON(value=pool_stats(), label="LM Studio endpoints")
+                    stage_stats_output = gr.JSON(value=stage_metrics.summary(), label="Agent runs")
+                    quote_stats_output = gr.JSON(value=quote_verifier.stats(), label="ISP Way quote checks")
+                    queue_stats_output = gr.JSON(value=request_queue.stats(), label="Request queue")
+                    library_stats_output = gr.JSON(value=strategy_library.stats(), label="Strategy library")
+                    model_stats_output = gr.JSON(value=model_state(), label="Model warm-up")
+                    route_stats_output = gr.JSON(value=model_router.summary(), label="Model routes (cost and latency)")
+
+        # Connect the button
+        submit_btn.click(
+            fn=on_submit,
+            inputs=[teacher_name_input, evaluation_input],
+            outputs=[html_output, markdown_output],
+            show_progress="minimal",
+            # Admission, priorities and the per-user cap are handled by request_queue
+            concurrency_limit=None,
+        ).then(
+            fn=lambda: (
+                result_cache.stats(), pool_stats(), stage_metrics.summary(), quote_verifier.stats(),
+                request_queue.stats(), strategy_library.stats(), model_state(), model_router.summary(),
+            ),
+            outputs=[
+                cache_stats_output, pool_stats_output, stage_stats_output, quote_stats_output, queue_stats_output,
+                library_stats_output, model_stats_output, route_stats_output,
+            ],
+        )
+
+        # Examples
+        gr.Examples(
+            examples=[
+                ["Ms. Johnson", "- Lessons are primarily teacher-led\n- Uses mainly worksheets\n- Limited student interaction\n- Assessment is primarily summative"],
+                ["Mr. Chen", "- Strong lectures but passive students\n- Recall-based questions\n- No collaboration\n- Same lesson for all students"],
+            ],
+            inputs=[teacher_name_input, evaluation_input],
+        )
+
+    return demo
+
+
+def create_server() -> Any:
+    """FastAPI app with the Gradio UI at / and a readiness endpoint at /ready."""
+    import gradio as gr
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+
+    server = FastAPI()
+
+    @server.get("/ready")
+    def ready(model: bool = False):
+        # ?model=true also waits for the model warm-up (for load balancers in front of several instances)
+        state = readiness()
+        ok = state["ready"] and (not model or state["model"]["state"] in ("ready", "unmanaged"))
+        return JSONResponse(state, status_code=200 if ok else 503)
+
+    return gr.mount_gradio_app(server, build_ui(), path="/", show_error=True)
 
-    # Examples
-    gr.Examples(
-        examples=[
-            ["Ms. Johnson", "- Lessons are primarily teacher-led\n- Uses mainly worksheets\n- Limited student interaction\n- Assessment is primarily summative"],
-            ["Mr. Chen", "- Strong lectures but passive students\n- Recall-based questions\n- No collaboration\n- Same lesson for all students"],
-        ],
-        inputs=[teacher_name_input, evaluation_input],
-    )
 
 if __name__ == "__main__":
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        share=False,
-        show_error=True
+    import uvicorn
+
+    # Listen first; the agents are built and the model warmed up in the background (see GET /ready)
+    server = create_server()
+    warm_up()
+    uvicorn.run(
+        server,
+        host=os.getenv("GRADIO_SERVER_NAME", "0.0.0.0"),
+        port=int(os.getenv("GRADIO_SERVER_PORT", "7860")),
     )
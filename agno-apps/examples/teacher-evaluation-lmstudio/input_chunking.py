@@ -0,0 +1,77 @@
+"""
+Input Chunking
+==============
+Token-budgeted splitting of long evaluations (full observation transcripts,
+multi-visit notes) for the map-reduce analysis in app.py: every chunk fits
+the per-prompt budget, and chunks break at paragraphs, then sentences, then
+words, so observations are not cut in half.
+
+Token counts are estimates (about 4 characters per token, no tokenizer), so
+budgets should leave headroom below the model's context window.
+"""
+
+from typing import List
+import re
+
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in a text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _pieces(text: str, budget_tokens: int) -> List[str]:
+    """Paragraphs, with paragraphs over the budget split into sentences, and sentences into words."""
+    max_chars = budget_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_BREAK.split(paragraph):
+            if len(sentence) <= max_chars:
+                pieces.append(sentence)
+                continue
+            line = ""
+            for word in sentence.split():
+                # A single "word" longer than the budget (e.g. a pasted table row) is cut
+                while len(word) > max_chars:
+                    pieces.extend(filter(None, [line, word[:max_chars]]))
+                    line, word = "", word[max_chars:]
+                if line and len(line) + 1 + len(word) > max_chars:
+                    pieces.append(line)
+                    line = ""
+                line = f"{line} {word}" if line else word
+            if line:
+                pieces.append(line)
+    return [piece for piece in pieces if piece]
+
+
+def split_into_chunks(text: str, budget_tokens: int) -> List[str]:
+    """Split text into as few chunks as possible, each within `budget_tokens`, in order."""
+    max_chars = max(1, budget_tokens) * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current = ""
+    for piece in _pieces(text, max(1, budget_tokens)):
+        if current and len(current) + 2 + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def truncate_to_budget(text: str, budget_tokens: int, marker: str = "\n\n[...]") -> str:
+    """Cut text at a word boundary so that it (with `marker`) fits `budget_tokens`."""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    max_chars = max(0, budget_tokens * CHARS_PER_TOKEN - len(marker))
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > max_chars // 2 else cut).rstrip() + marker
@@ -0,0 +1,152 @@
+"""
+ISP Way Retrieval Index
+=======================
+A small in-process BM25 index over the `knowledge_base` section of the ISP Way
+JSON document. Every indexed passage is a single string from the document
+(a bullet, point, description or title) together with its JSON path, so the
+analyst can quote the exact text without reading the whole file.
+
+The index is built once and lazily rebuilt when the file's modification time
+changes.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import math
+import os
+import re
+import threading
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or our that the their them they this
+    to we with all every what who how which while not no do does our us
+    """.split()
+)
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'lessons'/'lesson' and 'grouping'/'group' match."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [_stem(t) for t in _TOKEN_PATTERN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class Passage:
+    """One indexed string from the ISP Way document."""
+    path: str
+    text: str
+
+
+@dataclass
+class SearchResult:
+    """A passage matched by a query, with its BM25 score."""
+    path: str
+    text: str
+    score: float
+
+
+def extract_passages(knowledge_base: Any, path: str = "knowledge_base") -> List[Passage]:
+    """Flatten the knowledge base into (JSON path, string) passages."""
+    passages: List[Passage] = []
+    if isinstance(knowledge_base, dict):
+        for key, value in knowledge_base.items():
+            passages.extend(extract_passages(value, f"{path}.{key}"))
+    elif isinstance(knowledge_base, list):
+        for i, value in enumerate(knowledge_base):
+            passages.extend(extract_passages(value, f"{path}[{i}]"))
+    elif isinstance(knowledge_base, str) and knowledge_base.strip():
+        passages.append(Passage(path=path, text=knowledge_base.strip()))
+    return passages
+
+
+class IspWayIndex:
+    """BM25 index over the ISP Way knowledge base, rebuilt when the file changes."""
+
+    def __init__(self, document_path: Path, k1: float = 1.5, b: float = 0.75):
+        self.document_path = Path(document_path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self.passages: List[Passage] = []
+        self._doc_terms: List[Counter] = []
+        self._doc_lengths: List[int] = []
+        self._idf: Dict[str, float] = {}
+        self._avg_length = 0.0
+        self._ensure_fresh()
+
+    def _build(self) -> None:
+        with open(self.document_path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+
+        passages = extract_passages(document.get("knowledge_base", {}))
+        doc_terms = []
+        for passage in passages:
+            # Section names in the path help short bullets match topical queries
+            section_words = re.sub(r"\[\d+\]", " ", passage.path).replace(".", " ").replace("_", " ")
+            doc_terms.append(Counter(tokenize(passage.text) + tokenize(section_words)))
+
+        doc_freq: Counter = Counter()
+        for terms in doc_terms:
+            doc_freq.update(terms.keys())
+
+        n = len(passages)
+        self.passages = passages
+        self._doc_terms = doc_terms
+        self._doc_lengths = [sum(terms.values()) for terms in doc_terms]
+        self._avg_length = (sum(self._doc_lengths) / n) if n else 0.0
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def _ensure_fresh(self) -> None:
+        """Rebuild the index if the document changed on disk since the last build."""
+        mtime_ns = os.stat(self.document_path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                self._build()
+                self._mtime_ns = mtime_ns
+
+    def search(self, query: str, top_k: int = 6) -> List[SearchResult]:
+        """Return the top-k passages for a query, best first."""
+        self._ensure_fresh()
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        scored = []
+        for i, terms in enumerate(self._doc_terms):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[i] / self._avg_length)
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, i))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            SearchResult(path=self.passages[i].path, text=self.passages[i].text, score=score)
+            for score, i in scored[:top_k]
+        ]
+
+    @staticmethod
+    def format_results(results: List[SearchResult]) -> str:
+        """Render results compactly as one `path: "text"` line each."""
+        if not results:
+            return "No matching ISP Way passages found."
+        return "\n".join(f'{result.path}: "{result.text}"' for result in results)
@@ -0,0 +1,125 @@
+"""
+Markdown to HTML Rendering
+==========================
+A small line-based renderer for the report markdown (headers, bold, lists,
+quotes, rules and paragraphs) with precompiled patterns and a single pass
+over the text.
+
+`IncrementalMarkdownRenderer` is meant for streamed output: when the text
+grows, only the lines after the last finished block are rendered again, so
+rendering a whole streamed report costs time linear in its length.
+"""
+
+from typing import List
+import re
+
+_HEADER = re.compile(r"^(#{1,3}) (.+)$")
+_LIST_ITEM = re.compile(r"^(?:- |\d+\. )(.+)$")
+_QUOTE = re.compile(r'^"(.+)"$')
+_RULE = re.compile(r"^(?:-{3,}|\*{3,}|_{3,})\s*$")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+_HEADER_TAGS = {
+    1: '<h1 style="color: #2c3e50; border-bottom: 3px solid #3498db; padding-bottom: 10px;">{}</h1>',
+    2: '<h2 style="color: #2c3e50; margin-top: 25px; border-bottom: 2px solid #e74c3c; padding-bottom: 8px;">{}</h2>',
+    3: '<h3 style="color: #27ae60; margin-top: 15px;">{}</h3>',
+}
+_LIST_OPEN = '<ul style="line-height: 1.8;">'
+_LIST_ITEM_TAG = '<li style="margin: 8px 0;">{}</li>'
+_QUOTE_TAG = (
+    '<blockquote style="background: #fef9e7; border-left: 4px solid #f39c12; padding: 15px; '
+    'margin: 15px 0; font-style: italic; border-radius: 4px;">"{}"</blockquote>'
+)
+_PARAGRAPH_TAG = '<p style="line-height: 1.6; color: #333;">{}</p>'
+_RULE_TAG = '<hr style="border: none; border-top: 1px solid #ddd; margin: 20px 0;">'
+
+
+def _inline(text: str) -> str:
+    return _BOLD.sub(r"<strong>\1</strong>", text)
+
+
+def _render_line(line: str) -> str:
+    """Render one non-list line."""
+    stripped = line.strip()
+    if not stripped:
+        return line
+    header = _HEADER.match(line)
+    if header:
+        return _HEADER_TAGS[len(header.group(1))].format(_inline(header.group(2)))
+    if _RULE.match(stripped):
+        return _RULE_TAG
+    quote = _QUOTE.match(line)
+    if quote:
+        return _QUOTE_TAG.format(_inline(quote.group(1)))
+    if stripped.startswith("<"):
+        # Raw HTML from the model is passed through
+        return line
+    return _PARAGRAPH_TAG.format(_inline(line))
+
+
+def render_lines(lines: List[str]) -> List[str]:
+    """
+    Render lines to HTML, one output piece per input line.
+
+    Consecutive list items are wrapped in a single <ul>; the opening tag is
+    attached to the first item's piece and the closing tag to the last one's.
+    """
+    pieces = []
+    in_list = False
+    for i, line in enumerate(lines):
+        item = _LIST_ITEM.match(line)
+        if not item:
+            pieces.append(_render_line(line))
+            in_list = False
+            continue
+        piece = _LIST_ITEM_TAG.format(_inline(item.group(1)))
+        if not in_list:
+            piece = _LIST_OPEN + piece
+        in_list = True
+        if i + 1 == len(lines) or not _LIST_ITEM.match(lines[i + 1]):
+            piece += "\n</ul>"
+        pieces.append(piece)
+    return pieces
+
+
+def render_markdown(markdown_text: str) -> str:
+    """Render a whole markdown document to an HTML fragment."""
+    return "\n".join(render_lines(markdown_text.split("\n")))
+
+
+class IncrementalMarkdownRenderer:
+    """
+    Renders a growing markdown document, re-rendering only its unfinished tail.
+
+    Complete lines are committed once no list can still extend them; when the
+    new text does not extend the previous one, rendering starts over.
+    """
+
+    def __init__(self):
+        self._source = ""
+        self._html = ""
+
+    def render(self, markdown_text: str) -> str:
+        if not markdown_text.startswith(self._source):
+            self._source, self._html = "", ""
+
+        lines = markdown_text[len(self._source):].split("\n")
+        pieces = render_lines(lines)
+
+        # Commit up to the last complete line that is not a list item (lists may still grow)
+        commit = 0
+        for i in range(len(lines) - 2, -1, -1):
+            if not _LIST_ITEM.match(lines[i]):
+                commit = i + 1
+                break
+
+        if commit:
+            committed_html = "\n".join(pieces[:commit])
+            self._html = f"{self._html}\n{committed_html}" if self._source else committed_html
+            self._source += "\n".join(lines[:commit]) + "\n"
+            pieces = pieces[commit:]
+
+        tail_html = "\n".join(pieces)
+        if not self._source:
+            return tail_html
+        return f"{self._html}\n{tail_html}"
@@ -0,0 +1,313 @@
+"""
+LMStudio Endpoint Pool
+======================
+Spreads model calls over several OpenAI-compatible servers (e.g. a few
+machines running LM Studio with the same model loaded).
+
+- Each call goes to the healthy endpoint with the fewest requests in flight.
+- An endpoint that fails (connection error or 5xx) is ejected; a background
+  health check probes `GET /models` and re-admits it once it answers again.
+- Each endpoint has one persistent HTTP client shared by every agent.
+
+`PooledLMStudio` is a drop-in replacement for `LMStudio` that routes every
+request through a pool.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import threading
+import time
+
+import httpx
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, OpenAI
+
+from agno.exceptions import ModelProviderError
+from agno.models.lmstudio import LMStudio
+
+from shared.stage_metrics import count_retry
+
+
+@dataclass
+class Endpoint:
+    """One OpenAI-compatible server and its load/health state."""
+    base_url: str
+    http_client: httpx.Client
+    client: OpenAI
+    in_flight: int = 0
+    healthy: bool = True
+    consecutive_failures: int = 0
+    requests: int = 0
+    failures: int = 0
+    ejected_at: Optional[float] = None
+    _async_client: Optional[AsyncOpenAI] = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Connection problems and server errors count against an endpoint; client errors do not."""
+    cause = error.__cause__ if isinstance(error, ModelProviderError) and error.__cause__ else error
+    if isinstance(cause, APIConnectionError):  # Includes timeouts
+        return True
+    if isinstance(cause, APIStatusError):
+        return cause.status_code >= 500
+    if isinstance(error, ModelProviderError):
+        return (getattr(error, "status_code", None) or 0) >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class EndpointPool:
+    """Least-in-flight load balancer with passive ejection and active re-admission."""
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        api_key: str = "lm-studio",
+        eject_after: int = 1,
+        health_check_interval: float = 5.0,
+        timeout: float = 600.0,
+        max_connections: int = 32,
+    ):
+        if not base_urls:
+            raise ValueError("EndpointPool needs at least one base URL")
+        self.api_key = api_key
+        self.eject_after = eject_after
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.endpoints = [self._make_endpoint(url.rstrip("/")) for url in base_urls]
+        self._lock = threading.Lock()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _make_endpoint(self, base_url: str) -> Endpoint:
+        http_client = httpx.Client(timeout=self.timeout, limits=self._limits)
+        return Endpoint(
+            base_url=base_url,
+            http_client=http_client,
+            # The pool retries on another endpoint instead of the SDK retrying the same one
+            client=OpenAI(base_url=base_url, api_key=self.api_key, max_retries=0, http_client=http_client),
+        )
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "EndpointPool":
+        # Agents are deep-copied for concurrent runs; they must keep sharing one pool
+        return self
+
+    # -------------------------------------------------------------------------
+    # Selection
+    # -------------------------------------------------------------------------
+
+    def _choose(self, exclude: Optional[List[Endpoint]] = None) -> Endpoint:
+        exclude = exclude or []
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+            if not candidates:
+                # Everything is ejected: fail open rather than refusing all work
+                candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            endpoint = min(candidates, key=lambda e: (e.in_flight, e.requests))
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, error: Optional[BaseException]) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+            if error is None:
+                endpoint.consecutive_failures = 0
+                return
+            if not is_endpoint_failure(error):
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.healthy and endpoint.consecutive_failures >= self.eject_after:
+                endpoint.healthy = False
+                endpoint.ejected_at = time.time()
+        if not endpoint.healthy:
+            self._start_health_checks()
+
+    @contextmanager
+    def lease(self, exclude: Optional[List[Endpoint]] = None) -> Iterator[Endpoint]:
+        """Reserve the least-loaded healthy endpoint for one request."""
+        endpoint = self._choose(exclude)
+        try:
+            yield endpoint
+        except BaseException as e:
+            self._release(endpoint, e)
+            raise
+        self._release(endpoint, None)
+
+    @asynccontextmanager
+    async def alease(self, exclude: Optional[List[Endpoint]] = None) -> AsyncIterator[Endpoint]:
+        endpoint = self._choose(exclude)
+        try:
+            yield endpoint
+        except BaseException as e:
+            self._release(endpoint, e)
+            raise
+        self._release(endpoint, None)
+
+    def async_client(self, endpoint: Endpoint) -> AsyncOpenAI:
+        if endpoint._async_client is None:
+            endpoint._async_client = AsyncOpenAI(
+                base_url=endpoint.base_url,
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=httpx.AsyncClient(timeout=self.timeout, limits=self._limits),
+            )
+        return endpoint._async_client
+
+    # -------------------------------------------------------------------------
+    # Health checks
+    # -------------------------------------------------------------------------
+
+    def check(self, endpoint: Endpoint) -> bool:
+        """Probe an endpoint's /models route."""
+        try:
+            response = endpoint.http_client.get(
+                f"{endpoint.base_url}/models",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=min(5.0, self.timeout),
+            )
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def _start_health_checks(self) -> None:
+        with self._lock:
+            if self._health_thread is not None and self._health_thread.is_alive():
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, name="lmstudio-health", daemon=True)
+            self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        """Re-admit ejected endpoints once they respond; exits when all are healthy."""
+        while True:
+            time.sleep(self.health_check_interval)
+            ejected = [e for e in self.endpoints if not e.healthy]
+            if not ejected:
+                return
+            for endpoint in ejected:
+                if self.check(endpoint):
+                    with self._lock:
+                        endpoint.healthy = True
+                        endpoint.consecutive_failures = 0
+                        endpoint.ejected_at = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [endpoint.stats() for endpoint in self.endpoints]
+
+
+# The endpoint chosen for the request currently being made (per thread / task)
+_current_endpoint: ContextVar[Optional[Endpoint]] = ContextVar("current_endpoint", default=None)
+
+
+@dataclass
+class PooledLMStudio(LMStudio):
+    """LMStudio model whose requests are load-balanced over an EndpointPool."""
+
+    pool: Optional[EndpointPool] = field(default=None, repr=False)
+
+    def get_client(self) -> OpenAI:
+        endpoint = _current_endpoint.get()
+        return endpoint.client if endpoint is not None else super().get_client()
+
+    def get_async_client(self) -> AsyncOpenAI:
+        endpoint = _current_endpoint.get()
+        return self.pool.async_client(endpoint) if endpoint is not None else super().get_async_client()
+
+    def _attempts(self) -> int:
+        return len(self.pool.endpoints) if self.pool else 1
+
+    def invoke(self, *args, **kwargs):
+        if self.pool is None:
+            return super().invoke(*args, **kwargs)
+        tried: List[Endpoint] = []
+        for attempt in range(self._attempts()):
+            try:
+                with self.pool.lease(exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    token = _current_endpoint.set(endpoint)
+                    try:
+                        return super().invoke(*args, **kwargs)
+                    finally:
+                        _current_endpoint.reset(token)
+            except Exception as e:
+                # Retry on another endpoint only when this one is at fault
+                if not is_endpoint_failure(e) or attempt + 1 == self._attempts():
+                    raise
+                count_retry(kwargs.get("run_response"))
+
+    def invoke_stream(self, *args, **kwargs):
+        if self.pool is None:
+            yield from super().invoke_stream(*args, **kwargs)
+            return
+        tried: List[Endpoint] = []
+        for attempt in range(self._attempts()):
+            started = False
+            try:
+                with self.pool.lease(exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    token = _current_endpoint.set(endpoint)
+                    try:
+                        for chunk in super().invoke_stream(*args, **kwargs):
+                            started = True
+                            yield chunk
+                    finally:
+                        _current_endpoint.reset(token)
+                return
+            except Exception as e:
+                # Once output has been streamed the request cannot be replayed elsewhere
+                if started or not is_endpoint_failure(e) or attempt + 1 == self._attempts():
+                    raise
+                count_retry(kwargs.get("run_response"))
+
+    async def ainvoke(self, *args, **kwargs):
+        if self.pool is None:
+            return await super().ainvoke(*args, **kwargs)
+        tried: List[Endpoint] = []
+        for attempt in range(self._attempts()):
+            try:
+                async with self.pool.alease(exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    token = _current_endpoint.set(endpoint)
+                    try:
+                        return await super().ainvoke(*args, **kwargs)
+                    finally:
+                        _current_endpoint.reset(token)
+            except Exception as e:
+                if not is_endpoint_failure(e) or attempt + 1 == self._attempts():
+                    raise
+                count_retry(kwargs.get("run_response"))
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        if self.pool is None:
+            async for chunk in super().ainvoke_stream(*args, **kwargs):
+                yield chunk
+            return
+        tried: List[Endpoint] = []
+        for attempt in range(self._attempts()):
+            started = False
+            try:
+                async with self.pool.alease(exclude=tried) as endpoint:
+                    tried.append(endpoint)
+                    token = _current_endpoint.set(endpoint)
+                    try:
+                        async for chunk in super().ainvoke_stream(*args, **kwargs):
+                            started = True
+                            yield chunk
+                    finally:
+                        _current_endpoint.reset(token)
+                return
+            except Exception as e:
+                if started or not is_endpoint_failure(e) or attempt + 1 == self._attempts():
+                    raise
+                count_retry(kwargs.get("run_response"))
@@ -0,0 +1,165 @@
+"""
+Model Warm-Up
+=============
+Keeps the models loaded on every LM Studio server of the pool, so the first
+evaluation after startup or after an idle period does not pay for a JIT
+model load (or for a reload after LM Studio evicted the model for another):
+
+- At startup each endpoint gets a one-token priming request per model (the
+  default one and every model an agent is routed to), which makes LM Studio
+  load it. Then each agent's static system prompt and tools are sent once to
+  its model with a one-token reply, so their prefixes are prefilled.
+- Whenever an endpoint has had no traffic for `keep_alive_interval`
+  seconds, a one-token ping per model keeps them under LM Studio's idle TTL.
+  A ping slower than `reload_threshold` seconds means a model had been
+  unloaded anyway, so the prefixes are prefilled again.
+- A failed request marks the endpoint "error"; it is warmed again after
+  `retry_interval` seconds.
+
+`state()` reports "cold", "loading", "ready" or "error" per endpoint and
+overall (ready as soon as one endpoint is), for the UI and /ready.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import threading
+import time
+
+if TYPE_CHECKING:
+    from model_pool import Endpoint, EndpointPool
+
+# An agent's static prompt prefix: its model id, system message and tool definitions (OpenAI format)
+Prefix = Tuple[str, str, List[Dict[str, Any]]]
+
+
+@dataclass
+class EndpointWarmth:
+    """Warm-up state of one endpoint."""
+    base_url: str
+    state: str = "cold"
+    load_s: Optional[float] = None  # Duration of the last priming requests (model loads included)
+    prefill_s: Optional[float] = None  # Duration of the last prefix prefill
+    pings: int = 0
+    reloads: int = 0
+    last_ping_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ModelWarmer:
+    """Background priming, prefix prefill and keep-alive pings for every endpoint of a pool."""
+
+    def __init__(
+        self,
+        pool: "EndpointPool",
+        model_id: str,
+        prefixes: List[Prefix],
+        keep_alive_interval: float = 240.0,
+        reload_threshold: float = 5.0,
+        retry_interval: float = 10.0,
+    ):
+        self.pool = pool
+        self.model_id = model_id
+        self.prefixes = prefixes
+        # The default model first, then the models agents are routed to
+        self.models = list(dict.fromkeys([model_id, *(model for model, _, _ in prefixes)]))
+        self.keep_alive_interval = keep_alive_interval
+        self.reload_threshold = reload_threshold
+        self.retry_interval = retry_interval
+        self.status = {endpoint.base_url: EndpointWarmth(endpoint.base_url) for endpoint in pool.endpoints}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "ModelWarmer":
+        """Start one warm-up thread per endpoint (once)."""
+        with self._lock:
+            if self._threads:
+                return self
+            for endpoint in self.pool.endpoints:
+                thread = threading.Thread(
+                    target=self._run, args=(endpoint,), name=f"model-warmup-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # -------------------------------------------------------------------------
+    # Requests
+    # -------------------------------------------------------------------------
+
+    def _request(
+        self, endpoint: "Endpoint", model_id: str, system: Optional[str] = None, tools: Optional[List[Dict]] = None
+    ) -> float:
+        """One request with a one-token reply; returns its duration."""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": "Hi"})
+        kwargs: Dict[str, Any] = {"tools": tools} if tools else {}
+        started = time.perf_counter()
+        endpoint.client.chat.completions.create(model=model_id, messages=messages, max_tokens=1, **kwargs)
+        return time.perf_counter() - started
+
+    def _set(self, endpoint: "Endpoint", **changes: Any) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self.status[endpoint.base_url], name, value)
+
+    def _warm(self, endpoint: "Endpoint") -> None:
+        self._set(endpoint, state="loading", error=None)
+        load_s = sum(self._request(endpoint, model_id) for model_id in self.models)
+        self._set(endpoint, load_s=round(load_s, 3))
+        self._prefill(endpoint)
+        self._set(endpoint, state="ready", last_ping_at=time.time())
+
+    def _prefill(self, endpoint: "Endpoint") -> None:
+        started = time.perf_counter()
+        for model_id, system, tools in self.prefixes:
+            self._request(endpoint, model_id, system, tools)
+        self._set(endpoint, prefill_s=round(time.perf_counter() - started, 3))
+
+    def _ping(self, endpoint: "Endpoint") -> None:
+        seconds = max(self._request(endpoint, model_id) for model_id in self.models)
+        with self._lock:
+            status = self.status[endpoint.base_url]
+            status.pings += 1
+            status.last_ping_at = time.time()
+            reloaded = seconds > self.reload_threshold
+            if reloaded:
+                status.reloads += 1
+                status.load_s = round(seconds, 3)
+        if reloaded:
+            self._prefill(endpoint)
+
+    # -------------------------------------------------------------------------
+    # Loop
+    # -------------------------------------------------------------------------
+
+    def _run(self, endpoint: "Endpoint") -> None:
+        seen_requests, idle_since = endpoint.requests, time.monotonic()
+        tick = max(0.05, min(self.keep_alive_interval / 4, 5.0)) if self.keep_alive_interval > 0 else 5.0
+        while not self._stop.is_set():
+            try:
+                if self.status[endpoint.base_url].state != "ready":
+                    self._warm(endpoint)
+                    idle_since = time.monotonic()
+                elif endpoint.requests != seen_requests:
+                    # Real traffic keeps the model loaded; count idle time from now
+                    seen_requests, idle_since = endpoint.requests, time.monotonic()
+                elif self.keep_alive_interval > 0 and time.monotonic() - idle_since >= self.keep_alive_interval:
+                    self._ping(endpoint)
+                    idle_since = time.monotonic()
+            except Exception as e:
+                self._set(endpoint, state="error", error=str(e)[:300])
+                self._stop.wait(self.retry_interval)
+                continue
+            self._stop.wait(tick)
+
+    def state(self) -> Dict[str, Any]:
+        """Overall state ("ready" if any endpoint is) and the state of every endpoint."""
+        with self._lock:
+            endpoints = [asdict(status) for status in self.status.values()]
+        states = {endpoint["state"] for endpoint in endpoints}
+        overall = next((state for state in ("ready", "loading", "error") if state in states), "cold")
+        return {"state": overall, "model": self.model_id, "models": self.models, "endpoints": endpoints}
@@ -0,0 +1,241 @@
+"""
+ISP Way Quote Verifier
+======================
+Checks every `**ISP Way Quote:**` in the analyst's output against the ISP Way
+document and replaces quotes that are not in it with the closest real
+sentence, so a hallucinated or paraphrased quote never reaches the strategy
+developer and no LLM retry is needed.
+
+Two precomputed indexes over the document's sentences (every string of the
+`knowledge_base`, split into sentences, plus each "point:" joined with each
+of its details):
+
+- exact: all sentences as one normalized (lowercase words, no punctuation)
+  string, one sentence per line, so "is this quote verbatim?" is a single
+  substring search (for an elided quote, one search for its parts in order
+  within a line);
+- near: an inverted index of word trigrams. A quote's trigrams vote for the
+  sentences that contain them; the most votes win, the shortest sentence on
+  a tie.
+
+A quote is only snapped when its best sentence reaches `min_score` (Dice
+coefficient of their trigrams); below that, e.g. an invented quote that
+shares a trigram or two with some sentence, it is left as written and
+reported "missing". Quotes sharing no trigram with the document fall back
+to BM25 over the quote and its growth area (via `IspWayIndex`), which only
+suggests where to look (`path` of the missing check). Both indexes are
+rebuilt when the document changes.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+import json
+import os
+import re
+import threading
+
+from isp_way_index import IspWayIndex, extract_passages
+
+# "**ISP Way Quote:** "text"" (the value runs to the end of the line)
+QUOTE_FIELD = re.compile(r"^(\*\*ISP Way Quote:?\*\*:?[ \t]*)(.*)$", re.MULTILINE | re.IGNORECASE)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"“])")
+_ELLIPSIS = re.compile(r"\s*(?:\.\.\.|…)\s*")
+_BLOCK_END = re.compile(r"^(?:#|\*\*ISP Way Quote)", re.MULTILINE | re.IGNORECASE)
+_OPENING_QUOTES = "\"“”'‘’"
+_CLOSING = {'"': '"', "“": "”", "”": "”", "'": "'", "‘": "’", "’": "’"}
+
+
+def normalize(text: str) -> str:
+    """Lowercase words only, single-spaced: case, punctuation and whitespace don't matter."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+def _ngrams(words: List[str], n: int) -> Set[Tuple[str, ...]]:
+    n = min(n, len(words))
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)} if n else set()
+
+
+@dataclass
+class Sentence:
+    """One quotable sentence of the ISP Way document."""
+    path: str
+    text: str
+
+
+@dataclass
+class QuoteCheck:
+    """Outcome for one quote: "exact", "snapped" (replaced) or "missing" (no sentence close enough)."""
+    quote: str
+    status: str
+    replacement: Optional[str] = None
+    path: Optional[str] = None
+    score: float = 1.0
+
+
+@dataclass
+class Verification:
+    """The analysis with every quote verified, and the check for each quote."""
+    text: str
+    checks: List[QuoteCheck]
+
+    @property
+    def snapped(self) -> int:
+        return sum(check.status == "snapped" for check in self.checks)
+
+
+def split_quote(value: str) -> Tuple[str, str]:
+    """Split a field value into the quote (without its quotation marks) and any text after it."""
+    value = value.strip()
+    if value and value[0] in _OPENING_QUOTES:
+        end = value.rfind(_CLOSING[value[0]], 1)
+        if end == -1:
+            end = value.rfind(value[0], 1)
+        if end > 0:
+            return value[1:end], value[end + 1:]
+        return value[1:], ""
+    return value, ""
+
+
+def extract_sentences(knowledge_base: Any) -> List[Sentence]:
+    """Every sentence of the knowledge base, plus each point joined with each of its details."""
+    sentences: List[Sentence] = []
+    for passage in extract_passages(knowledge_base):
+        parts = _SENTENCE_END.split(passage.text)
+        for i, part in enumerate(parts):
+            path = passage.path if len(parts) == 1 else f"{passage.path}#{i}"
+            sentences.append(Sentence(path=path, text=part.strip()))
+
+    def walk(node: Any, path: str) -> None:
+        if isinstance(node, dict):
+            point, details = node.get("point"), node.get("details")
+            if isinstance(point, str) and isinstance(details, list):
+                for i, detail in enumerate(details):
+                    if isinstance(detail, str):
+                        sentences.append(Sentence(path=f"{path}.details[{i}]", text=f"{point.strip()} {detail.strip()}"))
+            for key, value in node.items():
+                walk(value, f"{path}.{key}")
+        elif isinstance(node, list):
+            for i, value in enumerate(node):
+                walk(value, f"{path}[{i}]")
+
+    walk(knowledge_base, "knowledge_base")
+    return sentences
+
+
+class QuoteVerifier:
+    """Verifies and snaps ISP Way quotes; indexes are rebuilt when the document changes."""
+
+    def __init__(self, document_path: Path, index: Optional[IspWayIndex] = None, n: int = 3, min_score: float = 0.15):
+        self.document_path = Path(document_path)
+        self.index = index
+        self.n = n
+        self.min_score = min_score
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self.sentences: List[Sentence] = []
+        self._sentence_grams: List[Set[Tuple[str, ...]]] = []
+        self._postings: Dict[Tuple[str, ...], List[int]] = {}
+        self._corpus = ""
+        self._counts: Counter = Counter()
+        self._ensure_fresh()
+
+    def _build(self) -> None:
+        with open(self.document_path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+
+        sentences = extract_sentences(document.get("knowledge_base", {}))
+        normalized = [normalize(sentence.text) for sentence in sentences]
+        grams = [_ngrams(text.split(), self.n) for text in normalized]
+        postings: Dict[Tuple[str, ...], List[int]] = {}
+        for i, sentence_grams in enumerate(grams):
+            for gram in sentence_grams:
+                postings.setdefault(gram, []).append(i)
+
+        self.sentences = sentences
+        self._sentence_grams = grams
+        self._postings = postings
+        # Sentences are separated by newlines so an exact match never spans two of them
+        self._corpus = "\n".join(f" {text} " for text in normalized)
+
+    def _ensure_fresh(self) -> None:
+        """Rebuild the indexes if the document changed on disk since the last build."""
+        mtime_ns = os.stat(self.document_path).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                self._build()
+                self._mtime_ns = mtime_ns
+
+    def is_exact(self, quote: str) -> bool:
+        """True if the quote (or every part of an elided quote, in order) appears verbatim in one sentence."""
+        fragments = [normalize(part) for part in _ELLIPSIS.split(quote)]
+        fragments = [fragment for fragment in fragments if fragment]
+        if len(fragments) <= 1:
+            return bool(fragments) and f" {fragments[0]} " in self._corpus
+        # Each corpus line is one sentence, so the elided words may not cross a newline
+        pattern = " " + " (?:[^\n]* )?".join(re.escape(fragment) for fragment in fragments) + " "
+        return re.search(pattern, self._corpus) is not None
+
+    def closest(self, quote: str, context: str = "") -> Tuple[Optional[Sentence], float]:
+        """The sentence sharing the most word trigrams with the quote (Dice score), or BM25 on no overlap."""
+        quote_grams = _ngrams(normalize(quote).split(), self.n)
+        votes: Counter = Counter()
+        for gram in quote_grams:
+            for i in self._postings.get(gram, ()):
+                votes[i] += 1
+        if votes:
+            # Most shared trigrams first (a truncated quote still belongs to its long sentence), then Dice
+            best = max(votes, key=lambda i: (votes[i], -len(self._sentence_grams[i]), -i))
+            score = 2 * votes[best] / (len(quote_grams) + len(self._sentence_grams[best]))
+            return self.sentences[best], score
+
+        if self.index is not None:
+            for result in self.index.search(f"{quote} {context}", top_k=1):
+                # BM25 returns whole passages; snap to their first sentence
+                sentence = next((s for s in self.sentences if s.path.split("#")[0] == result.path), None)
+                if sentence is not None:
+                    return sentence, 0.0
+        return None, 0.0
+
+    def check(self, quote: str, context: str = "") -> QuoteCheck:
+        """Verify one quote; `context` (e.g. the growth area text) helps when nothing overlaps."""
+        self._ensure_fresh()
+        if self.is_exact(quote):
+            return QuoteCheck(quote=quote, status="exact")
+        sentence, score = self.closest(quote, context)
+        if sentence is None or score < self.min_score:
+            # Too little in common to be the same sentence: keep the quote, report it
+            path = sentence.path if sentence is not None else None
+            return QuoteCheck(quote=quote, status="missing", path=path, score=round(score, 3))
+        return QuoteCheck(quote=quote, status="snapped", replacement=sentence.text, path=sentence.path, score=round(score, 3))
+
+    def verify(self, analysis: str) -> Verification:
+        """Check every `**ISP Way Quote:**` field, replacing quotes not found in the document."""
+        checks: List[QuoteCheck] = []
+
+        def replace(match: re.Match) -> str:
+            quote, rest = split_quote(match.group(2))
+            # The rest of the growth area block (current practice, gap) up to the next quote or heading
+            following = _BLOCK_END.search(analysis, match.end())
+            context = analysis[match.end():following.start() if following else len(analysis)]
+            check = self.check(quote, context)
+            checks.append(check)
+            if check.status != "snapped":
+                return match.group(0)
+            return f'{match.group(1)}"{check.replacement}"{rest}'
+
+        text = QUOTE_FIELD.sub(replace, analysis)
+        with self._lock:
+            self._counts.update(check.status for check in checks)
+        return Verification(text=text, checks=checks)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of indexed sentences and of quotes checked, by outcome."""
+        with self._lock:
+            counts = {status: self._counts[status] for status in ("exact", "snapped", "missing")}
+        return {"sentences": len(self.sentences), **counts}
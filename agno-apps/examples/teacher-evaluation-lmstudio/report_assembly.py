@@ -0,0 +1,93 @@
+"""
+Report Assembly
+===============
+Builds the final professional development report in code.
+
+The growth areas and strategies are spliced in verbatim from the analyst and
+developer output, so exact ISP Way quotes always survive. The model is only
+asked to write the Summary and Priority Actions sections, from a compact
+digest of the findings.
+"""
+
+from typing import List, Optional
+import re
+
+from report_parsing import (
+    extract_field,
+    extract_section,
+    heading_title,
+    split_growth_areas,
+    split_strategies,
+)
+
+# "Teacher Evaluation for Ms. Johnson:" (see process_evaluation)
+_TEACHER_NAME = re.compile(r"^Teacher Evaluation for (.+?):", re.MULTILINE)
+
+# Digest lines are capped so the writer prompt stays small
+_MAX_DIGEST_FIELD = 240
+
+
+def extract_teacher_name(evaluation_input: str) -> Optional[str]:
+    """Return the teacher name from the workflow input, if one was given."""
+    match = _TEACHER_NAME.search(evaluation_input)
+    return match.group(1).strip() if match else None
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= _MAX_DIGEST_FIELD else text[:_MAX_DIGEST_FIELD].rstrip() + "..."
+
+
+def build_digest(analyst_output: str, developer_output: str, teacher_name: Optional[str] = None) -> str:
+    """Summarize growth areas and strategies in a few lines for the summary writer."""
+    lines = []
+    if teacher_name:
+        lines.append(f"Teacher: {teacher_name}")
+
+    lines.append("Growth areas:")
+    for i, block in enumerate(split_growth_areas(analyst_output), start=1):
+        gap = extract_field(block, "Gap")
+        lines.append(f"{i}. {heading_title(block)}" + (f" - Gap: {_clip(gap)}" if gap else ""))
+
+    lines.append("Strategies:")
+    for i, block in enumerate(split_strategies(developer_output), start=1):
+        what = extract_field(block, "What it is")
+        lines.append(f"{i}. {heading_title(block)}" + (f" - {_clip(what)}" if what else ""))
+
+    return "\n".join(lines)
+
+
+def assemble_report(
+    analyst_output: str,
+    developer_output: str,
+    writer_output: str,
+    teacher_name: Optional[str] = None,
+) -> str:
+    """Splice the verbatim sections and the writer's Summary/Priority Actions into the report."""
+    growth_areas: List[str] = split_growth_areas(analyst_output) or [analyst_output.strip()]
+    strategies: List[str] = split_strategies(developer_output) or [developer_output.strip()]
+
+    summary = extract_section(writer_output, "Summary")
+    priority_actions = extract_section(writer_output, "Priority Actions")
+    if not summary and not priority_actions:
+        # Writer ignored the format; keep its text rather than dropping it
+        summary = writer_output.strip()
+
+    parts = ["# Professional Development Report"]
+    if teacher_name:
+        parts.append(f"**For {teacher_name}**")
+    parts += [
+        "## Summary",
+        summary,
+        "---",
+        "## Growth Areas & ISP Way Alignment",
+        "\n\n".join(growth_areas),
+        "---",
+        "## Recommended Strategies",
+        "\n\n---\n\n".join(strategies),
+        "---",
+        "## Priority Actions",
+        priority_actions,
+        "---",
+        "*This plan aligns with ISP Way principles and provides actionable steps for professional growth.*",
+    ]
+    return "\n\n".join(part for part in parts if part) + "\n"
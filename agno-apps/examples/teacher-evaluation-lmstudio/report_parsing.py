@@ -0,0 +1,182 @@
+"""
+Report Parsing Helpers
+======================
+Splits the markdown produced by the agents into its numbered sections so the
+workflow can process growth areas and strategies individually, either from a
+finished output or incrementally while it streams (`GrowthAreaParser`).
+"""
+
+from typing import List
+import re
+
+# "## Growth Area 2: Student Collaboration"
+GROWTH_AREA_HEADING = re.compile(r"^##[ \t]*Growth Area[ \t]+\d+\b.*$", re.MULTILINE | re.IGNORECASE)
+
+# "## Strategy 1: Think-Pair-Share"
+STRATEGY_HEADING = re.compile(r"^(##[ \t]*Strategy[ \t]+)\d+", re.MULTILINE | re.IGNORECASE)
+
+# "**Step 3:** Model the routine"
+STEP_LINE = re.compile(r"^\*\*Step[ \t]+\d+:?\*\*", re.MULTILINE | re.IGNORECASE)
+
+# Any level-1/level-2 heading ends the current section
+SECTION_BREAK = re.compile(r"^#{1,2}[ \t]", re.MULTILINE)
+
+# A bullet point ("- ..." or "* ...")
+BULLET_LINE = re.compile(r"^[ \t]*[-*][ \t]+\S", re.MULTILINE)
+
+# Fields every growth area must have before it can be developed, in the analyst's order
+GROWTH_AREA_FIELDS = ("ISP Way Quote", "Current Practice", "Gap")
+
+
+def split_growth_areas(analysis: str) -> List[str]:
+    """
+    Return each `## Growth Area N` block of the analyst's output, in order.
+
+    A block runs from its heading up to the next level-1/2 heading (or the end
+    of the text). Returns an empty list when no growth area heading is found.
+    """
+    blocks = []
+    for match in GROWTH_AREA_HEADING.finditer(analysis):
+        next_break = SECTION_BREAK.search(analysis, match.end())
+        end = next_break.start() if next_break else len(analysis)
+        blocks.append(analysis[match.start():end].strip())
+    return blocks
+
+
+def merge_strategies(strategy_outputs: List[str]) -> str:
+    """Join independently generated strategy sections, renumbering them 1..N in order."""
+    merged = "\n\n".join(output.strip() for output in strategy_outputs if output and output.strip())
+
+    counter = 0
+
+    def renumber(match: re.Match) -> str:
+        nonlocal counter
+        counter += 1
+        return f"{match.group(1)}{counter}"
+
+    return STRATEGY_HEADING.sub(renumber, merged)
+
+
+def split_strategies(strategies: str) -> List[str]:
+    """Return each `## Strategy N` block of the developer's output, in order."""
+    blocks = []
+    for match in STRATEGY_HEADING.finditer(strategies):
+        next_break = SECTION_BREAK.search(strategies, match.end())
+        end = next_break.start() if next_break else len(strategies)
+        blocks.append(strategies[match.start():end].strip().rstrip("-").strip())
+    return blocks
+
+
+def heading_title(block: str) -> str:
+    """Return the text after `N:` in a block's heading, e.g. 'Student Collaboration'."""
+    heading = block.splitlines()[0] if block else ""
+    return heading.split(":", 1)[1].strip() if ":" in heading else heading.lstrip("#").strip()
+
+
+def extract_field(block: str, label: str) -> str:
+    """
+    Return the text of a `**Label:**` field in a block.
+
+    Handles both inline values (`**Gap:** text`) and values on the following
+    non-empty line (`**What it is:**` then the text).
+    """
+    pattern = re.compile(rf"^\*\*{re.escape(label)}:?\*\*:?[ \t]*(.*)$", re.MULTILINE | re.IGNORECASE)
+    match = pattern.search(block)
+    if not match:
+        return ""
+    if match.group(1).strip():
+        return match.group(1).strip()
+    for line in block[match.end():].splitlines():
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+def extract_section(text: str, title: str) -> str:
+    """Return the body of the `## Title` section of a markdown document."""
+    match = re.search(rf"^##[ \t]*{re.escape(title)}[ \t]*$", text, re.MULTILINE | re.IGNORECASE)
+    if not match:
+        return ""
+    next_break = SECTION_BREAK.search(text, match.end())
+    end = next_break.start() if next_break else len(text)
+    return text[match.end():end].strip().rstrip("-").strip()
+
+
+def growth_area_summary(block: str) -> str:
+    """The teacher-independent part of a growth area: its title, ISP Way quote and gap."""
+    parts = [heading_title(block), extract_field(block, "ISP Way Quote"), extract_field(block, "Gap")]
+    return " ".join(part for part in parts if part) or block
+
+
+def is_complete_strategy(text: str) -> bool:
+    """True for exactly one strategy with a description and at least three implementation steps."""
+    blocks = split_strategies(text)
+    return len(blocks) == 1 and bool(extract_field(blocks[0], "What it is")) and len(STEP_LINE.findall(blocks[0])) >= 3
+
+
+def is_complete_analysis(text: str) -> bool:
+    """True if the analysis has at least one growth area and every growth area has all its fields."""
+    blocks = split_growth_areas(text)
+    return bool(blocks) and all(extract_field(block, label) for block in blocks for label in GROWTH_AREA_FIELDS)
+
+
+def has_bullets(text: str) -> bool:
+    """True if the text has at least one bullet point."""
+    return BULLET_LINE.search(text) is not None
+
+
+def has_sections(text: str, *titles: str) -> bool:
+    """True if the markdown has a non-empty `## Title` section for every title."""
+    return all(extract_section(text, title) for title in titles)
+
+
+def _field_closed(block: str, label: str) -> bool:
+    """True if a `**Label:**` field has a value that ends in a blank line (or a `---` rule)."""
+    pattern = re.compile(rf"^\*\*{re.escape(label)}:?\*\*:?[ \t]*", re.MULTILINE | re.IGNORECASE)
+    match = pattern.search(block)
+    return bool(match) and re.search(r"\S.*\n[ \t]*(?:\n|-{3,})", block[match.end():]) is not None
+
+
+class GrowthAreaParser:
+    """
+    Finds the `## Growth Area N` blocks of the analyst's output while it streams.
+
+    `feed()` returns the blocks that closed with the new text: a block is closed
+    when the next level-1/2 heading starts, or once its quote, current practice
+    and gap are all written (the gap followed by a blank line). `close()` returns
+    the rest when the stream ends, and the whole output as one block if it had
+    no growth area headings (as `split_growth_areas(...) or [analysis]`).
+    A block is returned once, as it was when it closed.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = 0
+
+    def feed(self, delta: str) -> List[str]:
+        self.text += delta
+        return self._take(final=False)
+
+    def close(self) -> List[str]:
+        blocks = self._take(final=True)
+        if not self.emitted and not blocks and self.text.strip():
+            self.emitted = 1
+            return [self.text]
+        return blocks
+
+    def _take(self, final: bool) -> List[str]:
+        matches = list(GROWTH_AREA_HEADING.finditer(self.text))
+        blocks = []
+        for match in matches[self.emitted:]:
+            next_break = SECTION_BREAK.search(self.text, match.end())
+            end = next_break.start() if next_break else len(self.text)
+            block = self.text[match.start():end]
+            # A heading still on its first line may be incomplete ("## Growth Area 1: Stud")
+            complete = next_break is not None or final or (
+                "\n" in block and all(_field_closed(block, label) for label in GROWTH_AREA_FIELDS)
+            )
+            if not complete:
+                break
+            blocks.append(block.strip())
+        self.emitted += len(blocks)
+        return blocks
@@ -0,0 +1,164 @@
+"""
+Request Queue
+=============
+Admission control in front of the report pipeline, so concurrent users share
+the local model fairly instead of piling up on it:
+
+- At most `slots` pipelines run at once; up to `max_waiting` more wait, and
+  anything beyond that is rejected right away (`QueueFull`).
+- Waiting requests are served by lane priority ("interactive" before
+  "batch"), oldest first within a lane.
+- A user never has more than `per_user` pipelines running; their other
+  requests wait without holding back other users.
+- Releasing a waiting ticket (e.g. the browser tab was closed) removes it
+  from the queue; releasing a running one frees its slot for the next request.
+"""
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+import threading
+import time
+
+# Lanes, highest priority first
+LANES: Tuple[str, ...] = ("interactive", "batch")
+
+
+class QueueFull(Exception):
+    """Raised when a request arrives while the waiting list is full."""
+
+
+@dataclass(eq=False)
+class Ticket:
+    """One request's place in the queue."""
+    user: str
+    lane: str
+    queue: "RequestQueue" = field(repr=False)
+    state: str = "waiting"  # "waiting", "running", "done" or "cancelled"
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the ticket runs (True) or the timeout expires (False)."""
+        return self.queue._wait(self, timeout)
+
+    @property
+    def position(self) -> int:
+        """1-based place among the waiting requests (0 once running)."""
+        return self.queue._position(self)
+
+    def release(self, completed: bool = True) -> None:
+        """Leave the queue or free the running slot; `completed=False` counts it as cancelled."""
+        self.queue._release(self, completed)
+
+
+class RequestQueue:
+    """Bounded, prioritized queue with a per-user cap on running requests."""
+
+    def __init__(self, slots: int = 1, max_waiting: int = 20, per_user: int = 1, lanes: Tuple[str, ...] = LANES):
+        self.slots = max(1, slots)
+        self.max_waiting = max_waiting
+        self.per_user = max(1, per_user)
+        self.lanes = lanes
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, Deque[Ticket]] = {lane: deque() for lane in lanes}
+        self._running_by_user: Counter = Counter()
+        self._running = 0
+        self._counts: Counter = Counter()
+        self._wait_s = 0.0
+
+    def submit(self, user: str, lane: str = "interactive") -> Ticket:
+        """Queue a request; raises QueueFull when `max_waiting` requests are already waiting."""
+        if lane not in self._waiting:
+            raise ValueError(f"Unknown lane {lane!r}, expected one of {self.lanes}")
+        with self._cond:
+            if sum(len(waiting) for waiting in self._waiting.values()) >= self.max_waiting:
+                self._counts["rejected"] += 1
+                raise QueueFull(f"{self.max_waiting} requests are already waiting")
+            ticket = Ticket(user=user, lane=lane, queue=self)
+            self._waiting[lane].append(ticket)
+            self._counts["submitted"] += 1
+            self._dispatch()
+            return ticket
+
+    @contextmanager
+    def acquire(self, user: str, lane: str = "interactive") -> Iterator[Ticket]:
+        """Wait for a slot, hold it for the duration of the block."""
+        ticket = self.submit(user, lane)
+        completed = False
+        try:
+            ticket.wait()
+            yield ticket
+            completed = True
+        finally:
+            ticket.release(completed)
+
+    def _eligible(self) -> Iterator[Ticket]:
+        """Waiting tickets in dispatch order, skipping users at their cap."""
+        for lane in self.lanes:
+            for ticket in self._waiting[lane]:
+                if self._running_by_user[ticket.user] < self.per_user:
+                    yield ticket
+
+    def _dispatch(self) -> None:
+        """Start waiting tickets while slots are free (call with the lock held)."""
+        started = False
+        while self._running < self.slots:
+            ticket = next(self._eligible(), None)
+            if ticket is None:
+                break
+            self._waiting[ticket.lane].remove(ticket)
+            ticket.state = "running"
+            ticket.started_at = time.monotonic()
+            self._running += 1
+            self._running_by_user[ticket.user] += 1
+            self._wait_s += ticket.started_at - ticket.enqueued_at
+            self._counts["started"] += 1
+            started = True
+        if started:
+            self._cond.notify_all()
+
+    def _wait(self, ticket: Ticket, timeout: Optional[float]) -> bool:
+        with self._cond:
+            self._cond.wait_for(lambda: ticket.state != "waiting", timeout)
+            return ticket.state == "running"
+
+    def _position(self, ticket: Ticket) -> int:
+        with self._cond:
+            if ticket.state != "waiting":
+                return 0
+            ahead = 0
+            for lane in self.lanes:
+                for other in self._waiting[lane]:
+                    if other is ticket:
+                        return ahead + 1
+                    ahead += 1
+            return ahead + 1
+
+    def _release(self, ticket: Ticket, completed: bool) -> None:
+        with self._cond:
+            if ticket.state == "waiting":
+                self._waiting[ticket.lane].remove(ticket)
+            elif ticket.state == "running":
+                self._running -= 1
+                self._running_by_user[ticket.user] -= 1
+                if not self._running_by_user[ticket.user]:
+                    del self._running_by_user[ticket.user]
+            else:
+                return
+            ticket.state = "done" if completed and ticket.started_at is not None else "cancelled"
+            self._counts[ticket.state] += 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and totals since startup."""
+        with self._cond:
+            started = self._counts["started"]
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "waiting": {lane: len(waiting) for lane, waiting in self._waiting.items()},
+                **{key: self._counts[key] for key in ("submitted", "started", "done", "cancelled", "rejected")},
+                "avg_wait_s": round(self._wait_s / started, 3) if started else 0.0,
+            }
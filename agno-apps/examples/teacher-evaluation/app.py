@@ -6,19 +6,52 @@ A team of agents that:
 2. Searches the ISP Way document to identify growth areas
 3. Searches online for high-quality teaching strategies
 4. Generates a structured professional development report
+
+The same agents are also available as an explicit workflow that researches
+each growth area in parallel, without a coordinating model.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
-from pydantic import BaseModel, Field
+import asyncio
+import os
+import re
+import sys
+import threading
 import time
+import uuid
 
+# Start of the process's import of this module, for the uptime reported by /ready
+# (set before the third-party imports, so it includes their cost)
+_module_loaded = time.perf_counter()
+
+from pydantic import BaseModel, Field, ValidationError
 from agno.agent import Agent
+from agno.guardrails.base import BaseGuardrail
 from agno.team.team import Team
 from agno.models.google import Gemini
 from agno.os import AgentOS
+from agno.run.base import RunStatus
+from agno.run.team import TeamRunOutput
+from agno.workflow import Workflow
+from fastapi.responses import JSONResponse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import replace
 from dotenv import load_dotenv
-import os
+
+# The modules shared by both apps live in ../shared
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from file_search_registry import DeferredFileSearchStore, FileSearchStoreRegistry
+from shared.model_routing import router_from_env
+from shared.prompt_layout import compact_knowledge_base, system_prompt
+from report_repair import ReportRepair
+from shared.result_cache import agent_fingerprint, cache_from_env, document_hash, hash_parts
+from session_store import store_from_env
+from shared.stage_metrics import metrics_from_env
+from shared.strategy_library import library_from_env
+from url_verifier import grounding_sources, verifier_from_env
 
 # Load environment variables
 load_dotenv()
@@ -28,6 +61,47 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 # Path to the ISP Way document (relative to this file)
 ISP_WAY_DOCUMENT = Path(__file__).parent / "ISP_Way.txt"
 
+# Local registry of File Search stores, keyed by document content hash
+FILE_SEARCH_REGISTRY = Path(
+    os.getenv("FILE_SEARCH_REGISTRY", Path(__file__).parent / ".file_search_stores.json")
+)
+
+# Where the analyst gets the ISP Way from:
+#   "file_search" - Gemini File Search retrieves the relevant passages
+#   "prefix"      - a compact rendering of the whole document is part of the analyst's
+#                   static system prompt, so Gemini's implicit caching discounts it
+ISP_WAY_CONTEXT = os.getenv("ISP_WAY_CONTEXT", "file_search")
+
+# Cache of team, workflow and per-stage results (see result_cache.py for the RESULT_CACHE_* settings)
+result_cache = cache_from_env()
+
+# Researched strategies reused for similar growth areas (see strategy_library.py for STRATEGY_LIBRARY_*)
+strategy_library = library_from_env()
+
+# Grounding and reachability checks of researched source URLs, with a verdict cache (see url_verifier.py for URL_VERIFY_*)
+url_verifier = verifier_from_env()
+
+# Per-agent-run wall time, TTFT, tokens, tool calls and retries (STAGE_METRICS_LOG for JSON lines)
+stage_metrics = metrics_from_env()
+
+# Serve the agent run totals at /metrics/prometheus in the Prometheus text format
+STAGE_METRICS_PROMETHEUS = os.getenv("STAGE_METRICS_PROMETHEUS", "").lower() in ("1", "true", "yes")
+
+# Targeted re-asks for report fields that are still missing or invalid after local repair
+REPORT_REPAIR_REASKS = max(0, int(os.getenv("REPORT_REPAIR_REASKS", "1")))
+
+# Maximum number of growth areas researched at the same time by the workflow
+RESEARCH_CONCURRENCY = max(1, int(os.getenv("RESEARCH_CONCURRENCY", "4")))
+
+# Model of every agent (and the team leader) without a route in MODEL_ROUTES, the larger model
+# workflow stages escalate to when their output fails its check, and their prices in USD per
+# million input/output tokens (check current Gemini pricing; MODEL_PRICES overrides these).
+# See model_routing.py for MODEL_ROUTES, MODEL_ESCALATION and MODEL_ESCALATE_TO.
+DEFAULT_MODEL = "gemini-2.5-flash-lite"
+ESCALATION_MODEL = "gemini-2.5-flash"
+DEFAULT_PRICES = "gemini-2.5-flash-lite=0.10/0.40,gemini-2.5-flash=0.30/2.50"
+model_router = router_from_env(DEFAULT_MODEL, ESCALATION_MODEL, DEFAULT_PRICES)
+
 
 # =============================================================================
 # PYDANTIC MODELS FOR STRUCTURED OUTPUT
@@ -58,38 +132,127 @@ class TeacherDevelopmentReport(BaseModel):
     priority_actions: List[str] = Field(description="Top 3-5 priority actions for immediate implementation")
 
 
+def report_to_markdown(report: TeacherDevelopmentReport) -> str:
+    """Render a structured report as markdown (e.g. for files written by batch runs)."""
+    lines = ["# Professional Development Report"]
+    if report.teacher_name:
+        lines.append(f"**For {report.teacher_name}**")
+    lines += ["", "## Summary", "", report.evaluation_summary, "", "## Growth Areas & ISP Way Alignment"]
+    for area in report.growth_areas:
+        lines += ["", f"### {area.area}", f"**ISP Way Alignment:** {area.isp_way_alignment}", f"**Gap:** {area.current_gap}"]
+    lines += ["", "## Recommended Strategies"]
+    for strategy in report.recommended_strategies:
+        lines += ["", f"### {strategy.name}", strategy.description, ""]
+        lines += [f"{i}. {step}" for i, step in enumerate(strategy.implementation_steps, start=1)]
+        lines += ["", f"*Source:* [{strategy.source_title}]({strategy.source_url})"]
+    lines += ["", "## Priority Actions", ""]
+    lines += [f"{i}. {action}" for i, action in enumerate(report.priority_actions, start=1)]
+    return "\n".join(lines) + "\n"
+
+
+# =============================================================================
+# SHARED GEMINI CLIENT
+# =============================================================================
+
+class SharedClientGemini(Gemini):
+    """
+    Gemini model whose copies all use one client. AgentOS copies the team
+    (with every member's model) for each request and the workflow copies the
+    researcher for each growth area; a copy's client is dropped, so without
+    sharing every run would open new HTTP connection pools.
+    """
+
+    _shared_client = None
+    _shared_lock = threading.Lock()
+
+    def get_client(self):
+        if self.client is None:
+            with SharedClientGemini._shared_lock:
+                if SharedClientGemini._shared_client is None:
+                    SharedClientGemini._shared_client = super().get_client()
+            self.client = SharedClientGemini._shared_client
+        return self.client
+
+
 # =============================================================================
 # FILE SEARCH SETUP FOR ISP WAY DOCUMENT
 # =============================================================================
 
-def create_isp_way_model() -> tuple[Gemini, str]:
+def create_isp_way_model() -> tuple[Gemini, Optional[DeferredFileSearchStore]]:
     """
-    Creates a Gemini model configured with File Search on the ISP Way document.
-    Returns the configured model and the store name for cleanup.
+    Creates a Gemini model that will use File Search on the ISP Way document.
+    Store resolution is deferred: the store is looked up in (or added to) the
+    local registry at server startup, or on the analyst's first run.
+    Returns the model and the deferred store handle (None when the document
+    is in the analyst's prompt instead, ISP_WAY_CONTEXT=prefix).
     """
-    model = Gemini(id="gemini-2.5-flash-lite")
-    
-    # Create a File Search store
-    store = model.create_file_search_store(display_name="ISP Way Documents")
-    
-    # Upload the ISP Way document to the store
-    operation = model.upload_to_file_search_store(
-        file_path=ISP_WAY_DOCUMENT,
-        store_name=store.name,
+    model = SharedClientGemini(id=model_router.model_for("ISP Way Analyst"))
+    if ISP_WAY_CONTEXT == "prefix":
+        return model, None
+
+    store = DeferredFileSearchStore(
+        model=model,
+        document_path=ISP_WAY_DOCUMENT,
+        registry=FileSearchStoreRegistry(FILE_SEARCH_REGISTRY),
         display_name="The ISP Way - Teaching and Learning Philosophy",
     )
-    
-    # Wait for the upload/indexing to complete
-    model.wait_for_operation(operation)
-    
-    # Configure the model to use this File Search store
-    model.file_search_store_names = [store.name]
-    
-    return model, store.name
 
+    return model, store
+
+
+# Create the model; the File Search store is attached once resolved
+isp_way_model, isp_way_store = create_isp_way_model()
+
+
+def ensure_isp_way_store() -> None:
+    """Pre-hook: make sure the File Search store is attached before the analyst runs."""
+    if isp_way_store is not None:
+        isp_way_store.wait()
+
+
+async def await_isp_way_store() -> None:
+    """Wait for the File Search store in a thread, so a cold start does not block the event loop."""
+    if isp_way_store is not None and not isp_way_store.ready:
+        await asyncio.to_thread(isp_way_store.wait)
+
+
+class ResearchSourceCheck(BaseGuardrail):
+    """
+    Post-hook: drop researched strategies whose source URLs are ungrounded or unreachable.
+    A guardrail, so Agno calls `check` in `run()` and `async_check` in `arun()`.
+    """
+
+    def check(self, run_output) -> None:
+        if isinstance(run_output.content, str):
+            run_output.content = url_verifier.verify_text(run_output.content, grounding_sources(run_output)).text
 
-# Create the model with File Search configured
-isp_way_model, isp_way_store_name = create_isp_way_model()
+    async def async_check(self, run_output) -> None:
+        if isinstance(run_output.content, str):
+            verified = await url_verifier.averify_text(run_output.content, grounding_sources(run_output))
+            run_output.content = verified.text
+
+
+class TeamReportRepair(BaseGuardrail):
+    """
+    Post-hook for the team's Report Writer: repairs its output as `write_report` does for
+    the workflow, with the writer's task as the source material (the team shares member
+    interactions, so the task includes the researcher's output and its URLs).
+    A guardrail, so Agno calls `check` in `run()` and `async_check` in `arun()`.
+    """
+
+    @staticmethod
+    def _source(run_output) -> str:
+        return run_output.input.input_content_string() if run_output.input is not None else ""
+
+    def check(self, run_output) -> None:
+        if run_output.status != RunStatus.error:
+            ask = lambda prompt: run_stage(report_fixer, prompt)  # noqa: E731
+            run_output.content = report_repair.repair(run_output.content, self._source(run_output), ask)
+
+    async def async_check(self, run_output) -> None:
+        if run_output.status != RunStatus.error:
+            ask = lambda prompt: arun_stage(report_fixer, prompt)  # noqa: E731
+            run_output.content = await report_repair.arepair(run_output.content, self._source(run_output), ask)
 
 
 # =============================================================================
@@ -97,32 +260,44 @@ isp_way_model, isp_way_store_name = create_isp_way_model()
 # =============================================================================
 
 # Agent 1: ISP Way Analyst
-# Uses File Search to analyze evaluation against ISP Way standards
+# Uses File Search (or the compact document in its prompt) to analyze evaluation against ISP Way standards
+if ISP_WAY_CONTEXT == "prefix":
+    ISP_WAY_ANALYST_INSTRUCTIONS = [
+        "The ISP Way reference below outlines teaching expectations at ISP.",
+        "When given a teacher evaluation, find the relevant standards in the ISP Way reference.",
+    ]
+else:
+    ISP_WAY_ANALYST_INSTRUCTIONS = [
+        "You have access to the ISP Way document via File Search, which outlines teaching expectations at ISP.",
+        "When given a teacher evaluation, search the ISP Way document to find relevant standards.",
+    ]
+ISP_WAY_ANALYST_INSTRUCTIONS += [
+    "Identify specific areas where the teacher's practice does not align with ISP Way expectations.",
+    "Be specific about which ISP Way principles or practices are not being met.",
+    "Focus on actionable growth areas, not general criticism.",
+    "Reference specific sections of the ISP Way in your analysis.",
+]
+ISP_WAY_REFERENCE = compact_knowledge_base(ISP_WAY_DOCUMENT) if ISP_WAY_CONTEXT == "prefix" else None
+
 isp_way_analyst = Agent(
     name="ISP Way Analyst",
     model=isp_way_model,  # Model configured with File Search
+    pre_hooks=[ensure_isp_way_store],
     role="Analyzes teacher evaluations against the ISP Way document to identify areas for growth.",
-    instructions=[
-        "You have access to the ISP Way document via File Search, which outlines teaching expectations at ISP.",
-        "When given a teacher evaluation, search the ISP Way document to find relevant standards.",
-        "Identify specific areas where the teacher's practice does not align with ISP Way expectations.",
-        "Be specific about which ISP Way principles or practices are not being met.",
-        "Focus on actionable growth areas, not general criticism.",
-        "Reference specific sections of the ISP Way in your analysis.",
-    ],
+    instructions=system_prompt(ISP_WAY_ANALYST_INSTRUCTIONS, ISP_WAY_REFERENCE, "ISP WAY REFERENCE"),
     markdown=True,
+    post_hooks=[stage_metrics.record_run, model_router.record_run],
 )
 
 # Agent 2: Strategy Researcher
 # Uses web search to find high-quality teaching strategies
 strategy_researcher = Agent(
     name="Strategy Researcher",
-    model=Gemini(id="gemini-2.5-flash-lite", search=True),  # Built-in web search
+    model=SharedClientGemini(id=model_router.model_for("Strategy Researcher"), search=True),  # Built-in web search
     role="Searches for evidence-based teaching strategies from high-quality educational resources.",
-    instructions=[
-        "CRITICAL: You MUST use the web search tool to find strategies. Do NOT make up or guess URLs.",
-        "CRITICAL: ONLY provide URLs that appear in your actual search results.",
-        "CRITICAL: If you cannot find a URL in your search results, do NOT include that strategy.",
+    instructions=system_prompt([
+        "Use the web search tool to find strategies, and cite only URLs from your search results:",
+        "every source URL is checked against them and strategies with unverified URLs are removed.",
         "",
         "Search for specific, actionable teaching strategies to address identified growth areas.",
         "Focus on high-quality educational sources such as:",
@@ -143,56 +318,262 @@ strategy_researcher = Agent(
         "  3. Provide the name of the strategy",
         "  4. Provide a clear description",
         "  5. Provide step-by-step implementation guidance",
-        "",
-        "VERIFICATION STEPS:",
-        "  - Before providing a URL, verify it appeared in your search results",
-        "  - Do NOT construct URLs based on domain names (e.g., do NOT create edutopia.org/article/...)",
-        "  - Do NOT provide generic homepage URLs (e.g., just edutopia.org)",
-        "  - Each URL must link to a specific article or resource from your search results",
-        "  - If you cannot find a verified URL for a strategy, exclude that strategy from your response",
+        "Each URL must link to a specific article or resource, not a homepage.",
         "",
         "Prioritize strategies that are practical and classroom-ready.",
         "Ensure strategies align with UDL principles when possible.",
-    ],
+    ]),
     markdown=True,
+    # The workflow verifies its research copies explicitly
+    post_hooks=[ResearchSourceCheck(), stage_metrics.record_run, model_router.record_run],
 )
 
 # Agent 3: Report Writer
 # Synthesizes findings into a structured report
 report_writer = Agent(
     name="Report Writer",
-    model=Gemini(id="gemini-2.5-flash-lite"),
+    model=SharedClientGemini(id=model_router.model_for("Report Writer")),
     role="Synthesizes analysis and strategies into a structured professional development report.",
-    instructions=[
+    instructions=system_prompt([
         "Create a comprehensive but concise professional development report.",
         "Ensure all growth areas reference specific ISP Way expectations.",
         "Match each growth area with relevant strategies from the researcher.",
         "Include clear implementation steps for each strategy.",
         "Prioritize actions based on impact and feasibility.",
         "Maintain a supportive, growth-oriented tone throughout.",
-        "",
-        "CRITICAL URL HANDLING:",
-        "- You will receive strategies with URLs from the Strategy Researcher",
-        "- You MUST copy the EXACT URLs provided by the researcher into the source_url field",
-        "- Do NOT modify, shorten, or fabricate URLs",
-        "- Do NOT create URLs that were not provided by the researcher",
-        "- If a strategy from the researcher does not have a URL, do NOT include that strategy",
-        "- The source_url field must contain the EXACT URL string from the researcher's output",
-    ],
+        "Copy each strategy's URL from the researcher's output into source_url exactly as written;",
+        "leave out strategies that have no URL.",
+    ]),
     output_schema=TeacherDevelopmentReport,
     markdown=True,
+    # The workflow repairs its writer's output explicitly (see workflow_report_writer)
+    post_hooks=[TeamReportRepair(), stage_metrics.record_run, model_router.record_run],
+)
+
+# Agent 4: Report Fixer
+# Answers the targeted re-asks for report fields the writer got wrong (see report_repair.py)
+report_fixer = Agent(
+    name="Report Fixer",
+    model=SharedClientGemini(id=model_router.model_for("Report Fixer")),
+    role="Corrects individual fields of a structured professional development report.",
+    instructions=system_prompt([
+        "You correct individual fields of a structured professional development report.",
+        "Return ONLY a JSON object whose keys are the field paths you are asked for",
+        "(e.g. \"recommended_strategies[0].source_url\") and whose values are the corrected values.",
+        "Use only facts and URLs from the source material. Never invent a URL;",
+        "if no URL in the source material fits, use null.",
+    ]),
+    post_hooks=[stage_metrics.record_run, model_router.record_run],
 )
 
+# Turns writer output that is not a valid report into one, field by field
+report_repair = ReportRepair(TeacherDevelopmentReport, max_reasks=REPORT_REPAIR_REASKS)
+
+# Writer for the workflow, without the repair hook: write_report repairs with the full
+# report input as source, also for cached and escalated runs
+workflow_report_writer = report_writer.deep_copy(
+    update={"post_hooks": [stage_metrics.record_run, model_router.record_run]}
+)
+
+
+# =============================================================================
+# RESULT CACHE
+# =============================================================================
+
+def to_cache_value(content):
+    """Structured outputs are cached as plain dicts."""
+    return content.model_dump(mode="json") if isinstance(content, BaseModel) else content
+
+
+def stage_key(agent: Agent, message: str) -> str:
+    model_id, instructions_hash = agent_fingerprint(agent)
+    return result_cache.make_key(agent.name, message, model_id, instructions_hash, document_hash(ISP_WAY_DOCUMENT))
+
+
+def cached_stage(agent: Agent, key: str):
+    cached = result_cache.get(key)
+    if cached is not None and agent.output_schema:
+        try:
+            return agent.output_schema.model_validate(cached)
+        except ValidationError:
+            return None  # Cached before reports were repaired
+    return cached
+
+
+def stage_output(agent: Agent, result, started: float):
+    """Content of a finished run; failures are raised instead of passed on."""
+    content = result.content if hasattr(result, 'content') else str(result)
+    if getattr(result, 'status', None) == RunStatus.error:
+        # Surface the failure instead of caching it or passing it to the next stage
+        stage_metrics.record_failure(agent.name, time.perf_counter() - started, content)
+        raise RuntimeError(f"{agent.name} failed: {content}")
+    return content
+
+
+def stage_content(agent: Agent, key: str, result, started: float):
+    content = stage_output(agent, result, started)
+    result_cache.set(key, to_cache_value(content))
+    return content
+
+
+def escalated(agent: Agent) -> Agent:
+    """Copy of an agent on the escalation model (search and File Search settings kept)."""
+    return agent.deep_copy(update={"model": replace(agent.model, id=model_router.escalation_model)})
+
+
+def run_stage(agent: Agent, message: str):
+    """
+    Run one agent and return its content, reusing a cached result for the same input.
+    Output that fails the agent's quality gate is replaced by a run on the escalation model.
+    """
+    key = stage_key(agent, message)
+    content = cached_stage(agent, key)
+    if content is None:
+        started = time.perf_counter()
+        content = stage_content(agent, key, agent.run(message), started)
+    if model_router.needs_escalation(agent.name, agent.model.id, content):
+        return run_stage(escalated(agent), message)
+    return content
+
+
+async def arun_stage(agent: Agent, message: str):
+    """`run_stage` with `agent.arun`: the event loop serves other requests while the model answers."""
+    key = stage_key(agent, message)
+    content = cached_stage(agent, key)
+    if content is None:
+        started = time.perf_counter()
+        content = stage_content(agent, key, await agent.arun(message), started)
+    if model_router.needs_escalation(agent.name, agent.model.id, content):
+        return await arun_stage(escalated(agent), message)
+    return content
+
+
+def write_report(report_input: str, writer: Optional[Agent] = None) -> TeacherDevelopmentReport:
+    """
+    Run the Report Writer. Output that is not a valid report is repaired (tolerant
+    parsing, local fixes, re-asks for the wrong fields only) instead of regenerated;
+    a report that still fails the writer's quality gate is written again on the
+    escalation model.
+    """
+    writer = writer or workflow_report_writer
+    key = stage_key(writer, report_input)
+    report = cached_stage(writer, key)
+    if report is None:
+        started = time.perf_counter()
+        content = stage_output(writer, writer.run(report_input), started)
+        report = report_repair.repair(content, report_input, lambda prompt: run_stage(report_fixer, prompt))
+        result_cache.set(key, to_cache_value(report))
+    if model_router.needs_escalation(writer.name, writer.model.id, report):
+        return write_report(report_input, escalated(writer))
+    return report
+
+
+async def awrite_report(report_input: str, writer: Optional[Agent] = None) -> TeacherDevelopmentReport:
+    """`write_report` with `arun`."""
+    writer = writer or workflow_report_writer
+    key = stage_key(writer, report_input)
+    report = cached_stage(writer, key)
+    if report is None:
+        started = time.perf_counter()
+        content = stage_output(writer, await writer.arun(report_input), started)
+        report = await report_repair.arepair(content, report_input, lambda prompt: arun_stage(report_fixer, prompt))
+        result_cache.set(key, to_cache_value(report))
+    if model_router.needs_escalation(writer.name, writer.model.id, report):
+        return await awrite_report(report_input, escalated(writer))
+    return report
+
+
+class CachedTeam(Team):
+    """
+    Team that answers repeated non-streaming text runs (e.g. API calls with
+    stream=false) from the result cache. Streaming, background and media runs
+    always go to the model.
+    """
+
+    def _streaming(self, stream) -> bool:
+        return stream if stream is not None else bool(self.stream)
+
+    def _cache_key(self, input, stream, kwargs) -> Optional[str]:
+        has_media = any(kwargs.get(name) for name in ("images", "audio", "videos", "files"))
+        if self._streaming(stream) or kwargs.get("background") or has_media or not isinstance(input, str):
+            return None
+        fingerprints = hash_parts(
+            part for agent in [self, *self.members] for part in agent_fingerprint(agent)
+        )
+        return result_cache.make_key(
+            f"team:{self.name}", input, self.model.id, fingerprints, document_hash(ISP_WAY_DOCUMENT)
+        )
+
+    def _cached_output(self, content, kwargs) -> TeamRunOutput:
+        return TeamRunOutput(
+            run_id=str(uuid.uuid4()),
+            team_id=self.id,
+            team_name=self.name,
+            session_id=kwargs.get("session_id"),
+            user_id=kwargs.get("user_id"),
+            content=content,
+            status=RunStatus.completed,
+            metadata={"cache_hit": True},
+        )
+
+    def _store(self, key: str, output) -> None:
+        if getattr(output, 'status', None) != RunStatus.error and output.content is not None:
+            result_cache.set(key, to_cache_value(output.content))
+
+    def run(self, input, *, stream=None, **kwargs):
+        key = self._cache_key(input, stream, kwargs)
+        if key is None:
+            return super().run(input, stream=stream, **kwargs)
+        cached = result_cache.get(key)
+        if cached is not None:
+            return self._cached_output(cached, kwargs)
+        output = super().run(input, stream=False, **kwargs)
+        self._store(key, output)
+        return output
+
+    def arun(self, input, *, stream=None, **kwargs):
+        # Every async path waits for the File Search store first, so the analyst's
+        # (blocking) pre-hook never stalls the event loop on a cold start
+        key = self._cache_key(input, stream, kwargs)
+        if key is not None:
+            return self._arun_cached(key, input, **kwargs)
+        if self._streaming(stream):
+            return self._astream(input, stream=stream, **kwargs)
+        return self._arun(input, stream=stream, **kwargs)
+
+    async def _arun(self, input, **kwargs):
+        await await_isp_way_store()
+        return await super().arun(input, **kwargs)
+
+    async def _astream(self, input, **kwargs):
+        await await_isp_way_store()
+        async for event in super().arun(input, **kwargs):
+            yield event
+
+    async def _arun_cached(self, key: str, input, **kwargs):
+        cached = result_cache.get(key)
+        if cached is not None:
+            return self._cached_output(cached, kwargs)
+        await await_isp_way_store()
+        output = await super().arun(input, stream=False, **kwargs)
+        self._store(key, output)
+        return output
+
 
 # =============================================================================
 # TEAM CONFIGURATION
 # =============================================================================
 
-teacher_evaluation_team = Team(
+def count_team_evaluation(run_output) -> None:
+    """Post-hook: a finished team run is one evaluation, for the per-evaluation route totals."""
+    model_router.count_evaluation()
+
+
+teacher_evaluation_team = CachedTeam(
     name="Teacher Evaluation Team",
-    model=Gemini(id="gemini-2.5-flash-lite"),
+    model=SharedClientGemini(id=model_router.model_for("Teacher Evaluation Team")),  # The coordinator
     members=[isp_way_analyst, strategy_researcher, report_writer],
-    instructions=[
+    instructions=system_prompt([
         "You are a team that helps teachers grow professionally based on evaluation feedback.",
         "",
         "WORKFLOW:",
@@ -201,8 +582,8 @@ teacher_evaluation_team = Team(
         "",
         "2. Then, for each growth area identified, ask the Strategy Researcher to find",
         "   specific, evidence-based strategies from high-quality educational resources.",
-        "   CRITICAL: The researcher MUST use web search and ONLY provide URLs that appear",
-        "   in actual search results. No made-up or constructed URLs are acceptable.",
+        "   Delegate all growth areas in the same response (one task per growth area)",
+        "   so they are researched in parallel.",
         "",
         "3. Finally, ask the Report Writer to synthesize everything into a structured",
         "   professional development report with:",
@@ -210,8 +591,7 @@ teacher_evaluation_team = Team(
         "   - Growth areas with ISP Way alignment",
         "   - Recommended strategies with implementation steps and sources",
         "   - Priority actions for immediate focus",
-        "   CRITICAL: The Report Writer must use the EXACT URLs provided by the Strategy Researcher.",
-        "   Do not allow the Report Writer to modify or fabricate URLs.",
+        "   The Report Writer must use the exact URLs from the Strategy Researcher.",
         "",
         "4. Ensure the final output matches the TeacherDevelopmentReport structure:",
         "   - teacher_name (optional)",
@@ -223,13 +603,268 @@ teacher_evaluation_team = Team(
         "IMPORTANT:",
         "- Be specific and actionable in all recommendations.",
         "- Maintain a supportive, growth-oriented tone.",
-        "- Ensure all strategies have proper source attribution with VERIFIED URLs from search results.",
+        "- Ensure all strategies have proper source attribution.",
         "- Focus on practical, classroom-ready solutions.",
-        "- Do NOT accept strategies without verified URLs from actual web search results.",
-    ],
+    ]),
     add_member_tools_to_context=True,
+    # Members see the earlier members' outputs: the Report Writer's task then holds the research
+    # its repair hook checks the source URLs against
+    share_member_interactions=True,
     markdown=True,
     show_members_responses=True,
+    post_hooks=[stage_metrics.record_run, model_router.record_run, count_team_evaluation],
+)
+
+
+# =============================================================================
+# WORKFLOW CONFIGURATION (ALTERNATIVE TO THE TEAM)
+# =============================================================================
+# Runs the same three agents in a fixed order without a coordinator model:
+# analysis -> one research run per growth area (concurrently) -> structured report.
+
+GROWTH_AREA_FORMAT = [
+    "",
+    "OUTPUT FORMAT: start each growth area with a heading of the form",
+    "## Growth Area N: [Specific Area Name]",
+    "followed by the ISP Way alignment and the current gap for that area.",
+]
+
+# Analyst variant whose output can be split into one block per growth area
+isp_way_workflow_analyst = isp_way_analyst.deep_copy(
+    update={
+        "model": isp_way_model,
+        "instructions": system_prompt(
+            ISP_WAY_ANALYST_INSTRUCTIONS + GROWTH_AREA_FORMAT, ISP_WAY_REFERENCE, "ISP WAY REFERENCE"
+        ),
+    }
+)
+
+SOURCE_URL = re.compile(r"https?://[^\s)\]>]+/[^\s)\]>]+")
+
+GROWTH_AREA_HEADING = re.compile(r"^#{2,3}[ \t]*Growth Area[ \t]+\d+\b.*$", re.MULTILINE | re.IGNORECASE)
+
+# Output checks of the workflow stages: a stage that fails its check on a model other than
+# ESCALATION_MODEL is re-run on it (team delegations are not checked)
+model_router.add_gate("ISP Way Analyst", lambda text: isinstance(text, str) and GROWTH_AREA_HEADING.search(text) is not None)
+model_router.add_gate("Strategy Researcher", lambda text: isinstance(text, str) and SOURCE_URL.search(text) is not None)
+model_router.add_gate(
+    "Report Writer", lambda report: bool(report.growth_areas and report.recommended_strategies and report.priority_actions)
+)
+
+
+def split_growth_areas(analysis: str) -> List[str]:
+    """Return each `## Growth Area N` block of the analysis, or the whole analysis if none are found."""
+    starts = [match.start() for match in GROWTH_AREA_HEADING.finditer(analysis)]
+    if not starts:
+        return [analysis]
+    ends = starts[1:] + [len(analysis)]
+    return [analysis[start:end].strip() for start, end in zip(starts, ends)]
+
+
+def research_prompt(growth_area: str) -> str:
+    return f"Find evidence-based strategies for this growth area:\n\n{growth_area}"
+
+
+def keep_strategies(growth_area: str, strategies) -> None:
+    """Add researched strategies to the library; only strategies with source URLs are worth reusing."""
+    if isinstance(strategies, str) and SOURCE_URL.search(strategies):
+        strategy_library.add(growth_area, strategies)
+
+
+def research_copy() -> Agent:
+    """
+    Researcher for one workflow run: its own copy, so concurrent runs do not share run
+    state, without the verification hook (the workflow verifies explicitly, also for
+    cached research and synchronous runs).
+    """
+    return strategy_researcher.deep_copy(update={"post_hooks": [stage_metrics.record_run, model_router.record_run]})
+
+
+def research_stage(growth_area: str, researcher: Optional[Agent] = None) -> str:
+    """
+    Research one growth area and drop the strategies whose URLs fail verification.
+    Research left without a verified source is done again on the escalation model.
+    """
+    researcher, message = researcher or research_copy(), research_prompt(growth_area)
+    key = stage_key(researcher, message)
+    text, grounding = cached_stage(researcher, key), []
+    if text is None:
+        started = time.perf_counter()
+        result = researcher.run(message)
+        text, grounding = stage_content(researcher, key, result, started), grounding_sources(result)
+    text = url_verifier.verify_text(text, grounding).text if isinstance(text, str) else text
+    if model_router.needs_escalation(researcher.name, researcher.model.id, text):
+        return research_stage(growth_area, escalated(researcher))
+    return text
+
+
+async def aresearch_stage(growth_area: str, researcher: Optional[Agent] = None) -> str:
+    """`research_stage` with `arun` and concurrent URL checks on the event loop."""
+    researcher, message = researcher or research_copy(), research_prompt(growth_area)
+    key = stage_key(researcher, message)
+    text, grounding = cached_stage(researcher, key), []
+    if text is None:
+        started = time.perf_counter()
+        result = await researcher.arun(message)
+        text, grounding = stage_content(researcher, key, result, started), grounding_sources(result)
+    text = (await url_verifier.averify_text(text, grounding)).text if isinstance(text, str) else text
+    if model_router.needs_escalation(researcher.name, researcher.model.id, text):
+        return await aresearch_stage(growth_area, escalated(researcher))
+    return text
+
+
+def research_growth_areas(growth_areas: List[str]) -> List[str]:
+    """
+    Run the strategy researcher once per growth area, concurrently, keeping the input order.
+    Growth areas similar to earlier ones reuse the library's strategies instead of searching.
+    """
+
+    def research(growth_area: str) -> str:
+        match = strategy_library.lookup(growth_area)
+        if match is not None:
+            return match.strategy
+        strategies = research_stage(growth_area)
+        keep_strategies(growth_area, strategies)
+        return strategies
+
+    with ThreadPoolExecutor(max_workers=min(RESEARCH_CONCURRENCY, len(growth_areas))) as pool:
+        return list(pool.map(research, growth_areas))
+
+
+async def aresearch_growth_areas(growth_areas: List[str]) -> List[str]:
+    """`research_growth_areas` as concurrent tasks on the event loop instead of threads."""
+    semaphore = asyncio.Semaphore(RESEARCH_CONCURRENCY)
+
+    async def research(growth_area: str) -> str:
+        match = strategy_library.lookup(growth_area)
+        if match is not None:
+            return match.strategy
+        async with semaphore:
+            strategies = await aresearch_stage(growth_area)
+        keep_strategies(growth_area, strategies)
+        return strategies
+
+    return list(await asyncio.gather(*(research(growth_area) for growth_area in growth_areas)))
+
+
+def report_prompt(user_input: str, analyst_output: str, research_outputs: List[str]) -> str:
+    research_output = "\n\n".join(research_outputs)
+    return f"""
+Teacher evaluation:
+{user_input}
+
+ISP Way analysis:
+{analyst_output}
+
+Strategies from the Strategy Researcher (use these EXACT URLs):
+{research_output}
+"""
+
+
+def step_recorder(timings: Optional[Dict[str, float]]):
+    def record(step: str, started: float) -> None:
+        if timings is not None:
+            timings[step] = timings.get(step, 0.0) + time.perf_counter() - started
+    return record
+
+
+def run_pipeline(user_input: str, timings: Optional[Dict[str, float]] = None) -> TeacherDevelopmentReport:
+    """Analyst -> Researcher (one run per growth area, in parallel) -> Report Writer"""
+    record = step_recorder(timings)
+
+    # Step 1: ISP Way Analysis
+    started = time.perf_counter()
+    analyst_output = run_stage(isp_way_workflow_analyst, user_input)
+    record("analysis", started)
+
+    # Step 2: Strategy Research (fanned out per growth area)
+    started = time.perf_counter()
+    research_outputs = research_growth_areas(split_growth_areas(analyst_output))
+    record("research", started)
+
+    # Step 3: Structured Report
+    started = time.perf_counter()
+    report = write_report(report_prompt(user_input, analyst_output, research_outputs))
+    record("report", started)
+    return report
+
+
+async def arun_pipeline(user_input: str, timings: Optional[Dict[str, float]] = None) -> TeacherDevelopmentReport:
+    """`run_pipeline` on the event loop (used by the workflow when AgentOS serves it)."""
+    record = step_recorder(timings)
+
+    started = time.perf_counter()
+    await await_isp_way_store()
+    analyst_output = await arun_stage(isp_way_workflow_analyst, user_input)
+    record("analysis", started)
+
+    started = time.perf_counter()
+    research_outputs = await aresearch_growth_areas(split_growth_areas(analyst_output))
+    record("research", started)
+
+    started = time.perf_counter()
+    report = await awrite_report(report_prompt(user_input, analyst_output, research_outputs))
+    record("report", started)
+    return report
+
+
+def workflow_key(user_input: str) -> str:
+    agents = [isp_way_workflow_analyst, strategy_researcher, report_writer, report_fixer]
+    fingerprints = hash_parts(part for agent in agents for part in agent_fingerprint(agent))
+    return result_cache.make_key(
+        "workflow", user_input, isp_way_model.id, fingerprints, document_hash(ISP_WAY_DOCUMENT)
+    )
+
+
+def generate_report(user_input: str, timings: Optional[Dict[str, float]] = None) -> TeacherDevelopmentReport:
+    """
+    Return the cached report for this input or run the pipeline.
+    If `timings` is given, the seconds spent in each step are added to it.
+    """
+    key = workflow_key(user_input)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return TeacherDevelopmentReport.model_validate(cached)
+
+    report = run_pipeline(user_input, timings)
+    result_cache.set(key, to_cache_value(report))
+    model_router.count_evaluation()
+    return report
+
+
+async def agenerate_report(user_input: str, timings: Optional[Dict[str, float]] = None) -> TeacherDevelopmentReport:
+    """`generate_report` for async callers."""
+    key = workflow_key(user_input)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return TeacherDevelopmentReport.model_validate(cached)
+
+    report = await arun_pipeline(user_input, timings)
+    result_cache.set(key, to_cache_value(report))
+    model_router.count_evaluation()
+    return report
+
+
+async def workflow_steps(workflow: Workflow, execution_input):
+    """
+    Workflow entry point: returns the cached report or generates a new one.
+    Async, so the workflow runs with `Workflow.arun` (as AgentOS does) without
+    blocking the server; scripts can call `generate_report` directly.
+    """
+
+    from agno.workflow.types import WorkflowExecutionInput
+    if isinstance(execution_input, WorkflowExecutionInput):
+        user_input = execution_input.get_input_as_string()
+    else:
+        user_input = str(execution_input)
+
+    return await agenerate_report(user_input)
+
+
+teacher_evaluation_workflow = Workflow(
+    name="Teacher Evaluation Workflow",
+    description="Analyzes a teacher evaluation, researches each growth area in parallel and writes a structured report",
+    steps=workflow_steps,
 )
 
 
@@ -237,12 +872,145 @@ teacher_evaluation_team = Team(
 # AGENTOS APPLICATION
 # =============================================================================
 
-# Create the AgentOS with the team directly
-agent_os = AgentOS(teams=[teacher_evaluation_team])
+_client_error: Optional[str] = None
+
+
+def final_report(run: Dict[str, Any], members: List[Dict[str, Any]]):
+    """
+    What a compacted run keeps: the TeacherDevelopmentReport, from the workflow run's
+    own content or the Report Writer's member run; otherwise the run's own content.
+    """
+    for content in [run.get("content")] + [member.get("content") for member in reversed(members)]:
+        if isinstance(content, dict):
+            try:
+                return TeacherDevelopmentReport.model_validate(content).model_dump(), "TeacherDevelopmentReport"
+            except ValidationError:
+                continue
+    return run.get("content"), run.get("content_type") or "str"
+
+
+# SQLite storage of AgentOS sessions and runs (SESSION_DB, "off" for none). Runs finished more
+# than SESSION_COMPACT_AFTER seconds ago keep only their report; sessions are deleted after
+# SESSION_MAX_AGE seconds, or oldest first once the database exceeds SESSION_MAX_MB.
+# See session_store.py for SESSION_MAINTENANCE_INTERVAL.
+session_store = store_from_env(final_report, default_path=str(Path(__file__).parent / ".sessions.db"))
+
+
+def warm_up() -> None:
+    """Create the shared Gemini client and start resolving the File Search store."""
+    global _client_error
+    try:
+        isp_way_model.get_client()
+        _client_error = None
+    except Exception as e:
+        _client_error = str(e)
+    if isp_way_store is not None:
+        isp_way_store.start()
+
+
+def readiness() -> Dict[str, Any]:
+    """Whether runs can start without waiting: Gemini client created and File Search store attached."""
+    client = SharedClientGemini._shared_client is not None
+    store = isp_way_store is None or isp_way_store.ready
+    return {
+        "ready": client and store,
+        "model_client": client if _client_error is None else _client_error,
+        "file_search_store": store if isp_way_store is None or isp_way_store.error is None else isp_way_store.error,
+        "uptime_s": round(time.perf_counter() - _module_loaded, 3),
+    }
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm up and start session store maintenance in the background so the app serves immediately."""
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    if session_store is not None:
+        session_store.start()
+    yield
+    if session_store is not None:
+        session_store.stop()
+
+
+# Create the AgentOS with the team and the equivalent workflow
+agent_os = AgentOS(
+    teams=[teacher_evaluation_team],
+    workflows=[teacher_evaluation_workflow],
+    db=session_store.db if session_store is not None else None,
+    lifespan=lifespan,
+)
 
 # Get the FastAPI app for deployment
 app = agent_os.get_app()
 
+
+@app.get("/ready")
+def ready():
+    """200 once the Gemini client and the File Search store are ready, 503 before (see /health for liveness)."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit/miss counters of the result cache."""
+    return result_cache.stats()
+
+
+@app.get("/report-repair/stats")
+def report_repair_stats():
+    """How many reports needed JSON repair, local fixes, re-asks or dropped items."""
+    return report_repair.stats()
+
+
+@app.get("/url-verifier/stats")
+def url_verifier_stats():
+    """URL verdicts, cache hits, fetches and strategies dropped."""
+    return url_verifier.stats()
+
+
+@app.get("/model-routes/stats")
+def model_routes_stats():
+    """Runs, escalations, wall time, tokens and cost per route (agent and model), per evaluation."""
+    return model_router.summary()
+
+
+@app.get("/session-store/stats")
+def session_store_stats():
+    """Sessions and runs stored, compacted runs, database size and maintenance totals."""
+    if session_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **session_store.stats()}
+
+
+@app.get("/strategy-library/stats")
+def strategy_library_stats():
+    """Hits, misses and size of the strategy library."""
+    return strategy_library.stats()
+
+
+if STAGE_METRICS_PROMETHEUS:
+    from fastapi.responses import PlainTextResponse
+
+    # AgentOS already serves its own (database-backed) /metrics route
+    @app.get("/metrics/prometheus", response_class=PlainTextResponse)
+    def prometheus_metrics():
+        """Per-agent run counts, latency, tokens, tool calls and retries for Prometheus."""
+        return stage_metrics.prometheus()
+
+
+def main() -> None:
+    """Serve the app with uvicorn's reloader (the server process imports this module again)."""
+    import uvicorn
+
+    uvicorn.run(
+        "app:app",
+        host=os.getenv("AGENT_OS_HOST", "localhost"),
+        port=int(os.getenv("AGENT_OS_PORT", "7777")),
+        reload=True,
+        app_dir=str(Path(__file__).parent),
+        reload_dirs=[str(Path(__file__).parent), str(Path(__file__).parent.parent / "shared")],
+    )
+
+
 if __name__ == "__main__":
-    # Default port is 7777; change with port=...
-    agent_os.serve(app="app:app", reload=True)
+    main()
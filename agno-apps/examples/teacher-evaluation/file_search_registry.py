@@ -0,0 +1,217 @@
+"""
+File Search Store Registry
+==========================
+Keeps track of the Gemini File Search stores created for local documents so
+that a store is only created (and the document only uploaded and indexed)
+when the document content actually changes.
+
+The registry is a small JSON file keyed by the SHA-256 hash of the document
+content. Access is serialized with a lock file so several uvicorn workers
+starting at the same time share a single store instead of each creating one.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+import hashlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+def hash_document(document_path: Path) -> str:
+    """Return the SHA-256 hex digest of a document's content."""
+    digest = hashlib.sha256()
+    with open(document_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileSearchStoreRegistry:
+    """
+    Content-hashed registry of File Search stores backed by a JSON file.
+
+    Each entry maps a document hash to the store holding that version of the
+    document. Stores recorded for older versions of the same document are
+    deleted when a new version is indexed.
+    """
+
+    def __init__(self, registry_path: Path):
+        self.registry_path = Path(registry_path)
+        self.lock_path = self.registry_path.with_suffix(self.registry_path.suffix + ".lock")
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold both the in-process and the cross-process registry lock."""
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.registry_path.exists():
+            return {}
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("stores", {})
+        except (OSError, ValueError):
+            # A corrupt registry only costs one re-upload
+            return {}
+
+    def _save(self, stores: Dict[str, Dict[str, Any]]) -> None:
+        tmp_path = self.registry_path.with_suffix(self.registry_path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stores": stores}, f, indent=2)
+        os.replace(tmp_path, self.registry_path)
+
+    @staticmethod
+    def _store_exists(model: Any, store_name: str) -> bool:
+        """
+        False only when the API reports the store as not found. Other errors
+        propagate, so a transient failure does not replace the registered
+        store with a new upload (the next run retries the resolution).
+        """
+        try:
+            model.get_file_search_store(store_name)
+            return True
+        except Exception as e:
+            # google.genai's APIError carries the HTTP status as `code`
+            if getattr(e, "code", None) == 404:
+                return False
+            raise
+
+    def resolve(self, model: Any, document_path: Path, display_name: str) -> str:
+        """
+        Return the name of a File Search store holding the current document.
+
+        Reuses the registered store when the document hash matches and the
+        store still exists remotely; otherwise creates a store, uploads the
+        document and waits for indexing. Stores registered for previous
+        versions of the same document are garbage-collected.
+        """
+        document_path = Path(document_path).resolve()
+        content_hash = hash_document(document_path)
+
+        with self._locked():
+            stores = self._load()
+
+            entry = stores.get(content_hash)
+            if entry and self._store_exists(model, entry["store_name"]):
+                store_name = entry["store_name"]
+            else:
+                store = model.create_file_search_store(display_name=display_name)
+                operation = model.upload_to_file_search_store(
+                    file_path=document_path,
+                    store_name=store.name,
+                    display_name=display_name,
+                )
+                model.wait_for_operation(operation)
+                store_name = store.name
+                stores[content_hash] = {
+                    "store_name": store_name,
+                    "document": str(document_path),
+                    "display_name": display_name,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                }
+
+            self._collect_stale(model, stores, document_path, content_hash)
+            self._save(stores)
+
+        return store_name
+
+    def _collect_stale(
+        self, model: Any, stores: Dict[str, Dict[str, Any]], document_path: Path, current_hash: str
+    ) -> None:
+        """Delete stores registered for outdated versions of a document."""
+        for content_hash, entry in list(stores.items()):
+            if content_hash == current_hash or entry.get("document") != str(document_path):
+                continue
+            try:
+                model.delete_file_search_store(entry["store_name"], force=True)
+            except Exception:
+                # Already gone remotely; dropping the entry is all that is left to do
+                pass
+            del stores[content_hash]
+
+
+class DeferredFileSearchStore:
+    """
+    Resolves a File Search store off the import path.
+
+    `start()` resolves the store on a background thread (used at server
+    startup); `wait()` blocks until the store is attached to the model and is
+    safe to call before every run.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        document_path: Path,
+        registry: FileSearchStoreRegistry,
+        display_name: str,
+    ):
+        self.model = model
+        self.document_path = Path(document_path)
+        self.registry = registry
+        self.display_name = display_name
+        self.store_name: Optional[str] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def _resolve(self) -> None:
+        try:
+            self.store_name = self.registry.resolve(self.model, self.document_path, self.display_name)
+            self.model.file_search_store_names = [self.store_name]
+            self._error = None
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._ready.set()
+
+    def start(self) -> None:
+        """Begin resolving the store in the background (no-op if already started)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._resolve, name="file-search-store", daemon=True)
+            self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._error is None
+
+    @property
+    def error(self) -> Optional[str]:
+        """Why the last resolution failed, if it did."""
+        return str(self._error) if self._error is not None else None
+
+    def wait(self, timeout: Optional[float] = None) -> str:
+        """Block until the store is resolved, starting resolution if needed."""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Timed out waiting for the File Search store to be ready")
+        if self._error is not None:
+            error = self._error
+            # Allow the next run to retry instead of failing forever
+            with self._lock:
+                self._thread = None
+            raise RuntimeError(f"Could not prepare File Search store: {error}") from error
+        return self.store_name
@@ -0,0 +1,438 @@
+"""
+Report Repair
+=============
+Turns the Report Writer's output into a valid `TeacherDevelopmentReport`
+when the model's JSON is slightly off, instead of failing or regenerating
+the whole report:
+
+1. Tolerant parsing: code fences and text around the JSON object are
+   ignored; trailing commas, Python literals and raw newlines inside strings
+   are fixed; a truncated object is closed after its last complete member.
+2. Field-level validation against the Pydantic models, plus the checks the
+   schema cannot express: every `source_url` is a URL from the source
+   material (the researcher's output), and there are 3-5 priority actions.
+3. Local fixes where the answer is known: a URL found next to the
+   strategy's name in the source material, priority actions beyond five
+   cut, a string where a list is expected split into lines.
+4. Targeted re-asks: only the fields still missing or invalid are asked for,
+   in one short request per round, and merged into the report.
+
+Items (strategies, growth areas) still invalid after the re-asks are
+dropped, so a strategy is never kept with an invented URL.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type, Union, get_args, get_origin
+import json
+import re
+import threading
+
+from pydantic import BaseModel, ValidationError
+
+Path = Tuple[Union[str, int], ...]
+
+URL = re.compile(r"https?://[^\s)\]>\"'<`]+")
+
+_FENCE_START = re.compile(r"^\s*```[a-zA-Z]*\s*")
+_FENCE_END = re.compile(r"\s*```\s*$")
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_LITERAL = re.compile(r"(True|False|None)\b")
+_PATH_PART = re.compile(r"([A-Za-z_]\w*)|\[(\d+)\]")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+MIN_PRIORITY_ACTIONS = 3
+MAX_PRIORITY_ACTIONS = 5
+
+
+class ReportRepairError(ValueError):
+    """Raised when required fields are still invalid after the re-asks."""
+
+
+# =============================================================================
+# TOLERANT JSON PARSING
+# =============================================================================
+
+def _close(text: str, stack: List[str]) -> str:
+    text = re.sub(r"[\s,:]+$", "", text)
+    return text + "".join(reversed(stack))
+
+
+def _repair_json(text: str) -> Tuple[str, List[Tuple[str, List[str]]]]:
+    """
+    One pass over a JSON object that fixes what can be fixed in place. Returns
+    the text closed where it ends, and the fallbacks: the text up to each
+    member separator, closed there (for a member cut off mid-way).
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch in "\n\r\t":
+                ch = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch]
+            out.append(ch)
+        elif ch == '"':
+            in_string = True
+            out.append(ch)
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            # Trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break  # End of the object; ignore anything after it
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+            out.append(ch)
+        else:
+            literal = _LITERAL.match(text, i)
+            if literal and not (i and (text[i - 1].isalnum() or text[i - 1] == "_")):
+                out.append(_LITERALS[literal.group(1)])
+                i = literal.end()
+                continue
+            out.append(ch)
+        i += 1
+
+    if escape:
+        out.pop()
+    if in_string:
+        out.append('"')
+    repaired = "".join(out)
+    fallbacks = [(_close(repaired[:position], cut_stack), cut_stack) for position, cut_stack in reversed(cuts)]
+    return _close(repaired, stack), fallbacks
+
+
+def loads_tolerant(text: str) -> Tuple[Optional[Any], bool]:
+    """
+    Parse the JSON object in `text`. Returns the value (None if no object
+    could be recovered) and whether it needed repairs.
+    """
+    text = _FENCE_END.sub("", _FENCE_START.sub("", text))
+    start = text.find("{")
+    if start == -1:
+        return None, False
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text[start:])
+        return value, False
+    except json.JSONDecodeError:
+        pass
+
+    repaired, fallbacks = _repair_json(text[start:])
+    for candidate in [repaired] + [text for text, _ in fallbacks[:50]]:
+        try:
+            return json.loads(candidate), True
+        except json.JSONDecodeError:
+            continue
+    return None, True
+
+
+# =============================================================================
+# FIELD PATHS
+# =============================================================================
+
+def format_path(path: Path) -> str:
+    """("recommended_strategies", 0, "source_url") -> "recommended_strategies[0].source_url"."""
+    text = ""
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else part)
+    return text
+
+
+def parse_path(text: str) -> Path:
+    return tuple(name if name else int(index) for name, index in _PATH_PART.findall(text))
+
+
+def get_path(data: Any, path: Path, default: Any = None) -> Any:
+    for part in path:
+        try:
+            data = data[part]
+        except (KeyError, IndexError, TypeError):
+            return default
+    return data
+
+
+def set_path(data: Dict[str, Any], path: Path, value: Any) -> bool:
+    """Set a value, creating missing objects on the way; False if the path does not fit the data."""
+    node: Any = data
+    for part, following in zip(path, path[1:]):
+        try:
+            child = node[part]
+        except (KeyError, IndexError, TypeError):
+            if not isinstance(node, dict):
+                return False
+            child = node[part] = [] if isinstance(following, int) else {}
+        node = child
+    last = path[-1]
+    if isinstance(node, dict) and isinstance(last, str):
+        node[last] = value
+    elif isinstance(node, list) and isinstance(last, int) and last <= len(node):
+        node[last:last + 1] = [value]
+    else:
+        return False
+    return True
+
+
+def field_description(schema: Type[BaseModel], path: Path) -> str:
+    """The `Field(description=...)` of the field at `path`, following nested models and lists."""
+    model: Any = schema
+    description = ""
+    for part in path:
+        if isinstance(part, int):
+            continue
+        fields = getattr(model, "model_fields", {})
+        if part not in fields:
+            return description
+        info = fields[part]
+        description = info.description or ""
+        annotation = info.annotation
+        while get_origin(annotation) is not None:
+            annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), None)
+        model = annotation
+    return description
+
+
+# =============================================================================
+# VALIDATION AND LOCAL FIXES
+# =============================================================================
+
+def _clean_url(url: str) -> str:
+    return url.rstrip(".,;:!?")
+
+
+def _url_key(url: str) -> str:
+    """Compare URLs ignoring scheme, "www." and a trailing slash."""
+    return re.sub(r"^https?://(www\.)?", "", url.lower()).rstrip("/")
+
+
+@dataclass
+class FieldProblem:
+    """A missing or invalid field; soft problems are reported but do not block the report."""
+    path: Path
+    message: str
+    soft: bool = False
+
+
+@dataclass
+class RepairAttempt:
+    """The report being repaired and what was done to it."""
+    data: Dict[str, Any]
+    source: str
+    urls: Dict[str, str]
+    repaired_json: bool = False
+    problems: List[FieldProblem] = field(default_factory=list)
+    fixed: List[str] = field(default_factory=list)
+    asked: List[str] = field(default_factory=list)
+    reasks: int = 0
+    dropped: List[str] = field(default_factory=list)
+
+
+class ReportRepair:
+    """Validates and repairs structured reports; `ask` callables send the targeted re-asks to a model."""
+
+    def __init__(self, schema: Type[BaseModel], max_reasks: int = 1):
+        self.schema = schema
+        self.max_reasks = max_reasks
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    # -------------------------------------------------------------------------
+    # Checks
+
+    def problems(self, attempt: RepairAttempt) -> List[FieldProblem]:
+        """Schema errors (by field) plus the URL and priority action checks."""
+        problems: List[FieldProblem] = []
+        try:
+            self.schema.model_validate(attempt.data)
+        except ValidationError as e:
+            problems += [FieldProblem(tuple(error["loc"]), error["msg"]) for error in e.errors()]
+
+        strategies = attempt.data.get("recommended_strategies")
+        if isinstance(strategies, list):
+            for i, strategy in enumerate(strategies):
+                url = strategy.get("source_url") if isinstance(strategy, dict) else None
+                if not isinstance(url, str) or not url:
+                    continue  # Reported by the schema check
+                if not URL.fullmatch(url):
+                    problems.append(FieldProblem(("recommended_strategies", i, "source_url"), "Not a URL"))
+                elif attempt.urls and _url_key(url) not in attempt.urls:
+                    problems.append(FieldProblem(
+                        ("recommended_strategies", i, "source_url"), "URL does not appear in the source material"
+                    ))
+
+        actions = attempt.data.get("priority_actions")
+        if isinstance(actions, list) and len(actions) < MIN_PRIORITY_ACTIONS:
+            problems.append(FieldProblem(
+                ("priority_actions",), f"Needs {MIN_PRIORITY_ACTIONS}-{MAX_PRIORITY_ACTIONS} actions", soft=True
+            ))
+        return problems
+
+    def _find_url(self, attempt: RepairAttempt, strategy: Dict[str, Any]) -> Optional[str]:
+        """A source URL next to the strategy's name or source title, or the real form of a mangled URL."""
+        given = strategy.get("source_url")
+        if isinstance(given, str) and _url_key(given) in attempt.urls:
+            return attempt.urls[_url_key(given)]
+        names = [str(strategy.get(key) or "").strip().lower() for key in ("source_title", "name")]
+        names = [name for name in names if len(name) >= 4]
+        source = attempt.source.lower()
+        for match in URL.finditer(attempt.source):
+            window = source[max(0, match.start() - 300):match.start()]
+            if any(name in window for name in names):
+                return _clean_url(match.group(0))
+        return None
+
+    def _fix_locally(self, attempt: RepairAttempt) -> None:
+        for problem in self.problems(attempt):
+            path, value = problem.path, get_path(attempt.data, problem.path)
+            fixed = None
+            if path[-1] == "source_url" and len(path) == 3:
+                strategy = get_path(attempt.data, path[:-1], {})
+                fixed = self._find_url(attempt, strategy) if isinstance(strategy, dict) else None
+                if fixed == value:
+                    fixed = None
+            elif isinstance(value, str) and path[-1] in ("implementation_steps", "priority_actions", "growth_areas"):
+                lines = [_LIST_ITEM.sub("", line).strip() for line in value.splitlines()]
+                fixed = [line for line in lines if line] or None
+            if fixed is not None and set_path(attempt.data, path, fixed):
+                attempt.fixed.append(format_path(path))
+
+        actions = attempt.data.get("priority_actions")
+        if isinstance(actions, list) and len(actions) > MAX_PRIORITY_ACTIONS:
+            attempt.data["priority_actions"] = actions[:MAX_PRIORITY_ACTIONS]
+            attempt.fixed.append("priority_actions")
+        attempt.problems = self.problems(attempt)
+
+    # -------------------------------------------------------------------------
+    # Steps (shared by repair and arepair)
+
+    def start(self, content: Any, source: str) -> RepairAttempt:
+        """Parse the writer's output and apply the local fixes."""
+        repaired_json = False
+        if isinstance(content, BaseModel):
+            data = content.model_dump(mode="json")
+        elif isinstance(content, dict):
+            data = content
+        else:
+            data, repaired_json = loads_tolerant(str(content or ""))
+            if not isinstance(data, dict):
+                data = {}
+        urls = {_url_key(_clean_url(url)): _clean_url(url) for url in URL.findall(source)}
+        attempt = RepairAttempt(data=data, source=source, urls=urls, repaired_json=repaired_json)
+        self._fix_locally(attempt)
+        return attempt
+
+    def reask_prompt(self, attempt: RepairAttempt) -> Optional[str]:
+        """Prompt asking for exactly the fields that are still wrong, or None if nothing is."""
+        if not attempt.problems:
+            return None
+        lines = []
+        for problem in attempt.problems:
+            description = field_description(self.schema, problem.path)
+            current = get_path(attempt.data, problem.path)
+            found = f" Current value: {json.dumps(current, ensure_ascii=False)}." if current is not None else ""
+            lines.append(f"- {format_path(problem.path)}: {description}. Problem: {problem.message}.{found}")
+        fields = "\n".join(lines)
+        report = json.dumps(attempt.data, ensure_ascii=False)
+        return f"""Fields to correct:
+{fields}
+
+Report so far:
+{report}
+
+Source material:
+{attempt.source}
+"""
+
+    def apply(self, attempt: RepairAttempt, reply: Any) -> None:
+        """Merge a re-ask reply ({"field.path": value, ...}) into the report."""
+        attempt.reasks += 1
+        asked = {problem.path for problem in attempt.problems}
+        attempt.asked += [format_path(path) for path in asked]
+        values, _ = loads_tolerant(reply) if isinstance(reply, str) else (reply, False)
+        if isinstance(values, dict):
+            for key, value in values.items():
+                path = parse_path(str(key))
+                if path in asked and value is not None:
+                    set_path(attempt.data, path, value)
+        self._fix_locally(attempt)
+
+    def finish(self, attempt: RepairAttempt) -> BaseModel:
+        """Drop the list items that are still invalid and build the report; raises ReportRepairError."""
+        hard = [problem for problem in attempt.problems if not problem.soft]
+        invalid_items: Dict[str, Set[int]] = {}
+        for problem in hard:
+            path = problem.path
+            if len(path) >= 2 and path[0] in ("recommended_strategies", "growth_areas") and isinstance(path[1], int):
+                invalid_items.setdefault(path[0], set()).add(path[1])
+        for name, indexes in invalid_items.items():
+            items = attempt.data.get(name)
+            if isinstance(items, list):
+                attempt.data[name] = [item for i, item in enumerate(items) if i not in indexes]
+                attempt.dropped += [f"{name}[{i}]" for i in sorted(indexes)]
+
+        try:
+            report = self.schema.model_validate(attempt.data)
+        except ValidationError as e:
+            self._record(attempt, failed=True)
+            fields = ", ".join(format_path(tuple(error["loc"])) for error in e.errors())
+            raise ReportRepairError(f"Report still invalid after {attempt.reasks} re-ask(s): {fields}") from e
+        self._record(attempt)
+        return report
+
+    def _record(self, attempt: RepairAttempt, failed: bool = False) -> None:
+        with self._lock:
+            self._counts["reports"] += 1
+            self._counts["valid_as_written"] += not (attempt.repaired_json or attempt.fixed or attempt.reasks)
+            self._counts["json_repaired"] += attempt.repaired_json
+            self._counts["fields_fixed_locally"] += len(attempt.fixed)
+            self._counts["reasks"] += attempt.reasks
+            self._counts["fields_reasked"] += len(attempt.asked)
+            self._counts["items_dropped"] += len(attempt.dropped)
+            self._counts["failed"] += failed
+
+    # -------------------------------------------------------------------------
+    # Entry points
+
+    def repair(self, content: Any, source: str, ask: Callable[[str], Any]) -> BaseModel:
+        """Validate the writer's output, fix it locally and re-ask `ask` for the remaining fields."""
+        attempt = self.start(content, source)
+        for _ in range(self.max_reasks):
+            prompt = self.reask_prompt(attempt)
+            if prompt is None:
+                break
+            self.apply(attempt, ask(prompt))
+        return self.finish(attempt)
+
+    async def arepair(self, content: Any, source: str, ask: Callable[[str], Awaitable[Any]]) -> BaseModel:
+        """`repair` with an async `ask`."""
+        attempt = self.start(content, source)
+        for _ in range(self.max_reasks):
+            prompt = self.reask_prompt(attempt)
+            if prompt is None:
+                break
+            self.apply(attempt, await ask(prompt))
+        return self.finish(attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        """Reports checked and how they were repaired."""
+        with self._lock:
+            return {
+                key: self._counts[key]
+                for key in ("reports", "valid_as_written", "json_repaired", "fields_fixed_locally", "reasks",
+                            "fields_reasked", "items_dropped", "failed")
+            }
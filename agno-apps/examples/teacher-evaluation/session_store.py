@@ -0,0 +1,267 @@
+"""
+Session Store
+=============
+Bounded SQLite storage for the sessions and runs AgentOS keeps.
+
+AgentOS saves every team and workflow run with its full transcript: the
+leader's messages and tool calls, plus one row per member run the team
+delegated to. `BoundedSessionStore` keeps an Agno `SqliteDb` within bounds
+with a periodic maintenance pass:
+
+- Compaction: finished runs older than `compact_after` seconds are reduced
+  to their final content (`final_content`, e.g. the report) with their
+  identity, status, input and metrics. Their member runs are deleted.
+- Retention: sessions not updated for `max_age` seconds are deleted with
+  their runs.
+- Size cap: while the database holds more than `max_bytes`, the least
+  recently updated sessions are deleted. SQLite reuses the freed pages, so
+  the file levels off near the cap without a VACUUM, and each pass ends
+  with a checkpoint that truncates the write-ahead log.
+
+`maintain()` runs one pass and returns what it did; `start()` repeats it
+every `interval` seconds on a daemon thread. Totals are in `stats()`.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from agno.db.sqlite import SqliteDb
+from sqlalchemy import text
+
+logger = logging.getLogger("session_store")
+
+# Run fields kept by compaction; everything else (messages, tool calls, events, ...) is dropped
+COMPACT_FIELDS = (
+    "run_id", "agent_id", "agent_name", "team_id", "team_name", "workflow_id", "workflow_name",
+    "session_id", "parent_run_id", "user_id", "input", "content", "content_type", "model",
+    "model_provider", "metrics", "status", "created_at",
+)
+
+# Runs that may still change are never compacted
+FINISHED_STATUSES = ("COMPLETED", "ERROR", "CANCELLED")
+
+# Returns the content a compacted run keeps and its content type, from its run data and its member runs' run data
+FinalContent = Callable[[Dict[str, Any], List[Dict[str, Any]]], Tuple[Any, str]]
+
+
+def _own_content(run: Dict[str, Any], members: List[Dict[str, Any]]) -> Tuple[Any, str]:
+    return run.get("content"), run.get("content_type") or "str"
+
+
+class BoundedSessionStore:
+    """Compaction, age-based retention and a size cap for an Agno SqliteDb."""
+
+    def __init__(
+        self,
+        db_file: str,
+        compact_after: float = 3600.0,
+        max_age: float = 30 * 24 * 3600.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        interval: float = 300.0,
+        final_content: FinalContent = _own_content,
+        batch_size: int = 200,
+    ):
+        self.db = SqliteDb(db_file=db_file)
+        self.compact_after = compact_after
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.final_content = final_content
+        self.batch_size = batch_size
+        self._counters = {"passes": 0, "runs_compacted": 0, "member_runs_deleted": 0,
+                          "sessions_expired": 0, "sessions_evicted": 0, "errors": 0}
+        self._last_pass: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "BoundedSessionStore":
+        """Run `maintain()` every `interval` seconds on a daemon thread (once)."""
+        with self._lock:
+            if self._thread is None and self.interval > 0:
+                self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.maintain()
+            except Exception as e:
+                # The tables do not exist until the first run is saved; try again next time
+                with self._lock:
+                    self._counters["errors"] += 1
+                logger.warning("Session store maintenance failed: %s", e)
+
+    # -------------------------------------------------------------------------
+    # Maintenance
+    # -------------------------------------------------------------------------
+
+    def _tables_exist(self) -> bool:
+        return self.db.table_exists(self.db.session_table_name) and self.db.table_exists(self.db.runs_table_name)
+
+    def maintain(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """One compaction, retention and size-cap pass."""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        result = {"runs_compacted": 0, "member_runs_deleted": 0, "sessions_expired": 0, "sessions_evicted": 0}
+        if self._tables_exist():
+            if self.max_age > 0:
+                result["sessions_expired"] = self._expire(now - self.max_age)
+            if self.compact_after >= 0:
+                compacted, deleted = self._compact(now - self.compact_after)
+                result["runs_compacted"], result["member_runs_deleted"] = compacted, deleted
+            if self.max_bytes > 0:
+                result["sessions_evicted"] = self._evict()
+            with self.db.db_engine.connect() as conn:
+                conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        with self._lock:
+            self._counters["passes"] += 1
+            for name in ("runs_compacted", "member_runs_deleted", "sessions_expired", "sessions_evicted"):
+                self._counters[name] += result[name]
+            self._last_pass = result
+        return result
+
+    def _compact(self, cutoff: float) -> Tuple[int, int]:
+        """Compact the finished top-level runs created before `cutoff`; returns (runs, member runs deleted)."""
+        runs = self.db.runs_table_name
+        statuses = ", ".join(f"'{status}'" for status in FINISHED_STATUSES)
+        compacted = deleted = 0
+        while True:
+            with self.db.db_engine.begin() as conn:
+                rows = conn.execute(text(
+                    f"SELECT run_id, run_data FROM {runs} WHERE parent_run_id IS NULL AND created_at < :cutoff"
+                    f" AND status IN ({statuses}) AND json_extract(run_data, '$.metadata.compacted') IS NULL"
+                    " LIMIT :limit"
+                ), {"cutoff": int(cutoff), "limit": self.batch_size}).fetchall()
+                for run_id, run_data in rows:
+                    run = json.loads(run_data) if isinstance(run_data, str) else dict(run_data)
+                    members, parents = [], [run_id]
+                    # Member runs, and the runs of members that are teams themselves
+                    while parents:
+                        params = {f"p{i}": parent for i, parent in enumerate(parents)}
+                        placeholders = ", ".join(f":{name}" for name in params)
+                        children = conn.execute(text(
+                            f"SELECT run_id, run_data FROM {runs} WHERE parent_run_id IN ({placeholders})"
+                        ), params).fetchall()
+                        members += [json.loads(data) if isinstance(data, str) else dict(data) for _, data in children]
+                        parents = [child_id for child_id, _ in children]
+                        if children:
+                            ids = {f"r{i}": child_id for i, (child_id, _) in enumerate(children)}
+                            conn.execute(text(
+                                f"DELETE FROM {runs} WHERE run_id IN ({', '.join(f':{name}' for name in ids)})"
+                            ), ids)
+                            deleted += len(children)
+                    compact = {field: run[field] for field in COMPACT_FIELDS if field in run}
+                    compact["content"], compact["content_type"] = self.final_content(run, members)
+                    compact["metadata"] = {**(run.get("metadata") or {}), "compacted": True}
+                    conn.execute(
+                        text(f"UPDATE {runs} SET run_data = :data WHERE run_id = :run_id"),
+                        {"data": json.dumps(compact, default=str), "run_id": run_id},
+                    )
+                    compacted += 1
+            if len(rows) < self.batch_size:
+                return compacted, deleted
+
+    def _expire(self, cutoff: float) -> int:
+        """Delete the sessions not updated since `cutoff`."""
+        sessions = self.db.session_table_name
+        expired = 0
+        while True:
+            with self.db.db_engine.connect() as conn:
+                ids = [row[0] for row in conn.execute(text(
+                    f"SELECT session_id FROM {sessions} WHERE COALESCE(updated_at, created_at) < :cutoff LIMIT :limit"
+                ), {"cutoff": int(cutoff), "limit": self.batch_size})]
+            if not ids:
+                return expired
+            self._delete_sessions(ids)
+            expired += len(ids)
+
+    def _evict(self) -> int:
+        """Delete the least recently updated sessions while the database is over `max_bytes`."""
+        sessions = self.db.session_table_name
+        evicted = 0
+        while self.size_bytes() > self.max_bytes:
+            with self.db.db_engine.connect() as conn:
+                ids = [row[0] for row in conn.execute(text(
+                    f"SELECT session_id FROM {sessions} ORDER BY COALESCE(updated_at, created_at) LIMIT :limit"
+                ), {"limit": max(1, self.batch_size // 10)})]
+            if not ids:
+                break
+            self._delete_sessions(ids)
+            evicted += len(ids)
+        return evicted
+
+    def _delete_sessions(self, session_ids: List[str]) -> None:
+        # Agno removes what it keeps per session; runs are deleted explicitly in case the
+        # foreign key cascade is off (databases created by older Agno versions)
+        self.db.delete_sessions(session_ids)
+        runs = self.db.runs_table_name
+        params = {f"s{i}": session_id for i, session_id in enumerate(session_ids)}
+        with self.db.db_engine.begin() as conn:
+            conn.execute(text(
+                f"DELETE FROM {runs} WHERE session_id IN ({', '.join(f':{name}' for name in params)})"
+            ), params)
+
+    # -------------------------------------------------------------------------
+    # Stats
+    # -------------------------------------------------------------------------
+
+    def size_bytes(self) -> int:
+        """Bytes in use (pages minus free pages), which deletes reduce without shrinking the file."""
+        with self.db.db_engine.connect() as conn:
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            free_pages = conn.execute(text("PRAGMA freelist_count")).scalar()
+        return (page_count - free_pages) * page_size
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {"sessions": 0, "runs": 0, "compacted_runs": 0}
+        if self._tables_exist():
+            with self.db.db_engine.connect() as conn:
+                counts["sessions"] = conn.execute(text(f"SELECT COUNT(*) FROM {self.db.session_table_name}")).scalar()
+                counts["runs"], counts["compacted_runs"] = conn.execute(text(
+                    f"SELECT COUNT(*), COUNT(json_extract(run_data, '$.metadata.compacted'))"
+                    f" FROM {self.db.runs_table_name}"
+                )).one()
+        with self._lock:
+            counters, last_pass = dict(self._counters), dict(self._last_pass)
+        files = [self.db.db_file, f"{self.db.db_file}-wal"] if self.db.db_file else []
+        file_bytes = sum(os.path.getsize(path) for path in files if os.path.exists(path))
+        return {
+            **counts,
+            **counters,
+            "size_bytes": self.size_bytes(),
+            "file_bytes": file_bytes,
+            "max_bytes": self.max_bytes,
+            "last_pass": last_pass,
+        }
+
+
+def store_from_env(final_content: FinalContent = _own_content, default_path: str = "sessions.db",
+                   prefix: str = "SESSION") -> Optional[BoundedSessionStore]:
+    """
+    Build the store from environment variables: `{prefix}_DB` (SQLite path, "off"
+    for no database), `{prefix}_COMPACT_AFTER` (seconds, negative = never compact),
+    `{prefix}_MAX_AGE` (seconds, 0 = never expire), `{prefix}_MAX_MB` (0 = no cap) and
+    `{prefix}_MAINTENANCE_INTERVAL` (seconds between passes, 0 = no background passes).
+    """
+    path = os.getenv(f"{prefix}_DB", default_path)
+    if path.lower() in ("0", "off", "false", "no"):
+        return None
+    return BoundedSessionStore(
+        db_file=path,
+        compact_after=float(os.getenv(f"{prefix}_COMPACT_AFTER", "3600")),
+        max_age=float(os.getenv(f"{prefix}_MAX_AGE", str(30 * 24 * 3600))),
+        max_bytes=int(float(os.getenv(f"{prefix}_MAX_MB", "256")) * 1024 * 1024),
+        interval=float(os.getenv(f"{prefix}_MAINTENANCE_INTERVAL", "300")),
+        final_content=final_content,
+    )
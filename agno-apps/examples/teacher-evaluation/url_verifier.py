@@ -0,0 +1,313 @@
+"""
+URL Verifier
+============
+Checks the source URLs in the Strategy Researcher's output after research
+and drops the strategies whose sources do not hold up, without another
+model call:
+
+- Grounding: when the run returned Gemini search grounding metadata, a URL
+  must belong to one of the grounded sources (same site as a cited page).
+- Reachability: a pluggable fetcher requests the URL (`HttpFetcher`, or
+  any object with `fetch(url)` / `afetch(url)` returning an HTTP status or
+  None for a network error). Without a fetcher only grounding is checked.
+
+Grounding is checked in every run, against that run's own search results,
+before the cache is consulted. Reachability verdicts (fetch results) are
+cached per URL with a TTL, in memory plus an optional SQLite file, so a URL
+fetched once is not fetched again in later evaluations. Failures are cached
+too (negative caching, with a shorter TTL). URLs of one
+research output are checked concurrently.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+
+URL = re.compile(r"https?://[^\s)\]>\"'<`]+")
+
+# Markdown headings, numbered strategy titles and lines that are only a bold title start a new
+# block; bold labels inside a strategy ("**Source:** <url>") do not
+_BLOCK_START = re.compile(r"^(?:#{1,6}\s|\d+\.\s+\*\*|\*\*[^*\n]+\*\*[ \t]*$)", re.MULTILINE)
+
+# Hosts that only redirect to the grounded page (their chunk title names the real site)
+_REDIRECT_HOSTS = ("vertexaisearch.cloud.google.com",)
+
+# Statuses of pages that exist but refuse automated requests
+_EXISTING_STATUSES = (401, 403, 429)
+
+
+def _clean_url(url: str) -> str:
+    return url.rstrip(".,;:!?*_")
+
+
+def _site(value: str) -> str:
+    """Host of a URL (or a bare domain such as a grounding chunk title), without "www."."""
+    host = urlsplit(value).hostname if "://" in value else value.strip().split("/")[0]
+    host = (host or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+# =============================================================================
+# FETCHERS
+# =============================================================================
+
+class HttpFetcher:
+    """HEAD (then GET when HEAD is refused) with redirects followed; shares one client per event loop."""
+
+    def __init__(self, timeout: float = 5.0):
+        import httpx
+
+        self.timeout = timeout
+        self._client = httpx.Client(timeout=timeout, follow_redirects=True)
+        self._async_clients: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+    def fetch(self, url: str) -> Optional[int]:
+        try:
+            status = self._client.head(url).status_code
+            if status in (405, 501):
+                status = self._client.get(url).status_code
+            return status
+        except Exception:
+            return None
+
+    async def afetch(self, url: str) -> Optional[int]:
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        try:
+            status = (await client.head(url)).status_code
+            if status in (405, 501):
+                status = (await client.get(url)).status_code
+            return status
+        except Exception:
+            return None
+
+
+# =============================================================================
+# VERIFIER
+# =============================================================================
+
+@dataclass
+class UrlCheck:
+    """Verdict for one URL: "ok", "ungrounded", "unreachable" or "unchecked" (nothing to check against)."""
+    url: str
+    status: str
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("ok", "unchecked")
+
+
+@dataclass
+class VerifiedText:
+    """Research output with failed strategies removed."""
+    text: str
+    checks: List[UrlCheck] = field(default_factory=list)
+    dropped: int = 0
+
+
+class UrlVerifier:
+    """Grounding and reachability checks with a persistent, TTL'd verdict cache."""
+
+    def __init__(
+        self,
+        fetcher: Any = None,
+        ttl_seconds: float = 30 * 24 * 3600,
+        negative_ttl_seconds: float = 24 * 3600,
+        db_path: Optional[Path] = None,
+        concurrency: int = 8,
+    ):
+        self.fetcher = fetcher
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.concurrency = max(1, concurrency)
+        self._lock = threading.Lock()
+        self._verdicts: Dict[str, Tuple[str, float]] = {}
+        self._stats = {"checked": 0, "cache_hits": 0, "fetches": 0, "ok": 0, "ungrounded": 0, "unreachable": 0,
+                       "unchecked": 0, "strategies_dropped": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, status TEXT NOT NULL, checked_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            for url, status, checked_at in self._db.execute("SELECT url, status, checked_at FROM urls"):
+                self._verdicts[url] = (status, checked_at)
+
+    # -------------------------------------------------------------------------
+    # Cache
+
+    def _cached(self, url: str) -> Optional[str]:
+        with self._lock:
+            entry = self._verdicts.get(url)
+            if entry is None:
+                return None
+            status, checked_at = entry
+            ttl = self.ttl_seconds if status == "ok" else self.negative_ttl_seconds
+            if ttl > 0 and time.time() - checked_at > ttl:
+                del self._verdicts[url]
+                return None
+            self._stats["cache_hits"] += 1
+            return status
+
+    def _remember(self, url: str, status: str) -> None:
+        checked_at = time.time()
+        with self._lock:
+            self._verdicts[url] = (status, checked_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO urls (url, status, checked_at) VALUES (?, ?, ?)", (url, status, checked_at)
+                )
+                self._db.commit()
+
+    # -------------------------------------------------------------------------
+    # Checks
+
+    @staticmethod
+    def grounded_sites(grounding: List[Tuple[str, Optional[str]]]) -> set:
+        """Sites of the grounded pages, from (uri, title) pairs of the search grounding metadata."""
+        sites = set()
+        for uri, title in grounding:
+            site = _site(uri)
+            if site in _REDIRECT_HOSTS:
+                site = _site(title or "")
+            if site:
+                sites.add(site)
+        return sites
+
+    def _precheck(self, url: str, sites: set) -> Optional[UrlCheck]:
+        """A verdict without fetching (grounding, then cache), or None if the URL must be fetched."""
+        if sites:
+            site = _site(url)
+            if not any(site == grounded or site.endswith("." + grounded) for grounded in sites):
+                return UrlCheck(url, "ungrounded")
+        cached = self._cached(url)
+        if cached is not None:
+            return UrlCheck(url, cached, cached=True)
+        if self.fetcher is None:
+            # Grounded in this run only: not a reachability verdict, so not cached
+            return UrlCheck(url, "ok" if sites else "unchecked")
+        return None
+
+    def _verdict(self, url: str, status: Optional[int]) -> UrlCheck:
+        reachable = status is not None and (status < 400 or status in _EXISTING_STATUSES)
+        check = UrlCheck(url, "ok" if reachable else "unreachable")
+        self._remember(url, check.status)
+        return check
+
+    def check_urls(self, urls: List[str], grounding: List[Tuple[str, Optional[str]]] = ()) -> List[UrlCheck]:
+        """Verify URLs, fetching the uncached ones concurrently in threads."""
+        sites = self.grounded_sites(list(grounding))
+        checks = {url: self._precheck(url, sites) for url in urls}
+        pending = [url for url, check in checks.items() if check is None]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending))) as pool:
+                for url, status in zip(pending, pool.map(self.fetcher.fetch, pending)):
+                    checks[url] = self._verdict(url, status)
+        self._count(checks.values(), fetches=len(pending))
+        return [checks[url] for url in urls]
+
+    async def acheck_urls(self, urls: List[str], grounding: List[Tuple[str, Optional[str]]] = ()) -> List[UrlCheck]:
+        """`check_urls` with the uncached fetches as concurrent tasks."""
+        sites = self.grounded_sites(list(grounding))
+        checks = {url: self._precheck(url, sites) for url in urls}
+        pending = [url for url, check in checks.items() if check is None]
+        if pending:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(url: str) -> Optional[int]:
+                async with semaphore:
+                    return await self.fetcher.afetch(url)
+
+            for url, status in zip(pending, await asyncio.gather(*(fetch(url) for url in pending))):
+                checks[url] = self._verdict(url, status)
+        self._count(checks.values(), fetches=len(pending))
+        return [checks[url] for url in urls]
+
+    def _count(self, checks, fetches: int) -> None:
+        with self._lock:
+            self._stats["fetches"] += fetches
+            for check in checks:
+                self._stats["checked"] += 1
+                self._stats[check.status] += 1
+
+    # -------------------------------------------------------------------------
+    # Research output
+
+    @staticmethod
+    def _blocks(text: str) -> List[str]:
+        starts = sorted({0, *(match.start() for match in _BLOCK_START.finditer(text))})
+        return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+
+    def _filter(self, text: str, checks: List[UrlCheck]) -> VerifiedText:
+        """Drop blocks none of whose URLs passed; remove failed URLs from the blocks that stay."""
+        verdicts = {check.url: check.ok for check in checks}
+        kept, dropped = [], 0
+        for block in self._blocks(text):
+            urls = [_clean_url(url) for url in URL.findall(block)]
+            if urls and not any(verdicts.get(url, True) for url in urls):
+                dropped += 1
+                continue
+            for url in urls:
+                if not verdicts.get(url, True):
+                    block = block.replace(url, "(unverified link removed)")
+            kept.append(block)
+        if dropped:
+            with self._lock:
+                self._stats["strategies_dropped"] += dropped
+        return VerifiedText(text="".join(kept).strip(), checks=checks, dropped=dropped)
+
+    @staticmethod
+    def urls_in(text: str) -> List[str]:
+        return list(dict.fromkeys(_clean_url(url) for url in URL.findall(text)))
+
+    def verify_text(self, text: str, grounding: List[Tuple[str, Optional[str]]] = ()) -> VerifiedText:
+        """Check every URL in a research output and drop the strategies whose sources fail."""
+        return self._filter(text, self.check_urls(self.urls_in(text), grounding))
+
+    async def averify_text(self, text: str, grounding: List[Tuple[str, Optional[str]]] = ()) -> VerifiedText:
+        """`verify_text` for async callers."""
+        return self._filter(text, await self.acheck_urls(self.urls_in(text), grounding))
+
+    def stats(self) -> Dict[str, Any]:
+        """Verdict counts, cache hits, fetches and cache size."""
+        with self._lock:
+            return {**self._stats, "cached_urls": len(self._verdicts), "disk_enabled": self._db is not None,
+                    "fetcher": type(self.fetcher).__name__ if self.fetcher is not None else None}
+
+
+def grounding_sources(run_output: Any) -> List[Tuple[str, Optional[str]]]:
+    """(uri, title) of every web source in a run's search grounding metadata."""
+    citations = getattr(run_output, "citations", None)
+    return [(citation.url, citation.title) for citation in (getattr(citations, "urls", None) or []) if citation.url]
+
+
+def verifier_from_env(prefix: str = "URL_VERIFY") -> UrlVerifier:
+    """
+    Build the verifier from environment variables: `{prefix}_FETCH` ("off" skips
+    reachability checks), `{prefix}_TIMEOUT` (seconds per request), `{prefix}_TTL`
+    and `{prefix}_NEGATIVE_TTL` (seconds, 0 = never expire) and `{prefix}_DB`
+    (SQLite path; unset = memory only).
+    """
+    fetch = os.getenv(f"{prefix}_FETCH", "on").lower() not in ("0", "off", "false", "no")
+    return UrlVerifier(
+        fetcher=HttpFetcher(timeout=float(os.getenv(f"{prefix}_TIMEOUT", "5"))) if fetch else None,
+        ttl_seconds=float(os.getenv(f"{prefix}_TTL", str(30 * 24 * 3600))),
+        negative_ttl_seconds=float(os.getenv(f"{prefix}_NEGATIVE_TTL", str(24 * 3600))),
+        db_path=os.getenv(f"{prefix}_DB") or None,
+    )